@@ -4,10 +4,11 @@ Servicio de transcripción de audio usando OpenAI Whisper
 """
 
 import os
-import tempfile
+import math
+import time
 import asyncio
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Union
 import aiofiles
 from dotenv import load_dotenv
 
@@ -22,16 +23,23 @@ from loguru import logger
 
 from services.transcription_service import TranscriptionService
 from services.audio_processor import AudioProcessor
-from services.job_queue_service import job_queue_service
+from services.job_queue_service import job_queue_service, InflightJobAvailable
 from services.websocket_manager import websocket_manager
 from services.convex_client import initialize_convex_client
+from services.result_cache import transcription_cache, CachedResultAvailable
+from services.transcoding_pool import transcoding_pool, TranscodingPoolBusyError
+from services.batch_transcription_service import batch_transcription_service
+from utils.upload_stream import UploadStream, IngestedUpload
 from models.transcription_models import (
     TranscriptionResponse,
     TranscriptionRequest,
     HealthResponse,
     ErrorResponse,
     JobSubmissionResponse,
-    TranscriptionJob
+    TranscriptionJob,
+    BatchTranscriptionResponse,
+    BatchSubmissionResponse,
+    BatchJob
 )
 # from utils.auth import verify_bearer_token
 
@@ -73,6 +81,12 @@ app.add_middleware(
 transcription_service = TranscriptionService()
 audio_processor = AudioProcessor()
 
+# Configuración de ingesta de uploads
+# El audio largo se trocea antes de enviarlo a Groq, así que el límite es del upload
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_FILE_SIZE_MB") or 25) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+STREAMING_INGEST = os.getenv("STREAMING_INGEST", "true").lower() == "true"
+
 # Configuración de logging
 logger.add("logs/api.log", rotation="1 day", retention="7 days", level="INFO")
 
@@ -102,6 +116,8 @@ async def startup_event():
 
         # Inicializar job queue service
         logger.info("🔄 Inicializando job queue service...")
+        # Los jobs recuperados tras un reinicio también notifican por WebSocket
+        job_queue_service.default_progress_callback = broadcast_job_update
         await job_queue_service.start()
         logger.info("✅ Job queue service inicializado")
 
@@ -207,69 +223,61 @@ async def transcribe_audio(
     Transcribir archivo de audio usando OpenAI Whisper
     
     Formatos soportados: MP3, WAV, M4A, FLAC, OGG, WEBM, MP4
-    Tamaño máximo: 25MB
+    Tamaño máximo: MAX_FILE_SIZE_MB (audio largo se transcribe por ventanas)
     """
     
     # Validar archivo
     if not file.filename:
         raise HTTPException(status_code=400, detail="No se proporcionó archivo")
     
-    # Validar tamaño (25MB máximo)
-    max_size = 25 * 1024 * 1024  # 25MB
-    file_size = 0
-    
+    temp_file_paths: List[str] = []
+    cache_params = {
+        "language": language,
+        "model": model,
+        "temperature": temperature,
+        "initial_prompt": initial_prompt,
+        "return_timestamps": return_timestamps
+    }
+
     try:
-        # Crear archivo temporal
-        temp_file_path = None
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
-            temp_file_path = temp_file.name
-            
-            # Leer archivo en chunks para validar tamaño
-            while chunk := await file.read(8192):  # 8KB chunks
-                file_size += len(chunk)
-                if file_size > max_size:
-                    os.unlink(temp_file_path)
-                    raise HTTPException(
-                        status_code=413, 
-                        detail=f"Archivo demasiado grande. Máximo: {max_size // (1024*1024)}MB"
-                    )
-                temp_file.write(chunk)
-        
-        logger.info(f"📁 Archivo recibido: {file.filename} ({file_size / (1024*1024):.2f}MB)")
-        
-        # Procesar audio
-        processed_audio_path = await audio_processor.process_audio_file(temp_file_path)
+        # Recibir y decodificar el upload (streaming a FFmpeg cuando es posible)
+        upload = await ingest_upload(file, cache_params)
+        temp_file_paths = upload.temp_file_paths
+
+        logger.info(f"📁 Archivo recibido: {file.filename} ({upload.size / (1024*1024):.2f}MB)")
+
+        if upload.cached_result:
+            return upload.cached_result
         
         # Crear request de transcripción
         transcription_request = TranscriptionRequest(
-            audio_file_path=processed_audio_path,
+            audio_file_path=upload.processed_audio_path,
             language=language if language != "auto" else None,
             model=model,
             return_timestamps=return_timestamps,
             temperature=temperature,
-            initial_prompt=initial_prompt
+            initial_prompt=initial_prompt,
+            audio_metadata=upload.audio_metadata
         )
         
         # Transcribir
         result = await transcription_service.transcribe(transcription_request)
+        await transcription_cache.put(upload.cache_key, result)
         
         # Programar limpieza de archivos temporales
-        background_tasks.add_task(cleanup_temp_files, [temp_file_path, processed_audio_path])
+        background_tasks.add_task(cleanup_temp_files, temp_file_paths)
         
         logger.info(f"✅ Transcripción completada para: {file.filename}")
         return result
         
     except HTTPException:
         # Re-lanzar HTTPExceptions
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        await cleanup_temp_files(temp_file_paths)
         raise
         
     except Exception as e:
         # Limpiar archivos en caso de error
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        await cleanup_temp_files(temp_file_paths)
         
         logger.error(f"❌ Error transcribiendo {file.filename}: {str(e)}")
         raise HTTPException(
@@ -348,7 +356,9 @@ async def submit_transcription_job(
     model: Optional[str] = Form(default="whisper-large-v3-turbo", description="Modelo Whisper (whisper-large-v3-turbo)"),
     return_timestamps: bool = Form(default=True, description="Incluir timestamps en la transcripción"),
     temperature: float = Form(default=0.0, description="Temperatura para la transcripción (0.0-1.0)"),
-    initial_prompt: Optional[str] = Form(default=None, description="Prompt inicial para mejorar la transcripción")
+    initial_prompt: Optional[str] = Form(default=None, description="Prompt inicial para mejorar la transcripción"),
+    tenant_id: Optional[str] = Form(default=None, description="Usuario o tenant (la cola reparte los workers de forma justa entre tenants)"),
+    priority: int = Form(default=0, description="Prioridad del job (mayor se atiende antes; p. ej. 10 para uso interactivo)")
 ):
     """
     Enviar archivo de audio para transcripción en background
@@ -360,70 +370,81 @@ async def submit_transcription_job(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No se proporcionó archivo")
 
-    # Validar tamaño (25MB máximo)
-    max_size = 25 * 1024 * 1024  # 25MB
-    file_size = 0
-    temp_file_path = None
+    temp_file_paths: List[str] = []
+    cache_params = {
+        "language": language,
+        "model": model,
+        "temperature": temperature,
+        "initial_prompt": initial_prompt,
+        "return_timestamps": return_timestamps
+    }
 
     try:
-        # Crear archivo temporal
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
-            temp_file_path = temp_file.name
-
-            # Leer archivo en chunks para validar tamaño
-            while chunk := await file.read(8192):  # 8KB chunks
-                file_size += len(chunk)
-                if file_size > max_size:
-                    os.unlink(temp_file_path)
-                    raise HTTPException(
-                        status_code=413,
-                        detail=f"Archivo demasiado grande. Máximo: {max_size // (1024*1024)}MB"
-                    )
-                temp_file.write(chunk)
+        # Recibir y decodificar el upload (streaming a FFmpeg cuando es posible)
+        upload = await ingest_upload(file, cache_params, join_inflight=True)
+        file_size = upload.size
+        processed_audio_path = upload.processed_audio_path
 
         logger.info(f"📁 Archivo recibido para job: {file.filename} ({file_size / (1024*1024):.2f}MB)")
 
-        # Procesar audio
-        processed_audio_path = await audio_processor.process_audio_file(temp_file_path)
+        # El job solo necesita el audio procesado; el original se puede borrar ya
+        await cleanup_temp_files([path for path in upload.temp_file_paths if path != processed_audio_path])
+        if processed_audio_path:
+            temp_file_paths = [processed_audio_path]
 
         # Crear request de transcripción
         transcription_request = TranscriptionRequest(
-            audio_file_path=processed_audio_path,
+            audio_file_path=processed_audio_path or f"cache://{upload.content_sha256}",
             language=language if language != "auto" else None,
             model=model,
             return_timestamps=return_timestamps,
             temperature=temperature,
-            initial_prompt=initial_prompt
+            initial_prompt=initial_prompt,
+            audio_metadata=upload.audio_metadata
         )
 
-        # Crear callback de progreso para WebSocket
-        async def progress_callback(job: TranscriptionJob):
-            await websocket_manager.broadcast_progress(job)
-
-            # Si está completado o falló, enviar mensaje final
-            if job.status.value in ["completed", "failed", "cancelled"]:
-                await websocket_manager.broadcast_completion(job)
-
-        # Enviar job a la cola
-        job_id = await job_queue_service.submit_job(
-            processed_audio_path,
-            transcription_request,
-            progress_callback
-        )
+        # Callback de progreso para WebSocket
+        progress_callback = broadcast_job_update
+
+        if upload.cached_result:
+            # Resultado en caché: el job nace completado, sin FFmpeg ni Groq
+            job_id = await job_queue_service.submit_cached_result(
+                transcription_request,
+                upload.cached_result,
+                progress_callback
+            )
+        elif upload.inflight_job_id:
+            # Misma entrada que un job en curso: se adjunta a él sin haber pasado por FFmpeg
+            job_id = await job_queue_service.attach_to_job(
+                upload.inflight_job_id,
+                transcription_request,
+                progress_callback,
+                tenant_id=tenant_id,
+                priority=priority
+            )
+            if job_id is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="El job con el mismo audio terminó sin resultado, reintentar",
+                    headers={"Retry-After": "1"}
+                )
+        else:
+            # Enviar job a la cola
+            job_id = await job_queue_service.submit_job(
+                processed_audio_path,
+                transcription_request,
+                progress_callback,
+                cache_key=upload.cache_key,
+                tenant_id=tenant_id,
+                priority=priority
+            )
 
         # Crear URL del WebSocket dinámicamente
-        # En desarrollo, usar localhost independientemente de HOST
-        if os.getenv("ENVIRONMENT") == "production":
-            # Koyeb proporciona HTTPS/WSS automáticamente
-            host = os.getenv("HOST", "localhost")
-            websocket_url = f"wss://{host}/ws/transcription/{job_id}"
-        else:
-            # Desarrollo local - siempre usar localhost
-            port = os.getenv("PORT", "8001")
-            websocket_url = f"ws://localhost:{port}/ws/transcription/{job_id}"
+        websocket_url = build_websocket_url(job_id)
 
-        # Estimar tiempo de procesamiento (aproximado)
-        estimated_time = file_size / (1024 * 1024) * 30  # ~30 segundos por MB
+        # Tiempo estimado según el throughput aprendido y el trabajo por delante en la cola
+        submitted_job = await job_queue_service.get_job_status(job_id)
+        estimated_time = submitted_job.estimated_time_remaining if submitted_job else None
 
         # Obtener posición en cola
         queue_info = await job_queue_service.get_queue_info()
@@ -433,7 +454,7 @@ async def submit_transcription_job(
 
         return JobSubmissionResponse(
             job_id=job_id,
-            status="queued",
+            status=submitted_job.status.value if submitted_job else "queued",
             websocket_url=websocket_url,
             estimated_processing_time=estimated_time,
             queue_position=queue_position
@@ -441,14 +462,12 @@ async def submit_transcription_job(
 
     except HTTPException:
         # Re-lanzar HTTPExceptions
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        await cleanup_temp_files(temp_file_paths)
         raise
 
     except Exception as e:
         # Limpiar archivos en caso de error
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        await cleanup_temp_files(temp_file_paths)
 
         logger.error(f"❌ Error enviando job para {file.filename}: {str(e)}")
         raise HTTPException(
@@ -457,6 +476,102 @@ async def submit_transcription_job(
         )
 
 
+@app.post(
+    "/transcribe-batch",
+    response_model=Union[BatchTranscriptionResponse, BatchSubmissionResponse]
+)
+async def transcribe_batch(
+    files: List[UploadFile] = File(..., description="Archivos de audio a transcribir"),
+    language: Optional[str] = Form(default="auto", description="Idioma del audio (auto, es, en, fr, etc.)"),
+    model: Optional[str] = Form(default="whisper-large-v3-turbo", description="Modelo Whisper (whisper-large-v3-turbo)"),
+    return_timestamps: bool = Form(default=True, description="Incluir timestamps en la transcripción"),
+    temperature: float = Form(default=0.0, description="Temperatura para la transcripción (0.0-1.0)"),
+    initial_prompt: Optional[str] = Form(default=None, description="Prompt inicial para mejorar la transcripción"),
+    background: bool = Form(default=False, description="Responder con un batch_id y seguir el progreso por WebSocket"),
+    tenant_id: Optional[str] = Form(default=None, description="Usuario o tenant (la cola reparte los workers de forma justa entre tenants)"),
+    priority: int = Form(default=0, description="Prioridad de los jobs del lote (mayor se atiende antes)")
+):
+    """
+    Transcribir varios archivos en un único request
+
+    Cada archivo se decodifica (pool de FFmpeg) y entra en la cola de jobs en
+    cuanto está listo, compartiendo los límites de concurrencia del resto de la API.
+    Con `background=true` responde en cuanto todos los archivos se han recibido,
+    con un batch_id cuyo progreso agregado se emite por WebSocket.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No se proporcionaron archivos")
+
+    if len(files) > batch_transcription_service.max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Demasiados archivos. Máximo por lote: {batch_transcription_service.max_files}"
+        )
+
+    if any(not file.filename for file in files):
+        raise HTTPException(status_code=400, detail="Todos los archivos deben tener nombre")
+
+    started_at = time.time()
+    cache_params = {
+        "language": language,
+        "model": model,
+        "temperature": temperature,
+        "initial_prompt": initial_prompt,
+        "return_timestamps": return_timestamps
+    }
+    request_params = {
+        "language": language if language != "auto" else None,
+        "model": model,
+        "return_timestamps": return_timestamps,
+        "temperature": temperature,
+        "initial_prompt": initial_prompt
+    }
+
+    async def ingest(file: UploadFile) -> IngestedUpload:
+        return await ingest_upload(file, cache_params, join_inflight=True)
+
+    try:
+        # En background los resultados quedan en cada job (/job/{id}), no en el lote
+        batch = await batch_transcription_service.submit_batch(
+            files, ingest, request_params, keep_results=not background,
+            tenant_id=tenant_id, priority=priority
+        )
+
+        if background:
+            logger.info(f"✅ Lote enviado: {batch.batch_id}")
+            return BatchSubmissionResponse(
+                batch_id=batch.batch_id,
+                status=batch.status,
+                websocket_url=build_websocket_url(batch.batch_id),
+                total_files=len(batch.files),
+                job_ids=[entry.job_id for entry in batch.files]
+            )
+
+        batch = await batch_transcription_service.wait_for_batch(batch.batch_id)
+        batch_transcription_service.discard_batch(batch.batch_id)
+        return batch_transcription_service.build_response(batch, started_at)
+
+    except HTTPException:
+        # Re-lanzar HTTPExceptions (p. ej. 503 con Retry-After si el pool está saturado)
+        raise
+
+    except Exception as e:
+        logger.error(f"❌ Error procesando lote: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@app.get("/batch/{batch_id}", response_model=BatchJob)
+async def get_batch_status(batch_id: str):
+    """Obtener estado de un lote de transcripción"""
+    batch = batch_transcription_service.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Lote no encontrado")
+    return batch
+
+
 @app.get("/job/{job_id}", response_model=TranscriptionJob)
 async def get_job_status(job_id: str):
     """Obtener estado de un job de transcripción"""
@@ -471,10 +586,31 @@ async def cancel_job(job_id: str):
     """Cancelar un job de transcripción"""
     success = await job_queue_service.cancel_job(job_id)
     if not success:
+        job = await job_queue_service.get_job_status(job_id)
+        if job is not None:
+            raise HTTPException(status_code=409, detail=f"El job ya terminó ({job.status.value})")
         raise HTTPException(status_code=404, detail="Job no encontrado")
     return {"message": "Job cancelado exitosamente"}
 
 
+@app.post("/job/{job_id}/requeue", response_model=TranscriptionJob)
+async def requeue_job(job_id: str):
+    """Volver a encolar un job de la dead-letter (reutiliza su audio ya procesado)"""
+    try:
+        job = await job_queue_service.requeue_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+
+@app.get("/queue/dead-letter", response_model=List[TranscriptionJob])
+async def list_dead_letters(limit: int = 100):
+    """Jobs que fallaron definitivamente (error permanente o reintentos agotados)"""
+    return await job_queue_service.list_dead_letters(limit)
+
+
 @app.get("/queue/info")
 async def get_queue_info():
     """Obtener información de la cola de jobs"""
@@ -483,14 +619,37 @@ async def get_queue_info():
 
     return {
         "queue": queue_info,
-        "websockets": websocket_stats
+        "websockets": websocket_stats,
+        "cache": transcription_cache.get_stats(),
+        "transcoding": transcoding_pool.get_stats()
     }
 
 
+@app.websocket("/ws/transcription")
+async def websocket_multiplexed_endpoint(websocket: WebSocket):
+    """WebSocket único por cliente: sigue varios jobs con mensajes subscribe/unsubscribe"""
+    await serve_websocket(websocket)
+
+
 @app.websocket("/ws/transcription/{job_id}")
-async def websocket_transcription_endpoint(websocket: WebSocket, job_id: str):
-    """WebSocket endpoint para seguir progreso de transcripción"""
-    await websocket_manager.connect(websocket, job_id)
+async def websocket_transcription_endpoint(
+    websocket: WebSocket,
+    job_id: str,
+    last_seq: Optional[int] = None,
+    stream: Optional[str] = None
+):
+    """WebSocket endpoint para seguir progreso de transcripción (?last_seq=&stream= para reanudar)"""
+    await serve_websocket(websocket, job_id, last_seq, stream)
+
+
+async def serve_websocket(
+    websocket: WebSocket,
+    job_id: Optional[str] = None,
+    last_seq: Optional[int] = None,
+    stream: Optional[str] = None
+):
+    """Atender una conexión WebSocket hasta que el cliente se desconecte"""
+    await websocket_manager.connect(websocket, job_id, last_seq, stream)
 
     try:
         while True:
@@ -501,10 +660,133 @@ async def websocket_transcription_endpoint(websocket: WebSocket, job_id: str):
     except WebSocketDisconnect:
         await websocket_manager.disconnect(websocket)
     except Exception as e:
-        logger.error(f"❌ Error en WebSocket {job_id}: {e}")
+        logger.error(f"❌ Error en WebSocket {job_id or 'multiplexado'}: {e}")
         await websocket_manager.disconnect(websocket)
 
 
+async def ingest_upload(
+    file: UploadFile,
+    cache_params: Dict[str, Any],
+    join_inflight: bool = False
+) -> IngestedUpload:
+    """
+    Recibir un upload y dejarlo en WAV 16kHz mono listo para transcripción
+
+    Los formatos que FFmpeg puede leer desde un pipe se decodifican en streaming
+    (chunks del upload → stdin de FFmpeg → PCM), sin archivo temporal intermedio.
+    El resto (MP4/M4A/MOV...) se vuelca a disco y sigue el camino clásico.
+
+    El SHA-256 se calcula mientras se lee; si al terminar el upload ya hay un
+    resultado en caché, se aborta FFmpeg y se devuelve ese resultado. Con
+    `join_inflight`, lo mismo si hay un job en curso con la misma entrada: se
+    devuelve su job_id para adjuntar el nuevo job sin decodificar el audio.
+
+    Args:
+        file: Archivo subido
+        cache_params: Parámetros de transcripción que forman parte de la clave de caché
+        join_inflight: Buscar también jobs en curso con la misma entrada (endpoints en background)
+
+    Returns:
+        IngestedUpload: Audio procesado, tamaño, hash y temporales a limpiar (o el resultado
+        cacheado, o el job en curso con la misma entrada)
+    """
+    async def check_cache(stream: UploadStream):
+        cache_key = transcription_cache.build_key(stream.hexdigest(), cache_params)
+        cached_result = await transcription_cache.get(cache_key)
+        if cached_result:
+            raise CachedResultAvailable(cache_key, cached_result)
+        if join_inflight:
+            inflight_job_id = job_queue_service.inflight_job_id(cache_key)
+            if inflight_job_id:
+                raise InflightJobAvailable(cache_key, inflight_job_id)
+
+    upload = UploadStream(
+        file,
+        MAX_UPLOAD_SIZE,
+        chunk_size=UPLOAD_CHUNK_SIZE,
+        on_complete=check_cache
+    )
+
+    try:
+        streaming = STREAMING_INGEST and audio_processor.supports_streaming(file.filename)
+
+        # Rechazar antes de leer el cuerpo si el pool de FFmpeg está saturado
+        transcoding_pool.ensure_capacity(streaming)
+
+        if streaming:
+            processed_audio_path, pcm_size = await audio_processor.stream_to_wav(upload)
+            audio_metadata = audio_processor.pcm_metadata(pcm_size, processed_audio_path)
+            temp_file_paths = [processed_audio_path]
+        else:
+            temp_file_path = await upload.save_to_temp_file(
+                suffix=Path(file.filename).suffix,
+                directory=audio_processor.ensure_audio_dir()
+            )
+            try:
+                processed_audio_path, audio_metadata = await audio_processor.process_audio_file_with_metadata(
+                    temp_file_path
+                )
+            except Exception:
+                await cleanup_temp_files([temp_file_path])
+                raise
+            temp_file_paths = [temp_file_path, processed_audio_path]
+
+    except CachedResultAvailable as cached:
+        logger.info(f"♻️ Resultado en caché para {file.filename}, se omite FFmpeg y Groq")
+        return IngestedUpload(
+            size=upload.size,
+            content_sha256=upload.hexdigest(),
+            cache_key=cached.cache_key,
+            cached_result=cached.response
+        )
+    except InflightJobAvailable as inflight:
+        logger.info(f"🔗 {file.filename} ya está en curso ({inflight.job_id}), se omite FFmpeg")
+        return IngestedUpload(
+            size=upload.size,
+            content_sha256=upload.hexdigest(),
+            cache_key=inflight.cache_key,
+            inflight_job_id=inflight.job_id
+        )
+    except TranscodingPoolBusyError as busy:
+        retry_after = math.ceil(busy.retry_after)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Servidor ocupado procesando audio, reintentar en {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    return IngestedUpload(
+        size=upload.size,
+        content_sha256=upload.hexdigest(),
+        cache_key=transcription_cache.build_key(upload.hexdigest(), cache_params),
+        processed_audio_path=processed_audio_path,
+        audio_metadata=audio_metadata,
+        temp_file_paths=temp_file_paths
+    )
+
+
+async def broadcast_job_update(job: TranscriptionJob):
+    """Callback de progreso de un job: notifica por WebSocket"""
+    await websocket_manager.broadcast_progress(job)
+
+    # Si está completado o falló, enviar mensaje final
+    if job.status.value in ["completed", "failed", "cancelled"]:
+        await websocket_manager.broadcast_completion(job)
+
+
+def build_websocket_url(channel_id: str) -> str:
+    """URL del WebSocket de progreso de un job o lote"""
+    # En desarrollo, usar localhost independientemente de HOST
+    if os.getenv("ENVIRONMENT") == "production":
+        # Koyeb proporciona HTTPS/WSS automáticamente
+        host = os.getenv("HOST", "localhost")
+        return f"wss://{host}/ws/transcription/{channel_id}"
+
+    # Desarrollo local - siempre usar localhost
+    port = os.getenv("PORT", "8001")
+    return f"ws://localhost:{port}/ws/transcription/{channel_id}"
+
+
 async def cleanup_temp_files(file_paths: List[str]):
     """Limpiar archivos temporales"""
     for file_path in file_paths:
@@ -8,6 +8,18 @@ from datetime import datetime
 from enum import Enum
 
 
+class AudioMetadata(BaseModel):
+    """Metadatos de un archivo de audio, obtenidos una sola vez por entrada"""
+    duration: float = Field(..., description="Duración en segundos")
+    sample_rate: int = Field(..., description="Tasa de muestreo")
+    channels: int = Field(..., description="Número de canales")
+    codec: str = Field(..., description="Códec del stream de audio")
+    container: str = Field(..., description="Contenedor (wav, mov,mp4,m4a..., matroska,webm...)")
+    size_bytes: int = Field(..., description="Tamaño del archivo en bytes")
+    has_video: bool = Field(default=False, description="El archivo contiene un stream de video")
+    source: str = Field(..., description="Origen de los datos (wav_header, ffprobe, pcm)")
+
+
 class TranscriptionRequest(BaseModel):
     """Modelo para request de transcripción"""
     audio_file_path: str = Field(..., description="Ruta del archivo de audio")
@@ -16,6 +28,7 @@ class TranscriptionRequest(BaseModel):
     return_timestamps: bool = Field(default=True, description="Incluir timestamps")
     temperature: float = Field(default=0.0, ge=0.0, le=1.0, description="Temperatura para transcripción")
     initial_prompt: Optional[str] = Field(None, description="Prompt inicial")
+    audio_metadata: Optional[AudioMetadata] = Field(None, description="Metadatos del audio procesado (evita volver a hacer probe)")
 
 
 class TranscriptionSegment(BaseModel):
@@ -34,6 +47,8 @@ class AudioInfo(BaseModel):
     channels: int = Field(..., description="Número de canales")
     format: str = Field(..., description="Formato del archivo")
     size_mb: float = Field(..., description="Tamaño en MB")
+    upload_codec: Optional[str] = Field(None, description="Códec usado al enviar el audio a Groq (wav, flac, opus)")
+    upload_size_mb: Optional[float] = Field(None, description="Tamaño enviado a Groq en MB")
 
 
 class TranscriptionResponse(BaseModel):
@@ -112,6 +127,8 @@ class BatchTranscriptionResponse(BaseModel):
     results: List[TranscriptionResponse] = Field(..., description="Resultados individuales")
     total_processing_time: float = Field(..., description="Tiempo total de procesamiento")
     timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp del lote")
+    batch_id: Optional[str] = Field(None, description="ID del lote")
+    files: List["BatchFileResult"] = Field(default_factory=list, description="Estado y resultado por archivo, en el orden del upload")
 
 
 class JobStatus(str, Enum):
@@ -132,12 +149,18 @@ class TranscriptionJob(BaseModel):
     message: str = Field(default="Job creado", description="Mensaje de estado")
     audio_file_path: str = Field(..., description="Ruta del archivo de audio")
     request_params: TranscriptionRequest = Field(..., description="Parámetros de transcripción")
+    cache_key: Optional[str] = Field(None, description="Clave de contenido (SHA-256 del upload + parámetros)")
+    tenant_id: str = Field(default="default", description="Usuario o tenant dueño del job (colas justas)")
+    priority: int = Field(default=0, description="Prioridad del job (mayor se atiende antes)")
+    coalesced_with: Optional[str] = Field(None, description="Job en curso con la misma entrada del que este recibe progreso y resultado")
     result: Optional[TranscriptionResponse] = Field(None, description="Resultado de la transcripción")
     error: Optional[str] = Field(None, description="Error si el job falló")
     created_at: datetime = Field(default_factory=datetime.now, description="Timestamp de creación")
     started_at: Optional[datetime] = Field(None, description="Timestamp de inicio")
     completed_at: Optional[datetime] = Field(None, description="Timestamp de finalización")
     estimated_time_remaining: Optional[float] = Field(None, description="Tiempo estimado restante en segundos")
+    retries: int = Field(default=0, description="Reintentos realizados tras errores transitorios")
+    dead_lettered_at: Optional[datetime] = Field(None, description="Momento en que el job falló definitivamente (dead-letter)")
 
 
 class JobSubmissionResponse(BaseModel):
@@ -155,6 +178,8 @@ class WebSocketMessage(BaseModel):
     job_id: str = Field(..., description="ID del job")
     data: Dict[str, Any] = Field(..., description="Datos del mensaje")
     timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp del mensaje")
+    seq: Optional[int] = Field(None, description="Número de secuencia en el registro de eventos del job")
+    stream: Optional[str] = Field(None, description="Registro al que pertenece `seq` (para reanudar con last_seq)")
 
 
 class TranscriptionProgress(BaseModel):
@@ -165,3 +190,35 @@ class TranscriptionProgress(BaseModel):
     message: str = Field(..., description="Mensaje de estado")
     estimated_time_remaining: Optional[float] = Field(None, description="Tiempo estimado restante")
     timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp del progreso")
+
+
+class BatchFileResult(BaseModel):
+    """Estado de un archivo dentro de un lote"""
+    filename: str = Field(..., description="Nombre del archivo subido")
+    job_id: Optional[str] = Field(None, description="ID del job que lo transcribe")
+    status: JobStatus = Field(default=JobStatus.PENDING, description="Estado del archivo")
+    progress: float = Field(default=0.0, ge=0.0, le=100.0, description="Progreso en porcentaje")
+    result: Optional[TranscriptionResponse] = Field(None, description="Resultado de la transcripción")
+    error: Optional[str] = Field(None, description="Error si el archivo falló")
+
+
+class BatchJob(BaseModel):
+    """Lote de transcripción: un job por archivo con progreso agregado"""
+    batch_id: str = Field(..., description="ID único del lote")
+    status: JobStatus = Field(default=JobStatus.PROCESSING, description="Estado del lote")
+    progress: float = Field(default=0.0, ge=0.0, le=100.0, description="Progreso agregado en porcentaje")
+    files: List[BatchFileResult] = Field(..., description="Archivos del lote")
+    created_at: datetime = Field(default_factory=datetime.now, description="Timestamp de creación")
+    completed_at: Optional[datetime] = Field(None, description="Timestamp de finalización")
+
+
+class BatchSubmissionResponse(BaseModel):
+    """Respuesta al enviar un lote en background"""
+    batch_id: str = Field(..., description="ID único del lote")
+    status: JobStatus = Field(..., description="Estado del lote")
+    websocket_url: str = Field(..., description="URL del WebSocket para seguir el progreso agregado")
+    total_files: int = Field(..., description="Total de archivos del lote")
+    job_ids: List[Optional[str]] = Field(..., description="ID del job de cada archivo (None si falló al recibirlo)")
+
+
+BatchTranscriptionResponse.model_rebuild()
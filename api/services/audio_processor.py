@@ -3,15 +3,60 @@ Servicio de procesamiento de audio
 Convierte diferentes formatos de audio a formato compatible con Whisper
 """
 
+import io
 import os
+import wave
+import struct
+import bisect
 import tempfile
 import asyncio
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Optional, AsyncIterator, List, Tuple
 
 import ffmpeg
+import numpy as np
 from loguru import logger
 
+from models.transcription_models import AudioMetadata
+from services.transcoding_pool import transcoding_pool, TranscodingPoolBusyError
+
+# Cabecera RIFF/WAVE canónica de 44 bytes (chunk fmt PCM + cabecera del chunk data)
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+@dataclass
+class SpeechMap:
+    """
+    Mapa entre la línea de tiempo recortada (sin silencios) y la original
+
+    Cada tramo es (inicio recortado, inicio original, duración), en segundos.
+    """
+    spans: List[Tuple[float, float, float]] = field(default_factory=list)
+    original_duration: float = 0.0
+
+    @property
+    def speech_duration(self) -> float:
+        return sum(length for _, _, length in self.spans)
+
+    @property
+    def is_silent(self) -> bool:
+        return not self.spans
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """Convertir un instante de la línea recortada a la línea original"""
+        if not self.spans:
+            return t
+
+        starts = [trimmed_start for trimmed_start, _, _ in self.spans]
+        # Un fin que cae justo en el borde pertenece al tramo anterior
+        index = (bisect.bisect_left if is_end else bisect.bisect_right)(starts, t) - 1
+        index = max(index, 0)
+
+        trimmed_start, original_start, length = self.spans[index]
+        offset = min(max(t - trimmed_start, 0.0), length)
+        return original_start + offset
+
 
 class AudioProcessor:
     """Procesador de archivos de audio para transcripción"""
@@ -21,9 +66,65 @@ class AudioProcessor:
             '.mp3', '.wav', '.m4a', '.flac', '.ogg', 
             '.webm', '.mp4', '.avi', '.mov', '.mkv'
         }
+        # Formatos que FFmpeg puede demuxear desde un pipe (sin seek)
+        # MP4/M4A/MOV suelen tener el átomo moov al final y requieren archivo
+        self.streamable_formats = {
+            '.mp3', '.wav', '.flac', '.ogg', '.webm', '.mkv'
+        }
+        # Contenedores de video (grabaciones de pantalla): se intenta extraer el audio sin recodificar
+        self.video_formats = {
+            '.mp4', '.mov', '.mkv', '.webm', '.avi'
+        }
+        # Códecs que Groq acepta tal cual → (extensión, muxer) para copiar el stream
+        self.stream_copy_codecs = {
+            'aac': ('.m4a', 'mp4'),
+            'mp3': ('.mp3', 'mp3'),
+            'opus': ('.ogg', 'ogg'),
+            'vorbis': ('.ogg', 'ogg'),
+            'flac': ('.flac', 'flac'),
+        }
+        self.stream_copy_enabled = os.getenv("STREAM_COPY_ENABLED", "true").lower() == "true"
         self.target_sample_rate = 16000  # Whisper funciona mejor con 16kHz
         self.target_channels = 1  # Mono
+        self.pipe_read_size = 64 * 1024
+        # Audio de los jobs (uploads y audio decodificado): junto a la base de
+        # datos de jobs, para que los jobs en cola sobrevivan a un reinicio
+        self.audio_dir = Path(os.getenv("JOB_AUDIO_DIR", "./data/audio"))
+
+        # Detección de actividad de voz (recorte de silencios largos)
+        self.vad_enabled = os.getenv("VAD_ENABLED", "true").lower() == "true"
+        self.vad_frame_seconds = 0.03
+        # Frames por bloque al calcular energía y cruces por cero (~30 s de audio)
+        self.vad_block_frames = 1024
+        self.vad_min_silence_seconds = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "2.0"))
+        self.vad_padding_seconds = float(os.getenv("VAD_PADDING_SECONDS", "0.3"))
+        # Umbral adaptativo: piso de ruido + margen, acotado a [min, max] dBFS
+        self.vad_noise_margin_db = float(os.getenv("VAD_NOISE_MARGIN_DB", "10"))
+        self.vad_min_threshold_db = float(os.getenv("VAD_MIN_THRESHOLD_DB", "-55"))
+        self.vad_max_threshold_db = float(os.getenv("VAD_MAX_THRESHOLD_DB", "-35"))
+
+        # Códec del audio que se sube a Groq: wav (PCM), flac (sin pérdida) u opus
+        self.upload_codec = os.getenv("GROQ_UPLOAD_CODEC", "flac").lower()
+        self.opus_bitrate = os.getenv("GROQ_OPUS_BITRATE", "24k")
+        self.upload_codecs = {
+            'wav': ('.wav', []),
+            'flac': ('.flac', ['-c:a', 'flac', '-compression_level', '5', '-f', 'flac']),
+            'opus': ('.ogg', ['-c:a', 'libopus', '-b:a', self.opus_bitrate, '-application', 'voip', '-f', 'ogg']),
+        }
+        if self.upload_codec not in self.upload_codecs:
+            logger.warning(f"⚠️ GROQ_UPLOAD_CODEC no soportado: {self.upload_codec}, se usa flac")
+            self.upload_codec = 'flac'
     
+    def ensure_audio_dir(self) -> str:
+        """Directorio del audio de los jobs (se crea si no existe)"""
+        self.audio_dir.mkdir(parents=True, exist_ok=True)
+        return str(self.audio_dir)
+
+    def new_audio_path(self, suffix: str) -> str:
+        """Crear un archivo vacío con nombre único en el directorio de audio"""
+        with tempfile.NamedTemporaryFile(suffix=suffix, dir=self.ensure_audio_dir(), delete=False) as temp_file:
+            return temp_file.name
+
     async def process_audio_file(self, input_path: str) -> str:
         """
         Procesar archivo de audio para optimizarlo para Whisper
@@ -34,6 +135,27 @@ class AudioProcessor:
         Returns:
             str: Ruta del archivo procesado
         """
+        output_path, _ = await self.process_audio_file_with_metadata(input_path)
+        return output_path
+
+    async def process_audio_file_with_metadata(
+        self,
+        input_path: str,
+        metadata: Optional[AudioMetadata] = None
+    ) -> Tuple[str, AudioMetadata]:
+        """
+        Procesar archivo de audio y devolver los metadatos del resultado
+
+        El archivo de entrada se inspecciona una sola vez (o ninguna si el
+        llamador ya trae sus metadatos); los del WAV resultante salen de su cabecera.
+
+        Args:
+            input_path: Ruta del archivo de entrada
+            metadata: Metadatos ya conocidos del archivo de entrada
+
+        Returns:
+            Tuple[str, AudioMetadata]: Ruta del archivo procesado y sus metadatos
+        """
         try:
             input_file = Path(input_path)
             
@@ -46,82 +168,510 @@ class AudioProcessor:
                 raise ValueError(f"Formato no soportado: {input_file.suffix}")
             
             logger.info(f"🎵 Procesando audio: {input_file.name}")
+
+            if metadata is None:
+                metadata = await self.probe(input_path)
             
-            # Si ya es WAV con las especificaciones correctas, no procesar
-            if await self._is_optimal_format(input_path):
+            # Si ya es WAV con las especificaciones correctas (o audio ya extraído), no procesar
+            if self._is_optimal_format(input_path, metadata) or self._is_stream_copy(metadata):
                 logger.info("✅ Audio ya está en formato óptimo")
-                return input_path
-            
-            # Crear archivo temporal para el resultado
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                output_path = temp_file.name
-            
-            # Procesar con FFmpeg (más rápido y robusto)
-            await self._process_with_ffmpeg(input_path, output_path)
+                return input_path, metadata
+
+            # Video con un códec de audio que Groq acepta: extraer sin recodificar
+            if self._can_stream_copy(input_path, metadata):
+                demuxed = await self.demux_audio(input_path, metadata)
+                if demuxed is not None:
+                    return demuxed
+            
+            # Crear archivo para el resultado
+            output_path = self.new_audio_path('.wav')
+            
+            # Procesar con FFmpeg (más rápido y robusto); si falla o se cancela, no dejar el parcial
+            try:
+                await self._process_with_ffmpeg(input_path, output_path)
+            except BaseException:
+                await self.cleanup_temp_file(output_path)
+                raise
             
             logger.info(f"✅ Audio procesado: {Path(output_path).name}")
-            return output_path
+            return output_path, await self.probe(output_path)
             
+        except TranscodingPoolBusyError:
+            raise
         except Exception as e:
             logger.error(f"❌ Error procesando audio: {e}")
             raise Exception(f"Error procesando audio: {str(e)}")
     
-    async def _is_optimal_format(self, file_path: str) -> bool:
+    def _is_optimal_format(self, file_path: str, metadata: Optional[AudioMetadata]) -> bool:
         """Verificar si el archivo ya está en formato óptimo"""
+        if metadata is None:
+            return False
+
+        return (
+            metadata.sample_rate == self.target_sample_rate and
+            metadata.channels == self.target_channels and
+            metadata.codec in ['pcm_s16le', 'wav'] and
+            file_path.lower().endswith('.wav')
+        )
+
+    def _is_stream_copy(self, metadata: Optional[AudioMetadata]) -> bool:
+        """Verificar si el archivo es audio ya extraído por copia de stream"""
+        return metadata is not None and metadata.source == 'stream_copy'
+
+    def _can_stream_copy(self, file_path: str, metadata: Optional[AudioMetadata]) -> bool:
+        """Verificar si el audio de un contenedor de video puede extraerse sin recodificar"""
+        if not self.stream_copy_enabled or metadata is None:
+            return False
+
+        is_video = metadata.has_video or Path(file_path).suffix.lower() in self.video_formats
+        return is_video and metadata.codec in self.stream_copy_codecs
+
+    async def demux_audio(
+        self,
+        input_path: str,
+        metadata: AudioMetadata
+    ) -> Optional[Tuple[str, AudioMetadata]]:
+        """
+        Extraer la pista de audio copiando el stream (sin decodificar ni recodificar)
+
+        Es una operación de E/S: el video se descarta y los paquetes de audio
+        se reescriben en un contenedor que Groq acepta.
+
+        Returns:
+            Optional[Tuple[str, AudioMetadata]]: Ruta del audio extraído y sus
+            metadatos, o None si la copia falla (el llamador debe transcodificar)
+        """
+        extension, muxer = self.stream_copy_codecs[metadata.codec]
+
+        output_path = self.new_audio_path(extension)
+
+        try:
+            await transcoding_pool.run([
+                '-i', input_path,
+                '-map', '0:a:0',
+                '-vn', '-sn', '-dn',
+                '-c:a', 'copy',
+                '-f', muxer,
+                '-y', output_path
+            ], label="stream_copy")
+        except (TranscodingPoolBusyError, asyncio.CancelledError):
+            await self.cleanup_temp_file(output_path)
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo copiar el stream {metadata.codec}, se transcodifica: {e}")
+            await self.cleanup_temp_file(output_path)
+            return None
+
+        demuxed_metadata = metadata.model_copy(update={
+            'container': muxer,
+            'size_bytes': os.path.getsize(output_path),
+            'has_video': False,
+            'source': 'stream_copy'
+        })
+        logger.info(
+            f"⚡ Audio {metadata.codec} extraído sin recodificar: {Path(output_path).name} "
+            f"({demuxed_metadata.size_bytes / (1024 * 1024):.1f}MB)"
+        )
+        return output_path, demuxed_metadata
+
+    async def probe(self, file_path: str) -> Optional[AudioMetadata]:
+        """
+        Obtener metadatos de un archivo de audio
+
+        Los WAV se leen desde su cabecera sin lanzar procesos; el resto usa
+        ffprobe en un hilo para no bloquear el event loop.
+
+        Returns:
+            Optional[AudioMetadata]: Metadatos, o None si no hay stream de audio legible
+        """
+        metadata = self._probe_wav_header(file_path)
+        if metadata is not None:
+            return metadata
+
+        return await asyncio.get_event_loop().run_in_executor(None, self._probe_with_ffprobe, file_path)
+
+    def _probe_wav_header(self, file_path: str) -> Optional[AudioMetadata]:
+        """Leer metadatos de la cabecera de un WAV PCM"""
+        if not file_path.lower().endswith('.wav'):
+            return None
+
+        try:
+            with wave.open(file_path, 'rb') as wav_file:
+                sample_rate = wav_file.getframerate()
+                frames = wav_file.getnframes()
+                return AudioMetadata(
+                    duration=frames / sample_rate if sample_rate else 0.0,
+                    sample_rate=sample_rate,
+                    channels=wav_file.getnchannels(),
+                    codec=f"pcm_s{wav_file.getsampwidth() * 8}le",
+                    container='wav',
+                    size_bytes=os.path.getsize(file_path),
+                    source='wav_header'
+                )
+        except (wave.Error, EOFError, OSError):
+            # WAV no PCM (float, ADPCM...) u otro formato: ffprobe
+            return None
+
+    def _probe_with_ffprobe(self, file_path: str) -> Optional[AudioMetadata]:
+        """Leer metadatos con ffprobe (bloqueante)"""
         try:
             probe = ffmpeg.probe(file_path)
-            audio_stream = next(
-                (stream for stream in probe['streams'] if stream['codec_type'] == 'audio'),
-                None
-            )
-            
-            if not audio_stream:
-                return False
-            
-            # Verificar especificaciones
-            sample_rate = int(audio_stream.get('sample_rate', 0))
-            channels = int(audio_stream.get('channels', 0))
-            codec = audio_stream.get('codec_name', '')
-            
-            return (
-                sample_rate == self.target_sample_rate and
-                channels == self.target_channels and
-                codec in ['pcm_s16le', 'wav'] and
-                file_path.lower().endswith('.wav')
-            )
-            
-        except Exception:
-            return False
+        except Exception as e:
+            logger.warning(f"⚠️ ffprobe falló para {Path(file_path).name}: {e}")
+            return None
+
+        streams = probe.get('streams', [])
+        audio_stream = next(
+            (stream for stream in streams if stream.get('codec_type') == 'audio'),
+            None
+        )
+        if not audio_stream:
+            return None
+
+        file_format = probe.get('format', {})
+        duration = audio_stream.get('duration') or file_format.get('duration') or 0
+
+        return AudioMetadata(
+            duration=float(duration),
+            sample_rate=int(audio_stream.get('sample_rate', 0)),
+            channels=int(audio_stream.get('channels', 0)),
+            codec=audio_stream.get('codec_name', 'unknown'),
+            container=file_format.get('format_name', 'unknown'),
+            size_bytes=int(file_format.get('size') or os.path.getsize(file_path)),
+            has_video=any(stream.get('codec_type') == 'video' for stream in streams),
+            source='ffprobe'
+        )
+
+    def pcm_metadata(self, pcm_size: int, wav_path: Optional[str] = None) -> AudioMetadata:
+        """Metadatos de un PCM 16kHz mono ya decodificado (sin probe)"""
+        bytes_per_second = 2 * self.target_channels * self.target_sample_rate
+        size_bytes = pcm_size + 44
+        if wav_path and os.path.exists(wav_path):
+            size_bytes = os.path.getsize(wav_path)
+
+        return AudioMetadata(
+            duration=pcm_size / bytes_per_second,
+            sample_rate=self.target_sample_rate,
+            channels=self.target_channels,
+            codec='pcm_s16le',
+            container='wav',
+            size_bytes=size_bytes,
+            source='pcm'
+        )
     
     async def _process_with_ffmpeg(self, input_path: str, output_path: str):
-        """Procesar audio usando FFmpeg"""
+        """Procesar audio usando FFmpeg (dentro del pool de transcodificación)"""
         try:
-            # Configurar pipeline de FFmpeg
-            stream = ffmpeg.input(input_path)
-            
-            # Aplicar filtros de audio
-            stream = ffmpeg.output(
-                stream,
-                output_path,
-                acodec='pcm_s16le',  # PCM 16-bit
-                ac=self.target_channels,  # Mono
-                ar=self.target_sample_rate,  # 16kHz
-                loglevel='error'  # Reducir logs de FFmpeg
-            )
-            
-            # Ejecutar en un hilo separado para no bloquear
-            await asyncio.get_event_loop().run_in_executor(
-                None, 
-                lambda: ffmpeg.run(stream, overwrite_output=True, quiet=True)
-            )
-            
+            await transcoding_pool.run([
+                '-i', input_path,
+                '-acodec', 'pcm_s16le',  # PCM 16-bit
+                '-ac', str(self.target_channels),  # Mono
+                '-ar', str(self.target_sample_rate),  # 16kHz
+                '-y', output_path
+            ], label="convert")
+
+        except TranscodingPoolBusyError:
+            raise
         except Exception as e:
             logger.error(f"❌ Error procesando con FFmpeg: {e}")
             logger.error("💡 Verifica que FFmpeg esté instalado y el archivo de audio sea válido")
             raise RuntimeError(f"Error procesando audio con FFmpeg: {e}") from e
     
+    def supports_streaming(self, filename: str) -> bool:
+        """
+        Indicar si el archivo debe decodificarse en streaming desde un pipe
+
+        Los contenedores de video (WebM/MKV de grabaciones de pantalla) van a
+        disco cuando la copia de stream está activa: extraer su audio sin
+        recodificar es más barato que decodificarlo entero.
+        """
+        suffix = Path(filename).suffix.lower()
+        if self.stream_copy_enabled and suffix in self.video_formats:
+            return False
+        return suffix in self.streamable_formats
+
+    async def stream_to_wav(self, chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+        """
+        Decodificar un upload en streaming: chunks → stdin de FFmpeg → WAV en el directorio de audio
+
+        La transcodificación se solapa con la lectura del upload y el PCM se
+        vuelca al archivo a medida que FFmpeg lo produce: la memoria no crece
+        con la duración del audio. La cabecera WAV se completa al terminar.
+
+        Args:
+            chunks: Iterador asíncrono con los bytes del archivo original
+
+        Returns:
+            Tuple[str, int]: (ruta del WAV, bytes de PCM s16le a 16kHz mono)
+        """
+        output_path = self.new_audio_path('.wav')
+
+        try:
+            with open(output_path, 'r+b') as wav_file:
+                wav_file.write(self._wav_header(0))
+                await transcoding_pool.run(
+                    self._pcm_args('pipe:0'), chunks, label="stream_decode", output=wav_file
+                )
+
+                # Descartar un posible byte suelto al final (muestras de 2 bytes)
+                pcm_size = wav_file.tell() - WAV_HEADER.size
+                pcm_size -= pcm_size % 2
+                if not pcm_size:
+                    raise RuntimeError("FFmpeg no produjo audio: el archivo no contiene un stream de audio válido")
+
+                wav_file.truncate(WAV_HEADER.size + pcm_size)
+                wav_file.seek(0)
+                wav_file.write(self._wav_header(pcm_size))
+        except BaseException:
+            Path(output_path).unlink(missing_ok=True)
+            raise
+
+        duration = pcm_size / (2 * self.target_channels * self.target_sample_rate)
+        logger.info(f"✅ Audio decodificado en streaming: {duration:.1f}s de PCM")
+        return output_path, pcm_size
+
+    def _wav_header(self, pcm_size: int) -> bytes:
+        """Cabecera WAV (PCM 16 bits) para `pcm_size` bytes de datos"""
+        block_align = 2 * self.target_channels
+        return WAV_HEADER.pack(
+            b'RIFF', WAV_HEADER.size - 8 + pcm_size, b'WAVE',
+            b'fmt ', 16, 1, self.target_channels, self.target_sample_rate,
+            self.target_sample_rate * block_align, block_align, 16,
+            b'data', pcm_size
+        )
+
+    async def decode_to_pcm(self, file_path: str) -> bytes:
+        """
+        Decodificar un archivo a PCM crudo (s16le, 16kHz, mono) sin archivo intermedio
+
+        Se usa con audio extraído por copia de stream cuando hay que trabajar
+        sobre las muestras (audio demasiado largo o grande para un único request).
+        """
+        pcm = await transcoding_pool.run(self._pcm_args(file_path), label="decode", admission=False)
+        return self._validate_pcm(pcm)
+
+    def _pcm_args(self, source: str) -> List[str]:
+        """Argumentos de FFmpeg para decodificar `source` a PCM por stdout"""
+        return [
+            '-i', source,
+            '-vn',
+            '-acodec', 'pcm_s16le',
+            '-ac', str(self.target_channels),
+            '-ar', str(self.target_sample_rate),
+            '-f', 's16le',
+            'pipe:1'
+        ]
+
+    def _validate_pcm(self, pcm: bytes) -> bytes:
+        # Descartar un posible byte suelto al final (muestras de 2 bytes)
+        pcm = pcm[:len(pcm) - (len(pcm) % 2)]
+        if not pcm:
+            raise RuntimeError("FFmpeg no produjo audio: el archivo no contiene un stream de audio válido")
+        return pcm
+
+    async def load_wav_pcm(self, file_path: str) -> Optional[bytes]:
+        """
+        Leer el PCM de un WAV que ya está en el formato objetivo (16kHz, mono, 16 bits)
+
+        Solo lee la cabecera y los frames, sin lanzar FFmpeg.
+
+        Returns:
+            Optional[bytes]: PCM crudo, o None si el archivo no es un WAV en formato objetivo
+        """
+        def read() -> Optional[bytes]:
+            try:
+                with wave.open(file_path, 'rb') as wav_file:
+                    if (
+                        wav_file.getframerate() != self.target_sample_rate or
+                        wav_file.getnchannels() != self.target_channels or
+                        wav_file.getsampwidth() != 2
+                    ):
+                        return None
+                    return wav_file.readframes(wav_file.getnframes())
+            except (wave.Error, EOFError, OSError):
+                return None
+
+        return await asyncio.get_event_loop().run_in_executor(None, read)
+
+    def pcm_to_wav_bytes(self, pcm: bytes) -> bytes:
+        """Envolver PCM crudo (16kHz, mono, 16 bits) en un WAV en memoria"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav_file:
+            wav_file.setnchannels(self.target_channels)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.target_sample_rate)
+            wav_file.writeframes(pcm)
+        return buffer.getvalue()
+
+    async def encode_for_upload(self, pcm: bytes) -> Tuple[bytes, str, str]:
+        """
+        Codificar PCM (16kHz, mono, 16 bits) con el códec configurado para subir a Groq
+
+        Si la codificación falla se envía WAV, que Groq siempre acepta.
+
+        Returns:
+            Tuple[bytes, str, str]: (contenido, extensión, códec usado)
+        """
+        codec = self.upload_codec
+        if codec == 'wav':
+            return self.pcm_to_wav_bytes(pcm), '.wav', 'wav'
+
+        extension, codec_args = self.upload_codecs[codec]
+        args = [
+            '-f', 's16le',
+            '-ar', str(self.target_sample_rate),
+            '-ac', str(self.target_channels),
+            '-i', 'pipe:0',
+            *codec_args,
+            'pipe:1'
+        ]
+
+        async def pcm_chunks():
+            for offset in range(0, len(pcm), self.pipe_read_size):
+                yield pcm[offset:offset + self.pipe_read_size]
+
+        try:
+            encoded = await transcoding_pool.run(
+                args, pcm_chunks(), label=f"encode_{codec}", admission=False
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo codificar a {codec}, se envía WAV: {e}")
+            return self.pcm_to_wav_bytes(pcm), '.wav', 'wav'
+
+        logger.debug(f"🗜️ Audio codificado a {codec}: {len(pcm) / max(len(encoded), 1):.1f}x más pequeño")
+        return encoded, extension, codec
+
+    async def trim_silence(self, pcm: bytes) -> Tuple[bytes, SpeechMap]:
+        """
+        Eliminar silencios largos del PCM (16kHz, mono, 16 bits)
+
+        Args:
+            pcm: Audio en PCM crudo
+
+        Returns:
+            Tuple[bytes, SpeechMap]: PCM sin silencios largos y el mapa de tiempos
+        """
+        return await asyncio.get_event_loop().run_in_executor(None, self._trim_silence_sync, pcm)
+
+    def _trim_silence_sync(self, pcm: bytes) -> Tuple[bytes, SpeechMap]:
+        sample_rate = self.target_sample_rate
+        samples = np.frombuffer(pcm, dtype='<i2')
+        original_duration = len(samples) / sample_rate
+
+        speech_ranges = self.detect_speech(samples)
+        speech_map = SpeechMap(original_duration=original_duration)
+
+        if not speech_ranges:
+            logger.info(f"🔇 Audio completamente en silencio ({original_duration:.1f}s)")
+            return b"", speech_map
+
+        trimmed_position = 0
+        parts = []
+        for start, end in speech_ranges:
+            speech_map.spans.append((
+                trimmed_position / sample_rate,
+                start / sample_rate,
+                (end - start) / sample_rate
+            ))
+            parts.append(samples[start:end])
+            trimmed_position += end - start
+
+        removed = original_duration - speech_map.speech_duration
+        if removed > 0:
+            logger.info(
+                f"✂️ VAD: {removed:.1f}s de silencio eliminados "
+                f"({speech_map.speech_duration:.1f}s de {original_duration:.1f}s)"
+            )
+
+        return np.concatenate(parts).tobytes(), speech_map
+
+    def detect_speech(self, samples: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Detectar tramos con voz por energía (RMS) y tasa de cruces por cero
+
+        Solo se descartan silencios de al menos `vad_min_silence_seconds`; a cada
+        tramo de voz se le deja `vad_padding_seconds` de margen.
+
+        Returns:
+            List[Tuple[int, int]]: Rangos [inicio, fin) en muestras
+        """
+        frame_size = int(self.target_sample_rate * self.vad_frame_seconds)
+        total = len(samples)
+        n_frames = -(-total // frame_size)
+        if n_frames == 0:
+            return []
+
+        rms, zero_crossings = self._frame_features(samples, frame_size, n_frames)
+        energy_db = 20.0 * np.log10(rms + 1e-10)
+
+        noise_floor = np.percentile(energy_db, 10)
+        threshold = float(np.clip(
+            noise_floor + self.vad_noise_margin_db,
+            self.vad_min_threshold_db,
+            self.vad_max_threshold_db
+        ))
+
+        # Voz: energía sobre el umbral, o consonantes sordas (algo menos de energía, muchos cruces)
+        is_speech = (energy_db > threshold) | (
+            (energy_db > threshold - self.vad_noise_margin_db / 2) & (zero_crossings > 0.25)
+        )
+        if not is_speech.any():
+            return []
+
+        # Tramos de silencio como runs de False; solo se eliminan los largos
+        min_silence_frames = int(self.vad_min_silence_seconds / self.vad_frame_seconds)
+        padding_frames = int(self.vad_padding_seconds / self.vad_frame_seconds)
+
+        edges = np.diff(np.concatenate(([1], is_speech.astype(np.int8), [1])))
+        silence_starts = np.where(edges == -1)[0]
+        silence_ends = np.where(edges == 1)[0]
+
+        keep = np.ones(n_frames, dtype=bool)
+        for start, end in zip(silence_starts, silence_ends):
+            if end - start < min_silence_frames:
+                continue
+            cut_start = start if start == 0 else start + padding_frames
+            cut_end = end if end == n_frames else end - padding_frames
+            if cut_end > cut_start:
+                keep[cut_start:cut_end] = False
+
+        if not keep.any():
+            return []
+
+        edges = np.diff(np.concatenate(([0], keep.astype(np.int8), [0])))
+        starts = np.where(edges == 1)[0] * frame_size
+        ends = np.minimum(np.where(edges == -1)[0] * frame_size, total)
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    def _frame_features(self, samples: np.ndarray, frame_size: int, n_frames: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        RMS y tasa de cruces por cero de cada frame, calculados por bloques
+
+        Solo un bloque de `vad_block_frames` frames se convierte a float32 a la
+        vez: la memoria extra no crece con la duración del audio. El último
+        frame se rellena con ceros.
+        """
+        rms = np.empty(n_frames, dtype=np.float32)
+        zero_crossings = np.empty(n_frames, dtype=np.float32)
+        block_samples = self.vad_block_frames * frame_size
+
+        for first_frame in range(0, n_frames, self.vad_block_frames):
+            start = first_frame * frame_size
+            block = samples[start:start + block_samples]
+            frames_in_block = -(-len(block) // frame_size)
+            if len(block) < frames_in_block * frame_size:
+                block = np.concatenate((block, np.zeros(frames_in_block * frame_size - len(block), dtype=block.dtype)))
+
+            frames = block.reshape(frames_in_block, frame_size)
+            scaled = frames.astype(np.float32)
+            scaled /= 32768.0
+            end_frame = first_frame + frames_in_block
+            rms[first_frame:end_frame] = np.sqrt(np.einsum('ij,ij->i', scaled, scaled) / frame_size)
+            crossings = np.count_nonzero(np.diff(frames < 0, axis=1), axis=1)
+            zero_crossings[first_frame:end_frame] = crossings / (frame_size - 1)
+
+        return rms, zero_crossings
 
-    
     async def extract_audio_from_video(self, video_path: str) -> str:
         """
         Extraer audio de un archivo de video
@@ -139,31 +689,32 @@ class AudioProcessor:
                 raise FileNotFoundError(f"Video no encontrado: {video_path}")
             
             logger.info(f"🎬 Extrayendo audio de video: {video_file.name}")
-            
-            # Crear archivo temporal para el audio
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                output_path = temp_file.name
-            
-            # Extraer audio con FFmpeg
-            stream = ffmpeg.input(video_path)
-            stream = ffmpeg.output(
-                stream,
-                output_path,
-                acodec='pcm_s16le',
-                ac=self.target_channels,
-                ar=self.target_sample_rate,
-                vn=None,  # Sin video
-                loglevel='error'
-            )
-            
-            await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: ffmpeg.run(stream, overwrite_output=True, quiet=True)
-            )
+
+            # Si el códec de audio ya es aceptado por Groq, copiar el stream
+            metadata = await self.probe(video_path)
+            if self._can_stream_copy(video_path, metadata):
+                demuxed = await self.demux_audio(video_path, metadata)
+                if demuxed is not None:
+                    return demuxed[0]
+            
+            # Crear archivo para el audio
+            output_path = self.new_audio_path('.wav')
+            
+            # Extraer audio con FFmpeg (sin video)
+            await transcoding_pool.run([
+                '-i', video_path,
+                '-vn',
+                '-acodec', 'pcm_s16le',
+                '-ac', str(self.target_channels),
+                '-ar', str(self.target_sample_rate),
+                '-y', output_path
+            ], label="extract_video_audio")
             
             logger.info(f"✅ Audio extraído: {Path(output_path).name}")
             return output_path
             
+        except TranscodingPoolBusyError:
+            raise
         except Exception as e:
             logger.error(f"❌ Error extrayendo audio: {e}")
             raise Exception(f"Error extrayendo audio: {str(e)}")
@@ -187,20 +738,13 @@ class AudioProcessor:
             if os.path.getsize(file_path) == 0:
                 return False
             
-            # Intentar obtener información con FFmpeg
-            probe = ffmpeg.probe(file_path)
-            audio_streams = [
-                stream for stream in probe['streams'] 
-                if stream['codec_type'] == 'audio'
-            ]
-            
-            # Debe tener al menos un stream de audio
-            if not audio_streams:
+            # Obtener metadatos (cabecera WAV o ffprobe); debe haber stream de audio
+            metadata = await self.probe(file_path)
+            if metadata is None:
                 return False
             
             # Verificar duración mínima (al menos 0.1 segundos)
-            duration = float(probe['format'].get('duration', 0))
-            if duration < 0.1:
+            if metadata.duration < 0.1:
                 return False
             
             return True
@@ -220,8 +764,8 @@ class AudioProcessor:
             float: Duración en segundos
         """
         try:
-            probe = ffmpeg.probe(file_path)
-            return float(probe['format']['duration'])
+            metadata = await self.probe(file_path)
+            return metadata.duration if metadata else 0.0
         except Exception:
             return 0.0
     
@@ -251,8 +795,9 @@ class AudioProcessor:
         try:
             logger.info(f"📦 Procesando {len(file_paths)} archivos en lote")
             
-            # Procesar archivos en paralelo (máximo 4 a la vez)
-            semaphore = asyncio.Semaphore(4)
+            # Procesar en paralelo sin superar los workers del pool, para que
+            # el lote espere su turno en lugar de llenar la cola de admisión
+            semaphore = asyncio.Semaphore(transcoding_pool.max_workers)
             
             async def process_single_file(file_path):
                 async with semaphore:
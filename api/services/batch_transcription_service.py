@@ -0,0 +1,253 @@
+"""
+Transcripción en lote
+Cada archivo se decodifica y pasa a la cola de jobs en cuanto está listo, de
+modo que la transcripción de uno se solapa con la decodificación del siguiente
+"""
+
+import os
+import time
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Callable, Awaitable, Optional
+
+from fastapi import HTTPException, UploadFile
+from loguru import logger
+
+from models.transcription_models import (
+    BatchJob,
+    BatchFileResult,
+    BatchTranscriptionResponse,
+    JobStatus,
+    TranscriptionJob,
+    TranscriptionRequest
+)
+from services.audio_processor import AudioProcessor
+from services.job_queue_service import job_queue_service
+from services.transcoding_pool import transcoding_pool
+from services.websocket_manager import websocket_manager
+from utils.upload_stream import IngestedUpload
+
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class BatchTranscriptionService:
+    """Orquesta lotes de archivos sobre el pool de FFmpeg y la cola de jobs compartidos"""
+
+    def __init__(self):
+        self.batches: Dict[str, BatchJob] = {}
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self.audio_processor = AudioProcessor()
+
+        self.max_files = int(os.getenv("MAX_BATCH_FILES", "50"))
+        # Decodificaciones simultáneas por lote: sin superar los workers del pool
+        # para que un lote grande no llene la cola de admisión
+        self.max_parallel_ingest = int(os.getenv("BATCH_MAX_PARALLEL_INGEST") or transcoding_pool.max_workers)
+
+    async def submit_batch(
+        self,
+        files: List[UploadFile],
+        ingest: Callable[[UploadFile], Awaitable[IngestedUpload]],
+        request_params: Dict[str, Any],
+        keep_results: bool = True,
+        tenant_id: Optional[str] = None,
+        priority: int = 0
+    ) -> BatchJob:
+        """
+        Recibir todos los archivos del lote y encolar un job por archivo
+
+        Vuelve cuando todos los archivos se han decodificado (los UploadFile se
+        cierran al terminar el request); la transcripción sigue en la cola.
+
+        Args:
+            files: Archivos subidos
+            ingest: Función que decodifica un upload (ingest_upload de la API)
+            request_params: Parámetros comunes de TranscriptionRequest (sin ruta ni metadatos)
+            keep_results: Guardar los resultados en el lote; si es False solo se
+                guarda el job_id y los resultados se piden por /job/{id}
+            tenant_id: Tenant dueño de los jobs (colas justas)
+            priority: Prioridad de los jobs del lote
+
+        Returns:
+            BatchJob: Estado del lote
+        """
+        self._purge_expired()
+
+        batch_id = str(uuid.uuid4())
+        batch = BatchJob(
+            batch_id=batch_id,
+            files=[BatchFileResult(filename=file.filename) for file in files]
+        )
+        self.batches[batch_id] = batch
+        self._done_events[batch_id] = asyncio.Event()
+
+        logger.info(f"📦 Lote {batch_id}: {len(files)} archivos")
+
+        semaphore = asyncio.Semaphore(self.max_parallel_ingest)
+
+        async def ingest_and_submit(index: int, file: UploadFile):
+            try:
+                async with semaphore:
+                    upload = await ingest(file)
+                await self._submit_file(
+                    batch, index, upload, request_params, keep_results, tenant_id, priority
+                )
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                logger.error(f"❌ Lote {batch_id}: error recibiendo {file.filename}: {detail}")
+                entry = batch.files[index]
+                entry.status = JobStatus.FAILED
+                entry.error = detail
+                await self._update_batch(batch)
+
+        await asyncio.gather(*(ingest_and_submit(i, file) for i, file in enumerate(files)))
+        return batch
+
+    async def _submit_file(
+        self,
+        batch: BatchJob,
+        index: int,
+        upload: IngestedUpload,
+        request_params: Dict[str, Any],
+        keep_results: bool,
+        tenant_id: Optional[str],
+        priority: int
+    ):
+        """Encolar el job de un archivo ya decodificado"""
+        processed_audio_path = upload.processed_audio_path
+
+        # El job solo necesita el audio procesado; el original se puede borrar ya
+        for path in upload.temp_file_paths:
+            if path != processed_audio_path:
+                await self.audio_processor.cleanup_temp_file(path)
+
+        transcription_request = TranscriptionRequest(
+            audio_file_path=processed_audio_path or f"cache://{upload.content_sha256}",
+            audio_metadata=upload.audio_metadata,
+            **request_params
+        )
+        progress_callback = self._file_callback(batch, index, processed_audio_path, keep_results)
+
+        if upload.cached_result:
+            await job_queue_service.submit_cached_result(
+                transcription_request,
+                upload.cached_result,
+                progress_callback
+            )
+        elif upload.inflight_job_id:
+            # Misma entrada que un job en curso: se adjunta sin haber pasado por FFmpeg
+            job_id = await job_queue_service.attach_to_job(
+                upload.inflight_job_id,
+                transcription_request,
+                progress_callback,
+                tenant_id=tenant_id,
+                priority=priority
+            )
+            if job_id is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="El job con el mismo audio terminó sin resultado, reintentar"
+                )
+        else:
+            await job_queue_service.submit_job(
+                processed_audio_path,
+                transcription_request,
+                progress_callback,
+                cache_key=upload.cache_key,
+                tenant_id=tenant_id,
+                priority=priority
+            )
+
+    def _file_callback(
+        self,
+        batch: BatchJob,
+        index: int,
+        processed_audio_path: Optional[str],
+        keep_results: bool
+    ):
+        """Callback de progreso de un job: actualiza su archivo y el agregado del lote"""
+        async def progress_callback(job: TranscriptionJob):
+            entry = batch.files[index]
+            entry.job_id = job.job_id
+            entry.status = job.status
+            entry.progress = job.progress
+
+            # Cada archivo mantiene también su propio canal de WebSocket
+            await websocket_manager.broadcast_progress(job)
+
+            if job.status in TERMINAL_STATUSES:
+                entry.result = job.result if keep_results else None
+                entry.error = job.error
+                await websocket_manager.broadcast_completion(job)
+                await self.audio_processor.cleanup_temp_file(processed_audio_path)
+
+            await self._update_batch(batch)
+
+        return progress_callback
+
+    async def _update_batch(self, batch: BatchJob):
+        """Recalcular el progreso agregado y cerrar el lote cuando terminan todos los archivos"""
+        if batch.status in TERMINAL_STATUSES:
+            return
+
+        batch.progress = round(sum(
+            100.0 if entry.status in TERMINAL_STATUSES else entry.progress
+            for entry in batch.files
+        ) / len(batch.files), 1)
+
+        if all(entry.status in TERMINAL_STATUSES for entry in batch.files):
+            all_failed = all(entry.status != JobStatus.COMPLETED for entry in batch.files)
+            batch.status = JobStatus.FAILED if all_failed else JobStatus.COMPLETED
+            batch.progress = 100.0
+            batch.completed_at = datetime.now()
+            self._done_events[batch.batch_id].set()
+
+            completed = sum(1 for entry in batch.files if entry.status == JobStatus.COMPLETED)
+            logger.info(f"✅ Lote {batch.batch_id} terminado: {completed}/{len(batch.files)} archivos")
+
+        await websocket_manager.broadcast_batch_progress(batch)
+
+    async def wait_for_batch(self, batch_id: str) -> BatchJob:
+        """Esperar a que todos los archivos del lote terminen"""
+        await self._done_events[batch_id].wait()
+        return self.batches[batch_id]
+
+    def get_batch(self, batch_id: str) -> Optional[BatchJob]:
+        """Obtener el estado de un lote"""
+        return self.batches.get(batch_id)
+
+    def discard_batch(self, batch_id: str):
+        """Olvidar un lote cuyo resultado ya se entregó"""
+        self.batches.pop(batch_id, None)
+        self._done_events.pop(batch_id, None)
+
+    def _purge_expired(self):
+        """Olvidar los lotes terminados hace más que la retención de jobs"""
+        cutoff = datetime.now() - timedelta(seconds=job_queue_service.retention_seconds)
+        expired = [
+            batch_id for batch_id, batch in self.batches.items()
+            if batch.completed_at and batch.completed_at < cutoff
+        ]
+        for batch_id in expired:
+            self.discard_batch(batch_id)
+
+    def build_response(self, batch: BatchJob, started_at: float) -> BatchTranscriptionResponse:
+        """Respuesta síncrona de un lote terminado"""
+        results = [entry.result for entry in batch.files if entry.result is not None]
+        failed = sum(1 for entry in batch.files if entry.status != JobStatus.COMPLETED)
+
+        return BatchTranscriptionResponse(
+            success=failed == 0,
+            total_files=len(batch.files),
+            successful_transcriptions=len(results),
+            failed_transcriptions=failed,
+            results=results,
+            total_processing_time=time.time() - started_at,
+            batch_id=batch.batch_id,
+            files=batch.files
+        )
+
+
+# Instancia global del servicio
+batch_transcription_service = BatchTranscriptionService()
@@ -0,0 +1,60 @@
+"""
+Tokens de cancelación de jobs
+Cada parte que tiene trabajo en curso de un job (cola, task de la etapa,
+temporizador de reintento) registra cómo detenerlo; cancelar el token lo
+detiene todo a la vez
+"""
+
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from loguru import logger
+
+
+class CancellationToken:
+    """Señal de cancelación de un job con callbacks para liberar sus recursos"""
+
+    def __init__(self):
+        self.cancelled = False
+        self.cancelled_at: Optional[datetime] = None
+        self._callbacks: List[Callable[[], None]] = []
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registrar cómo detener un trabajo del job
+
+        Si el token ya está cancelado, el callback se ejecuta en el acto.
+
+        Returns:
+            Callable[[], None]: Función para quitar el callback cuando el trabajo termina
+        """
+        if self.cancelled:
+            self._run(callback)
+            return lambda: None
+
+        self._callbacks.append(callback)
+
+        def remove():
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+        return remove
+
+    def cancel(self) -> bool:
+        """Cancelar: ejecutar todos los callbacks. Devuelve False si ya estaba cancelado"""
+        if self.cancelled:
+            return False
+
+        self.cancelled = True
+        self.cancelled_at = datetime.now()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._run(callback)
+        return True
+
+    @staticmethod
+    def _run(callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"⚠️ Error liberando recursos de un job cancelado: {e}")
@@ -0,0 +1,266 @@
+"""
+Transcripción de audio largo por ventanas
+Divide el PCM en ventanas solapadas, las transcribe en paralelo y une los segmentos
+"""
+
+import os
+import re
+import time
+import asyncio
+from collections import Counter
+from typing import Optional, List, Tuple, Callable
+
+from loguru import logger
+
+from models.transcription_models import (
+    TranscriptionRequest,
+    TranscriptionResponse,
+    TranscriptionSegment,
+    AudioInfo
+)
+from services.audio_processor import AudioProcessor
+from services.groq_transcription_service import groq_transcription_service
+
+
+# Límite de Groq por request (25MB), con margen para la cabecera y el multipart
+GROQ_MAX_REQUEST_BYTES = 24 * 1024 * 1024
+
+
+class ChunkedTranscriptionEngine:
+    """Motor de transcripción para audio que no cabe (o no conviene) en un único request"""
+
+    def __init__(self):
+        self.audio_processor = AudioProcessor()
+        self.sample_rate = self.audio_processor.target_sample_rate
+        self.bytes_per_second = 2 * self.audio_processor.target_channels * self.sample_rate
+
+        # Duración a partir de la cual se trocea aunque quepa en un request
+        self.threshold_seconds = float(os.getenv("LONG_AUDIO_THRESHOLD_SECONDS", "900"))
+        self.window_seconds = float(os.getenv("LONG_AUDIO_WINDOW_SECONDS", "600"))
+        self.overlap_seconds = float(os.getenv("LONG_AUDIO_OVERLAP_SECONDS", "5"))
+        self.max_parallel_chunks = int(os.getenv("LONG_AUDIO_MAX_PARALLEL", "4"))
+
+        # Una ventana nunca puede superar el límite de Groq
+        max_window = GROQ_MAX_REQUEST_BYTES / self.bytes_per_second
+        self.window_seconds = min(self.window_seconds, max_window)
+        self.overlap_seconds = min(self.overlap_seconds, self.window_seconds / 4)
+
+    def needs_chunking(self, pcm_size: int) -> bool:
+        """Indicar si un PCM de este tamaño debe transcribirse por ventanas"""
+        duration = pcm_size / self.bytes_per_second
+        return pcm_size > GROQ_MAX_REQUEST_BYTES or duration > self.threshold_seconds
+
+    def plan_windows(self, duration: float) -> List[Tuple[float, float]]:
+        """
+        Calcular ventanas [inicio, fin) en segundos, solapadas `overlap_seconds`
+
+        Returns:
+            List[Tuple[float, float]]: Ventanas que cubren todo el audio
+        """
+        windows = []
+        step = self.window_seconds - self.overlap_seconds
+        start = 0.0
+
+        while start < duration:
+            end = min(start + self.window_seconds, duration)
+            windows.append((start, end))
+            if end >= duration:
+                break
+            start += step
+
+        # Evitar una última ventana minúscula: se absorbe en la anterior si cabe
+        if len(windows) > 1:
+            last_start, last_end = windows[-1]
+            prev_start, _ = windows[-2]
+            if last_end - last_start <= self.overlap_seconds * 2 and \
+                    last_end - prev_start <= GROQ_MAX_REQUEST_BYTES / self.bytes_per_second:
+                windows[-2:] = [(prev_start, last_end)]
+
+        return windows
+
+    async def transcribe(
+        self,
+        pcm: bytes,
+        request: TranscriptionRequest,
+        progress_callback: Optional[Callable] = None
+    ) -> TranscriptionResponse:
+        """
+        Transcribir PCM largo (16kHz, mono, 16 bits) en ventanas paralelas
+
+        Args:
+            pcm: Audio completo en PCM crudo
+            request: Parámetros de transcripción
+            progress_callback: Callback opcional (progreso 0-100, mensaje)
+
+        Returns:
+            TranscriptionResponse: Transcripción unificada con timestamps absolutos
+        """
+        start_time = time.time()
+        duration = len(pcm) / self.bytes_per_second
+        windows = self.plan_windows(duration)
+
+        logger.info(
+            f"✂️ Audio largo ({duration:.0f}s): {len(windows)} ventanas de "
+            f"{self.window_seconds:.0f}s, {self.max_parallel_chunks} en paralelo"
+        )
+
+        semaphore = asyncio.Semaphore(self.max_parallel_chunks)
+        completed = 0
+        uploaded_bytes = 0
+        upload_codecs = set()
+
+        async def transcribe_window(index: int, window: Tuple[float, float]) -> TranscriptionResponse:
+            nonlocal completed, uploaded_bytes
+            window_start, window_end = window
+
+            async with semaphore:
+                begin = self._byte_offset(window_start)
+                end = self._byte_offset(window_end)
+                window_pcm = pcm[begin:end]
+
+                audio_data, extension, codec = await self.audio_processor.encode_for_upload(window_pcm)
+                uploaded_bytes += len(audio_data)
+                upload_codecs.add(codec)
+
+                audio_info = AudioInfo(
+                    duration=len(window_pcm) / self.bytes_per_second,
+                    sample_rate=self.sample_rate,
+                    channels=self.audio_processor.target_channels,
+                    format="pcm_s16le",
+                    size_mb=len(window_pcm) / (1024 * 1024),
+                    upload_codec=codec,
+                    upload_size_mb=len(audio_data) / (1024 * 1024)
+                )
+
+                result = await groq_transcription_service.transcribe_audio_bytes(
+                    audio_data,
+                    f"chunk_{index}{extension}",
+                    request,
+                    audio_info
+                )
+
+            completed += 1
+            logger.info(f"✅ Ventana {completed}/{len(windows)} transcrita ({window_start:.0f}s-{window_end:.0f}s)")
+            if progress_callback:
+                await progress_callback(
+                    completed / len(windows) * 100.0,
+                    f"Transcribiendo audio largo: {completed}/{len(windows)} partes"
+                )
+            return result
+
+        tasks = [
+            asyncio.create_task(transcribe_window(i, window))
+            for i, window in enumerate(windows)
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Una ventana falló (o el job se canceló): el resultado ya no sirve,
+            # no seguir gastando peticiones a Groq en las demás
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        text, segments = self._stitch(windows, results)
+        languages = [result.language for result in results if result.language]
+        language = Counter(languages).most_common(1)[0][0] if languages else request.language
+
+        processing_time = time.time() - start_time
+        logger.info(f"✅ Audio largo transcrito en {processing_time:.2f}s ({len(windows)} ventanas)")
+
+        return TranscriptionResponse(
+            text=text,
+            segments=segments if request.return_timestamps else None,
+            language=language,
+            processing_time=processing_time,
+            model_used=results[0].model_used,
+            audio_info=AudioInfo(
+                duration=duration,
+                sample_rate=self.sample_rate,
+                channels=self.audio_processor.target_channels,
+                format="pcm_s16le",
+                size_mb=len(pcm) / (1024 * 1024),
+                upload_codec="+".join(sorted(upload_codecs)),
+                upload_size_mb=round(uploaded_bytes / (1024 * 1024), 2)
+            ),
+            config={"chunks": len(windows), "window_seconds": self.window_seconds}
+        )
+
+    def _byte_offset(self, seconds: float) -> int:
+        """Convertir segundos en un offset de bytes alineado a muestra"""
+        frame_size = 2 * self.audio_processor.target_channels
+        return int(seconds * self.sample_rate) * frame_size
+
+    def _stitch(
+        self,
+        windows: List[Tuple[float, float]],
+        results: List[TranscriptionResponse]
+    ) -> Tuple[str, List[TranscriptionSegment]]:
+        """
+        Unir los resultados de las ventanas
+
+        Los timestamps se desplazan al inicio de cada ventana. En cada solape se
+        corta en el punto medio: cada segmento se queda en la ventana que contiene
+        su centro. El texto repetido que cruza el corte se elimina por solape de palabras.
+        """
+        segments: List[TranscriptionSegment] = []
+        text_parts: List[str] = []
+
+        for index, (result, (window_start, window_end)) in enumerate(zip(results, windows)):
+            cut_start = 0.0 if index == 0 else (window_start + windows[index - 1][1]) / 2
+            cut_end = float("inf") if index == len(windows) - 1 else (windows[index + 1][0] + window_end) / 2
+
+            if result.segments is None:
+                # Sin timestamps: solo se puede deduplicar por texto
+                text_parts.append(self._strip_repeated_prefix(" ".join(text_parts), result.text))
+                continue
+
+            first_in_window = True
+            for segment in result.segments:
+                start = segment.start + window_start
+                end = segment.end + window_start
+                if not cut_start <= (start + end) / 2 < cut_end:
+                    continue
+
+                text = segment.text
+                if first_in_window and segments:
+                    text = self._strip_repeated_prefix(segments[-1].text, text)
+                first_in_window = False
+                if not text:
+                    continue
+
+                segments.append(TranscriptionSegment(
+                    id=len(segments),
+                    start=round(start, 3),
+                    end=round(end, 3),
+                    text=text,
+                    confidence=segment.confidence
+                ))
+
+        if segments or not text_parts:
+            text = " ".join(segment.text for segment in segments)
+        else:
+            text = " ".join(part for part in text_parts if part)
+
+        return text.strip(), segments
+
+    @staticmethod
+    def _strip_repeated_prefix(previous: str, current: str, max_words: int = 12) -> str:
+        """Quitar del inicio de `current` las palabras que repiten el final de `previous`"""
+        def normalize(word: str) -> str:
+            return re.sub(r"[^\w]", "", word.lower())
+
+        previous_words = [normalize(word) for word in previous.split()[-max_words:]]
+        current_words = current.split()
+        normalized = [normalize(word) for word in current_words[:max_words]]
+
+        # Se exigen al menos 2 palabras para no comerse repeticiones legítimas
+        for size in range(min(len(previous_words), len(normalized)), 1, -1):
+            if previous_words[-size:] == normalized[:size]:
+                return " ".join(current_words[size:])
+        return current.strip()
+
+
+# Instancia global del motor
+chunked_transcription_engine = ChunkedTranscriptionEngine()
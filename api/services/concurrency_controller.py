@@ -0,0 +1,185 @@
+"""
+Control adaptativo de concurrencia hacia Groq (AIMD)
+Sube el número de llamadas simultáneas mientras la latencia se mantiene y lo
+recorta con fuerza ante rate limits (429), errores 5xx o timeouts
+"""
+
+import os
+import time
+import asyncio
+import statistics
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any
+
+from loguru import logger
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Límite de concurrencia AIMD
+
+    - Aumento aditivo: +1/límite por llamada correcta con el límite saturado y
+      la latencia (segundos por MB enviado) dentro de la tolerancia respecto a la base.
+    - Disminución multiplicativa: ×GROQ_BACKOFF_FACTOR ante 429/5xx/timeout,
+      ×0.9 tras GROQ_LATENCY_SLOW_SAMPLES llamadas seguidas por encima de la
+      tolerancia. Tras recortar hay un periodo de enfriamiento para que una
+      ráfaga de errores simultáneos cuente como una sola señal.
+
+    La base es la mediana de las últimas GROQ_LATENCY_WINDOW latencias: una
+    llamada excepcionalmente rápida no la hunde y una lenta aislada no recorta.
+
+    El mismo límite acota las llamadas a Groq y los jobs que los workers toman
+    de la cola, para que un job no salga de la cola justa sin capacidad.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("GROQ_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+        self.min_limit = int(os.getenv("GROQ_CONCURRENCY_MIN") or 1)
+        self.max_limit = int(os.getenv("GROQ_CONCURRENCY_MAX") or 16)
+        self.initial_limit = int(os.getenv("GROQ_CONCURRENCY_INITIAL") or 3)
+        self.latency_tolerance = float(os.getenv("GROQ_LATENCY_TOLERANCE") or 1.5)
+        self.backoff_factor = float(os.getenv("GROQ_BACKOFF_FACTOR") or 0.5)
+        self.latency_window = int(os.getenv("GROQ_LATENCY_WINDOW") or 50)
+        self.slow_samples = int(os.getenv("GROQ_LATENCY_SLOW_SAMPLES") or 3)
+
+        self.limit = float(min(max(self.initial_limit, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.waiting = 0
+        self.active_jobs = 0
+        self._condition = asyncio.Condition()
+
+        # Latencia base (s/MB): mediana de la ventana de latencias recientes
+        self._latencies: deque = deque(maxlen=self.latency_window)
+        self.baseline_latency: Optional[float] = None
+        self.last_latency: Optional[float] = None
+        self.slow_streak = 0
+        self._cooldown_until = 0.0
+
+        # Contabilidad
+        self.successes = 0
+        self.overloads = 0
+        self.decisions: deque = deque(maxlen=20)
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @asynccontextmanager
+    async def call_slot(self, size_bytes: int):
+        """
+        Ocupar un hueco para una llamada a Groq y medir su resultado
+
+        Las llamadas que terminan con error de sobrecarga deben reportarse con
+        `record_overload`; las demás excepciones no ajustan el límite.
+        """
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.in_flight < self.current_limit)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            saturated = self.in_flight >= self.current_limit
+
+        start_time = time.monotonic()
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                if succeeded:
+                    self._record_success(time.monotonic() - start_time, size_bytes, saturated)
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def job_slot(self):
+        """Ocupar un hueco de job (los workers lo toman antes de sacar un job de la cola)"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active_jobs < self.current_limit)
+            self.active_jobs += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.active_jobs -= 1
+                self._condition.notify_all()
+
+    def _record_success(self, elapsed: float, size_bytes: int, saturated: bool):
+        self.successes += 1
+        # Normalizar por tamaño: un archivo grande tarda más sin que Groq esté saturado
+        latency = elapsed / max(size_bytes / (1024 * 1024), 0.25)
+        self.last_latency = latency
+        self._latencies.append(latency)
+        self.baseline_latency = statistics.median(self._latencies)
+
+        if not self.enabled or time.monotonic() < self._cooldown_until:
+            return
+
+        if latency > self.baseline_latency * self.latency_tolerance:
+            # Una llamada lenta aislada es ruido; varias seguidas indican saturación
+            self.slow_streak += 1
+            if self.slow_streak >= self.slow_samples:
+                self.slow_streak = 0
+                self._decrease(
+                    0.9,
+                    f"{self.slow_samples} llamadas seguidas con latencia > "
+                    f"{self.latency_tolerance}× base {self.baseline_latency:.2f}s/MB"
+                )
+            return
+
+        self.slow_streak = 0
+        if saturated and self.limit < self.max_limit:
+            previous = self.current_limit
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            if self.current_limit != previous:
+                self._log_decision("increase", "latencia estable con el límite saturado")
+
+    def record_overload(self, reason: str):
+        """Groq respondió 429/5xx o la llamada agotó el timeout: recortar el límite"""
+        self.overloads += 1
+        if not self.enabled or time.monotonic() < self._cooldown_until:
+            return
+        self._decrease(self.backoff_factor, reason)
+
+    def _decrease(self, factor: float, reason: str):
+        previous = self.current_limit
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        # Enfriamiento de al menos una llamada típica para no recortar dos veces por la misma ráfaga
+        self._cooldown_until = time.monotonic() + max(1.0, self.baseline_latency or 0.0)
+        if self.current_limit != previous:
+            self._log_decision("decrease", reason)
+
+    def _log_decision(self, action: str, reason: str):
+        self.decisions.append({
+            "at": time.time(),
+            "action": action,
+            "limit": self.current_limit,
+            "reason": reason
+        })
+        icon = "📈" if action == "increase" else "📉"
+        logger.info(f"{icon} Concurrencia Groq: {self.current_limit} ({reason})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado del controlador"""
+        return {
+            "adaptive": self.enabled,
+            "limit": self.current_limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "active_jobs": self.active_jobs,
+            "baseline_latency_s_per_mb": round(self.baseline_latency, 3) if self.baseline_latency else None,
+            "last_latency_s_per_mb": round(self.last_latency, 3) if self.last_latency else None,
+            "slow_streak": self.slow_streak,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "recent_decisions": list(self.decisions)
+        }
+
+
+# Instancia global del controlador
+groq_concurrency = AdaptiveConcurrencyLimiter()
@@ -0,0 +1,109 @@
+"""
+Estimación del tiempo restante de los jobs
+Aprende de los jobs completados el throughput de cada etapa (segundos de audio
+procesados por segundo) y lo combina con el trabajo en cola y la concurrencia activa
+"""
+
+import os
+from typing import Optional, Dict, Any
+
+from models.transcription_models import TranscriptionJob
+
+# Etapas medidas del pipeline (persistir es despreciable frente a estas)
+ETA_STAGES = ("decode", "transcribe")
+
+
+class EtaEstimator:
+    """
+    Throughput móvil por etapa (media exponencial, ETA_SMOOTHING)
+
+    El throughput se mide por job con la concurrencia real del momento, de modo
+    que ya incluye la contención; el de una etapa completa es throughput × workers.
+    Hasta la primera muestra se usan los valores por defecto de ETA_DEFAULT_*.
+    """
+
+    def __init__(self):
+        self.smoothing = float(os.getenv("ETA_SMOOTHING") or 0.2)
+        self.rates: Dict[str, float] = {
+            "decode": float(os.getenv("ETA_DEFAULT_DECODE_RATE") or 60),
+            "transcribe": float(os.getenv("ETA_DEFAULT_TRANSCRIBE_RATE") or 20)
+        }
+        # Duración estimada de un audio sin metadatos a partir de su tamaño
+        self.bytes_per_second = float(os.getenv("ETA_DEFAULT_BYTES_PER_SECOND") or 16000)
+        self.default_audio_seconds = float(os.getenv("FAIR_DEFAULT_COST_SECONDS") or 60)
+        self.samples: Dict[str, int] = {stage: 0 for stage in ETA_STAGES}
+        self.size_samples = 0
+
+    def _smooth(self, current: float, observed: float, samples: int) -> float:
+        # La primera muestra sustituye al valor por defecto
+        if samples == 0:
+            return observed
+        return current + (observed - current) * self.smoothing
+
+    def record(self, stage: str, audio_seconds: Optional[float], elapsed: float):
+        """Registrar cuánto tardó una etapa en procesar `audio_seconds` de audio"""
+        if not audio_seconds or elapsed <= 0 or stage not in self.rates:
+            return
+        self.rates[stage] = self._smooth(self.rates[stage], audio_seconds / elapsed, self.samples[stage])
+        self.samples[stage] += 1
+
+    def record_size(self, size_bytes: Optional[int], audio_seconds: Optional[float]):
+        """Registrar la relación tamaño/duración de un audio ya decodificado"""
+        if not size_bytes or not audio_seconds:
+            return
+        self.bytes_per_second = self._smooth(self.bytes_per_second, size_bytes / audio_seconds, self.size_samples)
+        self.size_samples += 1
+
+    def audio_seconds(self, job: TranscriptionJob) -> float:
+        """Duración del audio del job (por metadatos, o estimada por el tamaño del archivo)"""
+        metadata = job.request_params.audio_metadata
+        if metadata and metadata.duration:
+            return metadata.duration
+        try:
+            return os.path.getsize(job.audio_file_path) / self.bytes_per_second
+        except OSError:
+            return self.default_audio_seconds
+
+    def stage_seconds(self, stage: str, audio_seconds: float) -> float:
+        """Tiempo esperado de una etapa para un job"""
+        return audio_seconds / self.rates[stage]
+
+    def stage_remaining(
+        self,
+        stage: str,
+        audio_seconds: float,
+        elapsed: float = 0.0,
+        fraction: Optional[float] = None
+    ) -> float:
+        """
+        Tiempo restante de un job dentro de una etapa
+
+        Si la etapa ya dura más de lo esperado y se conoce la fracción completada,
+        se extrapola a partir del ritmo observado en lugar de devolver cero.
+        """
+        expected = self.stage_seconds(stage, audio_seconds)
+        if elapsed < expected:
+            return expected - elapsed
+        if fraction and 0.0 < fraction < 1.0:
+            return elapsed * (1.0 - fraction) / fraction
+        # Pasado lo esperado sin más información: un margen breve
+        return min(expected, 5.0) * 0.5
+
+    def backlog_seconds(self, audio_seconds: float, parallelism: Dict[str, int]) -> float:
+        """Tiempo en despachar `audio_seconds` de audio en cola (limitado por la etapa más lenta)"""
+        if audio_seconds <= 0:
+            return 0.0
+        throughput = min(self.rates[stage] * max(parallelism.get(stage, 1), 1) for stage in ETA_STAGES)
+        return audio_seconds / throughput
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Throughput aprendido por etapa"""
+        return {
+            "rates_audio_s_per_s": {stage: round(rate, 2) for stage, rate in self.rates.items()},
+            "samples": dict(self.samples),
+            "bytes_per_audio_second": round(self.bytes_per_second)
+        }
+
+
+# Instancia global del estimador
+eta_estimator = EtaEstimator()
@@ -0,0 +1,281 @@
+"""
+Bus de eventos de jobs entre procesos
+El proceso que ejecuta un job publica cada cambio de estado; los demás procesos
+de la API lo reciben y lo reenvían a sus propios WebSockets. Así el progreso
+llega aunque el cliente esté conectado a otro worker de uvicorn u otro nodo
+"""
+
+import os
+import json
+import socket
+import struct
+import asyncio
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Callable, Awaitable, Any
+
+from loguru import logger
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Cabecera de cada evento en el backend unix: longitud del JSON (4 bytes, big-endian)
+FRAME_HEADER = struct.Struct(">I")
+
+
+class EventBus(ABC):
+    """
+    Interfaz del bus de eventos
+
+    Los eventos son diccionarios JSON; el bus añade `origin` (proceso que
+    publica) y no los entrega de vuelta a ese mismo proceso.
+    """
+
+    # Los eventos salen del proceso (si no, publicar es innecesario: los callbacks ya son locales)
+    distributed = False
+
+    def __init__(self):
+        self.origin = f"{socket.gethostname()}-{os.getpid()}"
+        self._handlers: List[EventHandler] = []
+
+        # Contabilidad
+        self.published = 0
+        self.received = 0
+        self.failed = 0
+
+    def subscribe(self, handler: EventHandler):
+        """Registrar un handler de eventos (antes de `start`)"""
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, event: Dict[str, Any]):
+        """Enviar un evento a los demás procesos"""
+
+    async def close(self):
+        pass
+
+    def _encode(self, event: Dict[str, Any]) -> bytes:
+        self.published += 1
+        return json.dumps({**event, "origin": self.origin}, default=str).encode()
+
+    async def _dispatch(self, payload: bytes):
+        """Entregar un evento recibido a los handlers de este proceso"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("⚠️ Evento del bus ilegible, se descarta")
+            return
+
+        if event.get("origin") == self.origin:
+            return
+
+        self.received += 1
+        for handler in self._handlers:
+            try:
+                await handler(event)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Error procesando evento del bus: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "origin": self.origin,
+            "published": self.published,
+            "received": self.received,
+            "failed": self.failed
+        }
+
+
+class InMemoryEventBus(EventBus):
+    """Un solo proceso: no hay otros procesos a los que entregar (los callbacks locales ya notifican)"""
+
+    backend = "memory"
+
+    async def publish(self, event: Dict[str, Any]):
+        self.published += 1
+
+
+class UnixSocketEventBus(EventBus):
+    """
+    Procesos en un mismo host, sin broker
+
+    Cada proceso suscrito escucha en `{socket_dir}/{origin}.sock`; al publicar se
+    envía el evento a todos los sockets del directorio por conexiones persistentes.
+    Los sockets de procesos caídos se eliminan al rechazar la conexión.
+    """
+
+    backend = "unix"
+    distributed = True
+
+    def __init__(self, socket_dir: str, send_timeout: float):
+        super().__init__()
+        self.socket_dir = Path(socket_dir)
+        self.send_timeout = send_timeout
+        self.socket_path = self.socket_dir / f"{self.origin}.sock"
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Dict[Path, asyncio.StreamWriter] = {}
+        self._connect_lock = asyncio.Lock()
+        self._readers: set = set()
+        self.dropped = 0
+
+    async def start(self):
+        self.socket_dir.mkdir(parents=True, exist_ok=True)
+        if not self._handlers:
+            # Solo publica (p. ej. worker.py): no necesita socket propio
+            return
+
+        self.socket_path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._serve_peer, path=str(self.socket_path))
+        logger.info(f"📡 Bus de eventos unix escuchando en {self.socket_path}")
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Leer los eventos de un proceso publicador"""
+        self._readers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                (length,) = FRAME_HEADER.unpack(header)
+                await self._dispatch(await reader.readexactly(length))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._readers.discard(writer)
+            writer.close()
+
+    async def publish(self, event: Dict[str, Any]):
+        payload = self._encode(event)
+        frame = FRAME_HEADER.pack(len(payload)) + payload
+
+        paths = [path for path in self.socket_dir.glob("*.sock") if path != self.socket_path]
+        for path in set(self._peers) - set(paths):
+            self._close_peer(path)
+
+        await asyncio.gather(*(self._send(path, frame) for path in paths))
+
+    async def _send(self, path: Path, frame: bytes):
+        try:
+            writer = self._peers.get(path) or await self._connect(path)
+            writer.write(frame)
+            await asyncio.wait_for(writer.drain(), timeout=self.send_timeout)
+        except ConnectionRefusedError:
+            # Nadie escucha: socket de un proceso que terminó sin limpiar
+            self._close_peer(path)
+            path.unlink(missing_ok=True)
+        except (OSError, asyncio.TimeoutError) as e:
+            # Proceso lento o reiniciándose: se reconecta en el siguiente evento
+            self.dropped += 1
+            logger.warning(f"⚠️ Evento no entregado a {path.name}: {e or 'timeout'}")
+            self._close_peer(path)
+
+    async def _connect(self, path: Path) -> asyncio.StreamWriter:
+        # Una sola conexión por proceso destino aunque publiquen varios jobs a la vez
+        async with self._connect_lock:
+            if path not in self._peers:
+                _, self._peers[path] = await asyncio.wait_for(
+                    asyncio.open_unix_connection(str(path)), timeout=self.send_timeout
+                )
+            return self._peers[path]
+
+    def _close_peer(self, path: Path):
+        writer = self._peers.pop(path, None)
+        if writer is not None:
+            writer.close()
+
+    async def close(self):
+        for path in list(self._peers):
+            self._close_peer(path)
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._readers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            self.socket_path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**super().get_stats(), "peers": len(self._peers), "dropped": self.dropped}
+
+
+class RedisEventBus(EventBus):
+    """Procesos en varios nodos: pub/sub de Redis (o compatible) en `{prefix}:events`"""
+
+    backend = "redis"
+    distributed = True
+
+    def __init__(self, url: str, prefix: str):
+        super().__init__()
+        self.url = url
+        self.channel = f"{prefix}:events"
+        self._client = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("EVENT_BUS=redis requiere el paquete redis (pip install redis)") from e
+
+        self._client = redis.from_url(self.url)
+        if self._handlers:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(self.channel)
+            self._listener = asyncio.create_task(self._listen())
+        logger.info(f"📡 Bus de eventos Redis: {self.channel}@{self.url.split('@')[-1]}")
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    await self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Error leyendo el bus de eventos Redis: {e}")
+                await asyncio.sleep(1.0)
+
+    async def publish(self, event: Dict[str, Any]):
+        await self._client.publish(self.channel, self._encode(event))
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_event_bus() -> EventBus:
+    """Crear el bus configurado en EVENT_BUS (memory, unix o redis)"""
+    backend = os.getenv("EVENT_BUS", "memory").lower()
+
+    if backend == "unix":
+        return UnixSocketEventBus(
+            os.getenv("EVENT_BUS_SOCKET_DIR", "./data/events"),
+            float(os.getenv("EVENT_BUS_SEND_TIMEOUT_SECONDS") or 2)
+        )
+
+    if backend == "redis":
+        return RedisEventBus(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            os.getenv("REDIS_KEY_PREFIX", "retender")
+        )
+
+    if backend != "memory":
+        logger.warning(f"⚠️ EVENT_BUS no soportado: {backend}, se usa memory")
+
+    return InMemoryEventBus()
+
+
+# Instancia global del bus
+event_bus = create_event_bus()
@@ -0,0 +1,242 @@
+"""
+Planificador justo de jobs por tenant
+Deficit round-robin ponderado entre tenants, con niveles de prioridad estricta
+y límite opcional de jobs simultáneos por tenant
+"""
+
+import os
+import asyncio
+from collections import deque
+from typing import Dict, Deque, Optional, Tuple, Callable, Any
+
+
+DEFAULT_TENANT = "default"
+
+
+def _parse_weights(raw: str) -> Dict[str, float]:
+    """Leer pesos con el formato 'tenant_a:2,tenant_b:0.5'"""
+    weights = {}
+    for item in raw.split(","):
+        if ":" not in item:
+            continue
+        tenant, weight = item.rsplit(":", 1)
+        try:
+            weights[tenant.strip()] = max(float(weight), 0.01)
+        except ValueError:
+            continue
+    return weights
+
+
+class _DeficitRoundRobin:
+    """Un nivel de prioridad: sub-cola por tenant y anillo DRR entre tenants"""
+
+    def __init__(self):
+        self.queues: Dict[str, Deque[Tuple[str, float]]] = {}
+        self.ring: Deque[str] = deque()
+        self.deficits: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def push(self, tenant_id: str, job_id: str, cost: float):
+        if tenant_id not in self.queues:
+            self.queues[tenant_id] = deque()
+            self.deficits[tenant_id] = 0.0
+            self.ring.append(tenant_id)
+        self.queues[tenant_id].append((job_id, cost))
+
+    def pop(
+        self,
+        quantum_for: Callable[[str], float],
+        eligible: Callable[[str], bool]
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Sacar el siguiente job según DRR
+
+        El tenant en cabeza conserva el turno mientras su déficit cubra el coste
+        del siguiente job; si no, recibe su quantum y pasa al final del anillo.
+        Los tenants en su límite de concurrencia se saltan sin acumular déficit.
+        """
+        skipped = 0
+        while self.ring and skipped < len(self.ring):
+            tenant_id = self.ring[0]
+            if not eligible(tenant_id):
+                skipped += 1
+                self.ring.rotate(-1)
+                continue
+            skipped = 0
+
+            queue = self.queues[tenant_id]
+            job_id, cost = queue[0]
+            if self.deficits[tenant_id] >= cost:
+                queue.popleft()
+                self.deficits[tenant_id] -= cost
+                if not queue:
+                    self._drop_tenant(tenant_id)
+                return tenant_id, job_id
+
+            self.deficits[tenant_id] += quantum_for(tenant_id)
+            self.ring.rotate(-1)
+
+        return None
+
+    def remove(self, job_id: str) -> bool:
+        for tenant_id, queue in self.queues.items():
+            for entry in queue:
+                if entry[0] == job_id:
+                    queue.remove(entry)
+                    if not queue:
+                        self._drop_tenant(tenant_id)
+                    return True
+        return False
+
+    def _drop_tenant(self, tenant_id: str):
+        # Un tenant sin trabajo pendiente no conserva déficit (DRR clásico)
+        del self.queues[tenant_id]
+        del self.deficits[tenant_id]
+        self.ring.remove(tenant_id)
+
+
+class FairScheduler:
+    """
+    Cola de jobs justa entre tenants (misma interfaz básica que asyncio.Queue)
+
+    - Prioridad estricta: siempre se sirve primero el nivel más alto con trabajo.
+    - Dentro de un nivel, DRR ponderado: el coste de un job son sus segundos de
+      audio, así un tenant con muchos archivos largos no acapara los workers.
+    - Límite opcional de jobs en ejecución por tenant.
+    """
+
+    def __init__(self):
+        self.quantum_seconds = float(os.getenv("FAIR_QUANTUM_SECONDS") or 600)
+        self.default_cost_seconds = float(os.getenv("FAIR_DEFAULT_COST_SECONDS") or 60)
+        self.tenant_weights = _parse_weights(os.getenv("TENANT_WEIGHTS", ""))
+        self.max_running_per_tenant = int(os.getenv("TENANT_MAX_CONCURRENT") or 0)
+
+        self._levels: Dict[int, _DeficitRoundRobin] = {}
+        self._running: Dict[str, int] = {}
+        self._changed = asyncio.Event()
+
+    def qsize(self) -> int:
+        return sum(len(level) for level in self._levels.values())
+
+    def put_nowait(
+        self,
+        job_id: str,
+        tenant_id: Optional[str] = None,
+        priority: int = 0,
+        cost_seconds: Optional[float] = None
+    ):
+        """Encolar un job en la sub-cola de su tenant"""
+        level = self._levels.setdefault(priority, _DeficitRoundRobin())
+        cost = max(cost_seconds or self.default_cost_seconds, 1.0)
+        level.push(tenant_id or DEFAULT_TENANT, job_id, cost)
+        self._changed.set()
+
+    async def put(self, job_id: str, tenant_id: Optional[str] = None, priority: int = 0,
+                  cost_seconds: Optional[float] = None):
+        self.put_nowait(job_id, tenant_id, priority, cost_seconds)
+
+    async def get(self) -> Tuple[str, str]:
+        """
+        Esperar el siguiente job a ejecutar
+
+        Returns:
+            Tuple[str, str]: (job_id, tenant_id). Hay que llamar a `release`
+            con el tenant cuando el job termine.
+        """
+        while True:
+            picked = self._pick()
+            if picked is not None:
+                tenant_id, job_id = picked
+                self._running[tenant_id] = self._running.get(tenant_id, 0) + 1
+                return job_id, tenant_id
+
+            self._changed.clear()
+            await self._changed.wait()
+
+    def release(self, tenant_id: str):
+        """Marcar como terminado un job de `tenant_id` (libera su cupo de concurrencia)"""
+        running = self._running.get(tenant_id, 0) - 1
+        if running > 0:
+            self._running[tenant_id] = running
+        else:
+            self._running.pop(tenant_id, None)
+        self._changed.set()
+
+    def remove(self, job_id: str) -> bool:
+        """Quitar un job que todavía no se ha despachado (p. ej. cancelado)"""
+        for priority, level in list(self._levels.items()):
+            if level.remove(job_id):
+                if not len(level):
+                    del self._levels[priority]
+                return True
+        return False
+
+    def work_ahead(self, job_id: str) -> Optional[float]:
+        """
+        Segundos de audio que se despacharán antes que `job_id` (incluido el suyo)
+
+        Aproximación fluida del DRR: los niveles de mayor prioridad van antes
+        completos; en su nivel, mientras su tenant despacha el trabajo por
+        delante del job, cada otro tenant despacha lo proporcional a su peso.
+        """
+        ahead = 0.0
+        for priority in sorted(self._levels, reverse=True):
+            level = self._levels[priority]
+            for tenant_id, queue in level.queues.items():
+                own = 0.0
+                for queued_id, cost in queue:
+                    own += cost
+                    if queued_id == job_id:
+                        break
+                else:
+                    continue
+
+                own_weight = self._quantum_for(tenant_id)
+                for other_id, other_queue in level.queues.items():
+                    if other_id != tenant_id:
+                        other_total = sum(cost for _, cost in other_queue)
+                        ahead += min(other_total, own * self._quantum_for(other_id) / own_weight)
+                return ahead + own
+
+            ahead += sum(cost for queue in level.queues.values() for _, cost in queue)
+        return None
+
+    def _pick(self) -> Optional[Tuple[str, str]]:
+        for priority in sorted(self._levels, reverse=True):
+            level = self._levels[priority]
+            picked = level.pop(self._quantum_for, self._is_eligible)
+            if picked is not None:
+                if not len(level):
+                    del self._levels[priority]
+                return picked
+        return None
+
+    def _quantum_for(self, tenant_id: str) -> float:
+        return self.quantum_seconds * self.tenant_weights.get(tenant_id, 1.0)
+
+    def _is_eligible(self, tenant_id: str) -> bool:
+        if self.max_running_per_tenant <= 0:
+            return True
+        return self._running.get(tenant_id, 0) < self.max_running_per_tenant
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Trabajo en cola y en ejecución por tenant"""
+        tenants: Dict[str, Dict[str, Any]] = {}
+        for priority, level in self._levels.items():
+            for tenant_id, queue in level.queues.items():
+                stats = tenants.setdefault(tenant_id, {"queued": 0, "running": 0, "queued_seconds": 0.0})
+                stats["queued"] += len(queue)
+                stats["queued_seconds"] += sum(cost for _, cost in queue)
+
+        for tenant_id, running in self._running.items():
+            tenants.setdefault(tenant_id, {"queued": 0, "running": 0, "queued_seconds": 0.0})["running"] = running
+
+        return {
+            "policy": "weighted_drr",
+            "quantum_seconds": self.quantum_seconds,
+            "max_running_per_tenant": self.max_running_per_tenant,
+            "priority_levels": sorted(self._levels, reverse=True),
+            "tenants": tenants
+        }
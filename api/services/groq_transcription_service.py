@@ -9,15 +9,19 @@ import tempfile
 from typing import Optional, Dict, Any, Callable
 from pathlib import Path
 
-from groq import Groq
+import httpx
+from groq import AsyncGroq, APIStatusError, APITimeoutError
 from loguru import logger
 
 from models.transcription_models import (
     TranscriptionRequest,
     TranscriptionResponse,
     AudioInfo,
+    AudioMetadata,
     TranscriptionSegment
 )
+from services.audio_processor import AudioProcessor
+from services.concurrency_controller import groq_concurrency
 
 
 class GroqTranscriptionService:
@@ -25,10 +29,26 @@ class GroqTranscriptionService:
     
     def __init__(self):
         self.client = None
+        self.http_client = None
         self.api_key = None
+        self.audio_processor = AudioProcessor()
+
+        # Timeouts por llamada (la transcripción incluye subida + inferencia)
+        self.request_timeout = float(os.getenv("GROQ_TIMEOUT_SECONDS", "120"))
+        self.connect_timeout = float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", "10"))
+
+        # Pool de conexiones keep-alive compartido por todas las transcripciones
+        self.max_connections = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+        self.max_keepalive_connections = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "10"))
+        self.keepalive_expiry = float(os.getenv("GROQ_KEEPALIVE_EXPIRY_SECONDS", "120"))
+        self.prewarm = os.getenv("GROQ_PREWARM", "true").lower() == "true"
         
     async def initialize(self):
         """Inicializar el servicio de transcripción Groq"""
+        if self.client is not None:
+            # Ya inicializado: reutilizar el cliente y su pool de conexiones
+            return
+
         logger.info("🚀 Inicializando servicio de transcripción Groq Cloud...")
 
         # Obtener API key
@@ -37,10 +57,20 @@ class GroqTranscriptionService:
             logger.error("❌ GROQ_API_KEY no encontrada en variables de entorno")
             raise ValueError("❌ GROQ_API_KEY no encontrada en variables de entorno")
 
-        # Inicializar cliente Groq
+        # Inicializar cliente Groq asíncrono con pool keep-alive propio
         try:
-            self.client = Groq(api_key=self.api_key)
-            logger.info("✅ Cliente Groq inicializado correctamente")
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                timeout=httpx.Timeout(self.request_timeout, connect=self.connect_timeout)
+            )
+            # Sin reintentos del SDK: los errores transitorios los reintenta la cola
+            # de jobs (retry_policy), con su backoff y respetando Retry-After
+            self.client = AsyncGroq(api_key=self.api_key, http_client=self.http_client, max_retries=0)
+            logger.info("✅ Cliente Groq (async) inicializado correctamente")
         except Exception as e:
             logger.error(f"❌ Error inicializando cliente Groq: {e}")
             raise
@@ -57,8 +87,29 @@ class GroqTranscriptionService:
             logger.error(f"❌ Error en verificación de Groq Cloud: {e}")
             raise
 
+        # Abrir la conexión TLS ahora para que la primera transcripción no pague el handshake
+        if self.prewarm:
+            await self._prewarm_connection()
+
         logger.info("✅ Servicio de transcripción Groq Cloud listo")
 
+    async def _prewarm_connection(self):
+        """Pre-conectar (DNS + TCP + TLS) el pool con una llamada ligera"""
+        try:
+            start_time = time.time()
+            await self.client.models.list(timeout=self.connect_timeout)
+            logger.info(f"🔥 Conexión con Groq pre-calentada en {time.time() - start_time:.2f}s")
+        except Exception as e:
+            # No es crítico: la primera transcripción abrirá la conexión
+            logger.warning(f"⚠️ No se pudo pre-calentar la conexión con Groq: {e}")
+
+    async def close(self):
+        """Cerrar el pool de conexiones HTTP"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        self.client = None
+        self.http_client = None
+
     async def health_check(self) -> bool:
         """
         Verificar que el servicio esté funcionando correctamente
@@ -89,12 +140,17 @@ class GroqTranscriptionService:
             logger.error(f"❌ Health check falló: {e}")
             return False
     
-    async def transcribe_audio(self, request: TranscriptionRequest) -> TranscriptionResponse:
+    async def transcribe_audio(
+        self,
+        request: TranscriptionRequest,
+        timeout: Optional[float] = None
+    ) -> TranscriptionResponse:
         """
         Transcribir audio usando Groq Cloud API
         
         Args:
             request: Solicitud de transcripción
+            timeout: Timeout de la llamada en segundos (GROQ_TIMEOUT_SECONDS por defecto)
             
         Returns:
             TranscriptionResponse: Respuesta con la transcripción
@@ -110,69 +166,120 @@ class GroqTranscriptionService:
             # Abrir archivo de audio
             with open(request.audio_file_path, "rb") as audio_file:
                 logger.info("📤 Enviando audio a Groq Cloud...")
-                
-                # Llamada a Groq API
-                transcription = self.client.audio.transcriptions.create(
-                    file=audio_file,
-                    model="whisper-large-v3-turbo",  # Modelo más rápido y preciso
-                    language=request.language if request.language != "auto" else None,
-                    response_format="verbose_json" if request.return_timestamps else "json",
-                    temperature=request.temperature
-                )
+                transcription = await self._create_transcription(audio_file, request, timeout)
                 
             processing_time = time.time() - start_time
             logger.info(f"✅ Transcripción completada en {processing_time:.2f}s")
-            
-            # Procesar respuesta
-            if request.return_timestamps and hasattr(transcription, 'segments'):
-                # Con timestamps
-                segments = []
-                for i, segment in enumerate(transcription.segments):
-                    # Manejar tanto objetos como diccionarios
-                    if isinstance(segment, dict):
-                        start = segment.get('start', 0.0)
-                        end = segment.get('end', 0.0)
-                        text = segment.get('text', '').strip()
-                    else:
-                        start = getattr(segment, 'start', 0.0)
-                        end = getattr(segment, 'end', 0.0)
-                        text = getattr(segment, 'text', '').strip()
-
-                    segments.append(TranscriptionSegment(
-                        id=i,
-                        start=start,
-                        end=end,
-                        text=text
-                    ))
-                
-                # Obtener información del audio
-                audio_info = await self.get_audio_info(request.audio_file_path)
-
-                return TranscriptionResponse(
-                    text=transcription.text.strip(),
-                    segments=segments,
-                    language=getattr(transcription, 'language', request.language),
-                    processing_time=processing_time,
-                    model_used="whisper-large-v3-turbo-groq",
-                    audio_info=audio_info
-                )
-            else:
-                # Solo texto
-                # Obtener información del audio
-                audio_info = await self.get_audio_info(request.audio_file_path)
-
-                return TranscriptionResponse(
-                    text=transcription.text.strip(),
-                    segments=None,
-                    language=getattr(transcription, 'language', request.language),
-                    processing_time=processing_time,
-                    model_used="whisper-large-v3-turbo-groq",
-                    audio_info=audio_info
-                )
+
+            # Obtener información del audio
+            audio_info = await self.get_audio_info(request.audio_file_path, request.audio_metadata)
+
+            return self._build_response(transcription, request, processing_time, audio_info)
                 
         except Exception as e:
             logger.error(f"❌ Error en transcripción Groq: {e}")
             raise Exception(f"Error en transcripción: {str(e)}")
+
+    async def transcribe_audio_bytes(
+        self,
+        audio_data: bytes,
+        filename: str,
+        request: TranscriptionRequest,
+        audio_info: AudioInfo,
+        timeout: Optional[float] = None
+    ) -> TranscriptionResponse:
+        """
+        Transcribir audio que ya está en memoria (p.ej. una ventana de audio largo)
+
+        Args:
+            audio_data: Contenido del archivo de audio (WAV, FLAC...)
+            filename: Nombre con extensión, Groq lo usa para detectar el formato
+            request: Parámetros de transcripción
+            audio_info: Información del audio, ya conocida por el llamador
+            timeout: Timeout de la llamada en segundos (GROQ_TIMEOUT_SECONDS por defecto)
+
+        Returns:
+            TranscriptionResponse: Respuesta con la transcripción
+        """
+        start_time = time.time()
+        transcription = await self._create_transcription((filename, audio_data), request, timeout)
+        processing_time = time.time() - start_time
+
+        return self._build_response(transcription, request, processing_time, audio_info)
+
+    async def _create_transcription(
+        self,
+        audio_file: Any,
+        request: TranscriptionRequest,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Llamada a Groq API sin bloquear el event loop, dentro del límite de concurrencia adaptativo
+
+        Cada llamada lógica da como mucho una señal de sobrecarga (429/5xx o timeout)
+        """
+        if isinstance(audio_file, tuple):
+            size_bytes = len(audio_file[1])
+        else:
+            size_bytes = os.fstat(audio_file.fileno()).st_size
+
+        async with groq_concurrency.call_slot(size_bytes):
+            try:
+                return await self.client.audio.transcriptions.create(
+                    file=audio_file,
+                    model="whisper-large-v3-turbo",  # Modelo más rápido y preciso
+                    language=request.language if request.language != "auto" else None,
+                    response_format="verbose_json" if request.return_timestamps else "json",
+                    temperature=request.temperature,
+                    timeout=timeout or self.request_timeout
+                )
+            except APITimeoutError:
+                groq_concurrency.record_overload("timeout en la llamada a Groq")
+                raise
+            except APIStatusError as e:
+                if e.status_code == 429 or e.status_code >= 500:
+                    groq_concurrency.record_overload(f"HTTP {e.status_code} de Groq")
+                raise
+
+    def _build_response(
+        self,
+        transcription: Any,
+        request: TranscriptionRequest,
+        processing_time: float,
+        audio_info: AudioInfo
+    ) -> TranscriptionResponse:
+        """Convertir la respuesta de Groq en TranscriptionResponse"""
+        segments = None
+
+        if request.return_timestamps and hasattr(transcription, 'segments'):
+            # Con timestamps
+            segments = []
+            for i, segment in enumerate(transcription.segments):
+                # Manejar tanto objetos como diccionarios
+                if isinstance(segment, dict):
+                    start = segment.get('start', 0.0)
+                    end = segment.get('end', 0.0)
+                    text = segment.get('text', '').strip()
+                else:
+                    start = getattr(segment, 'start', 0.0)
+                    end = getattr(segment, 'end', 0.0)
+                    text = getattr(segment, 'text', '').strip()
+
+                segments.append(TranscriptionSegment(
+                    id=i,
+                    start=start,
+                    end=end,
+                    text=text
+                ))
+
+        return TranscriptionResponse(
+            text=transcription.text.strip(),
+            segments=segments,
+            language=getattr(transcription, 'language', request.language),
+            processing_time=processing_time,
+            model_used="whisper-large-v3-turbo-groq",
+            audio_info=audio_info
+        )
     
     async def transcribe_with_progress(
         self,
@@ -220,35 +327,30 @@ class GroqTranscriptionService:
                 await progress_callback(-1.0, f"Error: {str(e)}")
             raise
     
-    async def get_audio_info(self, file_path: str) -> AudioInfo:
-        """Obtener información del archivo de audio"""
+    async def get_audio_info(
+        self,
+        file_path: str,
+        metadata: Optional[AudioMetadata] = None
+    ) -> AudioInfo:
+        """
+        Obtener información del archivo de audio
+
+        Usa los metadatos ya obtenidos en el pipeline si están disponibles;
+        si no, inspecciona el archivo una vez (cabecera WAV o ffprobe).
+        """
         try:
-            import ffmpeg
-            
-            # Obtener información usando ffprobe
-            probe = ffmpeg.probe(file_path)
-            audio_stream = next(
-                (stream for stream in probe['streams'] if stream['codec_type'] == 'audio'),
-                None
-            )
-            
-            if not audio_stream:
-                raise ValueError("No se encontró stream de audio en el archivo")
-            
-            duration = float(audio_stream.get('duration', 0))
-            sample_rate = int(audio_stream.get('sample_rate', 0))
-            channels = int(audio_stream.get('channels', 0))
+            if metadata is None:
+                metadata = await self.audio_processor.probe(file_path)
 
-            # Calcular tamaño del archivo en MB
-            file_size_bytes = os.path.getsize(file_path)
-            size_mb = file_size_bytes / (1024 * 1024)
+            if metadata is None:
+                raise ValueError("No se encontró stream de audio en el archivo")
 
             return AudioInfo(
-                duration=duration,
-                sample_rate=sample_rate,
-                channels=channels,
-                format=audio_stream.get('codec_name', 'unknown'),
-                size_mb=size_mb
+                duration=metadata.duration,
+                sample_rate=metadata.sample_rate,
+                channels=metadata.channels,
+                format=metadata.codec,
+                size_mb=metadata.size_bytes / (1024 * 1024)
             )
             
         except Exception as e:
@@ -0,0 +1,159 @@
+"""
+Pipeline de jobs por etapas
+Cada etapa tiene su propia cola y su propio límite de concurrencia, de modo que
+la decodificación de un job se solapa con la llamada a Groq de otro
+"""
+
+import time
+import asyncio
+import logging
+from typing import Optional, Callable, Awaitable, Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStage:
+    """
+    Etapa del pipeline: cola de entrada + N workers
+
+    `handler(item, worker_name)` procesa un elemento y devuelve True si debe
+    pasar a la etapa siguiente. El paso a la siguiente etapa espera si su cola
+    está llena (backpressure); ese tiempo cuenta como bloqueado, no como trabajo.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any, str], Awaitable[bool]],
+        concurrency: int,
+        queue_size: int = 0,
+        slot: Optional[Callable] = None
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Fuente alternativa a la cola (p. ej. la cola justa o el store compartido)
+        self.source: Optional[Callable[[], Awaitable[Any]]] = None
+        self.source_depth: Optional[Callable[[], int]] = None
+        # Hueco que se toma antes de sacar un elemento (límite adaptativo de concurrencia)
+        self.slot = slot
+        self.next_stage: Optional["PipelineStage"] = None
+
+        self.running = False
+        self.error_backoff = 1.0
+        self.tasks: List[asyncio.Task] = []
+
+        # Contabilidad
+        self.active = 0
+        self.blocked = 0
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    async def put(self, item: Any):
+        """Encolar un elemento (espera si la cola está llena)"""
+        await self.queue.put((item, time.monotonic()))
+
+    def start(self):
+        self.running = True
+        self.tasks = [
+            asyncio.create_task(self._run(f"{self.name}-{i}"))
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        self.running = False
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+
+    async def _run(self, worker_name: str):
+        while self.running:
+            try:
+                if self.slot is not None:
+                    async with self.slot():
+                        await self._process_next(worker_name)
+                else:
+                    await self._process_next(worker_name)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Error en la etapa {self.name} ({worker_name}): {e}")
+                # Pausa breve para no entrar en un bucle de errores si el fallo persiste
+                await asyncio.sleep(self.error_backoff)
+
+    async def _process_next(self, worker_name: str):
+        if self.source is not None:
+            item, enqueued_at = await self.source(), None
+        else:
+            item, enqueued_at = await self.queue.get()
+
+        if item is None:
+            return
+        if enqueued_at is not None:
+            self.wait_seconds += time.monotonic() - enqueued_at
+
+        self.active += 1
+        start_time = time.monotonic()
+        try:
+            forward = await self.handler(item, worker_name)
+        finally:
+            self.active -= 1
+            self.processed += 1
+            self.busy_seconds += time.monotonic() - start_time
+
+        if forward and self.next_stage is not None:
+            self.blocked += 1
+            try:
+                await self.next_stage.put(item)
+            finally:
+                self.blocked -= 1
+
+    def average_service_seconds(self) -> Optional[float]:
+        """Tiempo medio que un worker dedica a cada elemento"""
+        return self.busy_seconds / self.processed if self.processed else None
+
+    def queue_depth(self) -> int:
+        if self.source_depth is not None:
+            return self.source_depth()
+        return self.queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Profundidad de cola, ocupación y tiempos medios de la etapa"""
+        return {
+            "queue_depth": self.queue_depth(),
+            "queue_capacity": self.queue.maxsize or None,
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "blocked": self.blocked,
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_service_seconds": round(self.busy_seconds / self.processed, 3) if self.processed else None,
+            "avg_wait_seconds": round(self.wait_seconds / self.processed, 3) if self.processed and self.source is None else None
+        }
+
+
+def pipeline_stats(stages: List[PipelineStage]) -> Dict[str, Any]:
+    """
+    Estadísticas de todas las etapas y la etapa cuello de botella
+
+    El cuello de botella es la etapa más avanzada con todos sus workers
+    trabajando (las anteriores acaban bloqueadas esperándola); si ninguna está
+    saturada, la de mayor ocupación.
+    """
+    stats = {stage.name: stage.get_stats() for stage in stages}
+
+    bottleneck = None
+    saturated = [stage for stage in stages if stage.active >= stage.concurrency]
+    if saturated:
+        bottleneck = saturated[-1].name
+    else:
+        busiest = max(stages, key=lambda stage: stage.active / stage.concurrency)
+        if busiest.active:
+            bottleneck = busiest.name
+
+    return {"stages": stats, "bottleneck": bottleneck}
@@ -2,10 +2,18 @@
 Servicio de Job Queue para procesamiento en background
 """
 
+import os
+import gzip
+import shutil
+import time
+import socket
 import asyncio
+import tempfile
 import uuid
-from typing import Dict, Optional, Callable, Any
-from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Callable, Any, Awaitable, Tuple
+from datetime import datetime, timedelta
 import logging
 
 from models.transcription_models import (
@@ -15,36 +23,184 @@ from models.transcription_models import (
     TranscriptionResponse
 )
 from services.convex_client import get_convex_client
+from services.result_cache import transcription_cache
+from services.job_store import create_job_store
+from services.fair_scheduler import FairScheduler, DEFAULT_TENANT
+from services.concurrency_controller import groq_concurrency
+from services.transcoding_pool import transcoding_pool
+from services.job_pipeline import PipelineStage, pipeline_stats
+from services.eta_estimator import eta_estimator
+from services.retry_policy import job_retry_policies
+from services.cancellation import CancellationToken
+from services.progress_publisher import progress_publisher
+from services.event_bus import event_bus
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+QUEUE_MODES = ("local", "api", "worker")
+
+
+class InflightJobAvailable(Exception):
+    """El upload es la misma entrada que un job en curso; se usa para abortar el procesamiento"""
+
+    def __init__(self, cache_key: str, job_id: str):
+        super().__init__(cache_key)
+        self.cache_key = cache_key
+        self.job_id = job_id
+
 
 class JobQueueService:
-    """Servicio de cola de trabajos para transcripción en background"""
+    """
+    Servicio de cola de trabajos para transcripción en background
+
+    Modos (JOB_QUEUE_MODE):
+    - local: la API encola y procesa en el mismo proceso (por defecto)
+    - api: solo encola en el store compartido y sigue el progreso desde su feed de cambios
+    - worker: reclama jobs del store compartido con lease y heartbeat (worker.py)
+    """
     
     def __init__(self, max_concurrent_jobs: int = 3):
         self.jobs: Dict[str, TranscriptionJob] = {}
-        self.job_queue: asyncio.Queue = asyncio.Queue()
-        self.max_concurrent_jobs = max_concurrent_jobs
+        # Sub-colas por tenant con reparto justo (DRR ponderado) y prioridades
+        self.job_queue = FairScheduler()
+        # Workers de la etapa de transcripción: techo del límite adaptativo de
+        # concurrencia, que decide cuántos llaman a Groq a la vez (groq_concurrency.job_slot)
+        self.max_concurrent_jobs = int(os.getenv("JOB_MAX_CONCURRENT") or max(max_concurrent_jobs, groq_concurrency.max_limit))
         self.active_jobs: Dict[str, asyncio.Task] = {}
         self.progress_callbacks: Dict[str, Callable] = {}
         self.is_running = False
         self.worker_tasks: list = []
+        # Persistencia de jobs y resultados (sobrevive a reinicios)
+        self.store = create_job_store()
+        # Callback para jobs sin callback propio (p. ej. recuperados tras un reinicio)
+        self.default_progress_callback: Optional[Callable] = None
+
+        # Despliegue multi-proceso: API y workers comparten el store
+        self.mode = os.getenv("JOB_QUEUE_MODE", "local").lower()
+        if self.mode not in QUEUE_MODES:
+            logger.warning(f"⚠️ JOB_QUEUE_MODE no soportado: {self.mode}, se usa local")
+            self.mode = "local"
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = float(os.getenv("JOB_LEASE_SECONDS") or 60)
+        self.poll_interval = float(os.getenv("JOB_POLL_INTERVAL_SECONDS") or 1.0)
+        # Jobs cuyo lease se perdió (cancelados o reclamados por otro worker)
+        self._lost_leases: set = set()
+        self._heartbeats: Dict[str, asyncio.Task] = {}
+        # Último estado notificado de jobs de otros procesos que este no tiene en memoria
+        # (el mismo cambio puede llegar por el bus de eventos y por el feed del store)
+        self._remote_states: Dict[str, Tuple] = {}
+
+        # Pipeline por etapas: decodificar (CPU) → transcribir (red) → persistir/sincronizar
+        self.decode_stage = PipelineStage(
+            "decode",
+            self._decode_stage,
+            concurrency=int(os.getenv("PIPELINE_DECODE_CONCURRENCY") or transcoding_pool.max_workers)
+        )
+        self.transcribe_stage = PipelineStage(
+            "transcribe",
+            self._transcribe_stage,
+            concurrency=self.max_concurrent_jobs,
+            # Jobs decodificados esperando a Groq (acota el audio temporal en disco)
+            queue_size=int(os.getenv("PIPELINE_TRANSCRIBE_QUEUE") or transcoding_pool.max_workers),
+            slot=groq_concurrency.job_slot
+        )
+        self.persist_stage = PipelineStage(
+            "persist",
+            self._persist_stage,
+            concurrency=int(os.getenv("PIPELINE_PERSIST_CONCURRENCY") or 2)
+        )
+        self.decode_stage.next_stage = self.transcribe_stage
+        self.transcribe_stage.next_stage = self.persist_stage
+        self.stages = [self.decode_stage, self.transcribe_stage, self.persist_stage]
+        # Jobs dentro del pipeline y tenant de cada job sacado de la cola justa
+        self._pipeline_jobs: set = set()
+        self._job_tenants: Dict[str, str] = {}
+        # Etapa en la que está cada job del pipeline y desde cuándo (para el ETA)
+        self._job_stages: Dict[str, Tuple[str, float]] = {}
+        # Single-flight: job en curso por clave de contenido y jobs adjuntados a cada uno
+        self._inflight: Dict[str, str] = {}
+        self._followers: Dict[str, List[str]] = {}
+        self.coalesced_jobs = 0
+        # Relevos: job original cancelado -> job adjuntado que heredó su trabajo
+        # (el id antiguo puede seguir en la cola justa o entre etapas)
+        self._handovers: Dict[str, str] = {}
+        # Token de cancelación de cada job vivo: detiene su cola, su task y su reintento a la vez
+        self._cancel_tokens: Dict[str, CancellationToken] = {}
+        # Jobs esperando el backoff de un reintento (vuelven a la etapa de transcripción)
+        self._retry_timers: Dict[str, asyncio.Task] = {}
+        self.retried_jobs = 0
+        self.dead_lettered_jobs = 0
+        # Reenvío periódico del ETA a los jobs sin progreso reciente (p. ej. en cola)
+        self.eta_refresh_interval = float(os.getenv("ETA_REFRESH_SECONDS") or 10)
+
+        # Retención: TTL de jobs terminados, máximo en memoria y resultados grandes fuera de memoria
+        self.retention_seconds = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+        self.max_jobs_in_memory = int(os.getenv("JOB_MAX_IN_MEMORY", "500"))
+        self.spill_threshold_bytes = int(os.getenv("JOB_RESULT_SPILL_KB", "64")) * 1024
+        self.spill_dir = Path(os.getenv("JOB_SPILL_DIR", "./data/results"))
+        # Audio de los jobs (AudioProcessor lo escribe ahí): se borra cuando el job termina
+        self.audio_dir = Path(os.getenv("JOB_AUDIO_DIR", "./data/audio"))
+        self.sweep_interval = float(os.getenv("JOB_SWEEP_INTERVAL_SECONDS", "60"))
+        # job_id -> bytes del resultado en memoria / del archivo comprimido en disco
+        self._result_sizes: Dict[str, int] = {}
+        self._spill_sizes: Dict[str, int] = {}
+        self.evicted_jobs = 0
         
     async def start(self):
         """Iniciar el servicio de job queue"""
         if self.is_running:
             return
             
+        await self.store.initialize()
+        if self.mode != "local" and not self.store.supports_claims:
+            raise RuntimeError(f"JOB_QUEUE_MODE={self.mode} requiere un store compartido (JOB_STORE=sqlite o redis)")
+
         self.is_running = True
-        logger.info(f"🚀 Iniciando Job Queue Service con {self.max_concurrent_jobs} workers")
-        
-        # Crear workers
-        for i in range(self.max_concurrent_jobs):
-            worker_task = asyncio.create_task(self._worker(f"worker-{i}"))
-            self.worker_tasks.append(worker_task)
+        logger.info(f"🚀 Iniciando Job Queue Service en modo {self.mode} ({self.worker_id})")
+
+        # Los procesos que atienden WebSockets reciben el progreso de los jobs de otros procesos
+        if event_bus.distributed and self.mode != "worker":
+            event_bus.subscribe(self._on_bus_event)
+        await event_bus.start()
+
+        if self.mode == "local":
+            # Recuperar el trabajo que quedó sin terminar antes del último reinicio
+            await self._recover_unfinished_jobs()
+            self._reset_spill_dir()
+
+            # La etapa de decodificación saca jobs de la cola justa
+            self.decode_stage.source = self._next_queued_job
+            self.decode_stage.source_depth = self.job_queue.qsize
+            self._start_pipeline()
+
+        elif self.mode == "worker":
+            # Los jobs abandonados por un worker caído se reclaman al caducar su lease
+            self.decode_stage.source = self._claim_next_job
+            self._start_pipeline()
+            # Las cancelaciones de la API se ven en el feed del store, sin esperar al heartbeat
+            self.worker_tasks.append(asyncio.create_task(self._watch_cancellations()))
+
+        else:
+            # La API no procesa: sigue el progreso que los workers escriben en el store
+            self.worker_tasks.append(asyncio.create_task(self._watch_store()))
+
+        # Limpieza periódica de jobs caducados
+        self.worker_tasks.append(asyncio.create_task(self._sweeper()))
+        if self.mode != "api" and self.eta_refresh_interval > 0:
+            self.worker_tasks.append(asyncio.create_task(self._eta_refresher()))
             
         logger.info("✅ Job Queue Service iniciado")
+
+    def _start_pipeline(self):
+        for stage in self.stages:
+            stage.start()
+        logger.info(
+            "👷 Pipeline iniciado: " +
+            ", ".join(f"{stage.name}×{stage.concurrency}" for stage in self.stages)
+        )
     
     async def stop(self):
         """Detener el servicio de job queue"""
@@ -53,6 +209,14 @@ class JobQueueService:
             
         logger.info("🔄 Deteniendo Job Queue Service...")
         self.is_running = False
+
+        # Detener las etapas: el job en curso de cada worker vuelve a la cola
+        for timer in self._retry_timers.values():
+            timer.cancel()
+        self._retry_timers.clear()
+        for stage in self.stages:
+            await stage.stop()
+        await self._requeue_pipeline_jobs()
         
         # Cancelar workers
         for task in self.worker_tasks:
@@ -68,16 +232,43 @@ class JobQueueService:
             
         self.worker_tasks.clear()
         self.active_jobs.clear()
+
+        # Entregar los últimos estados pendientes antes de cerrar
+        await progress_publisher.drain()
+        await event_bus.close()
+        await self.store.close()
         
         logger.info("✅ Job Queue Service detenido")
     
+    async def _requeue_pipeline_jobs(self):
+        """Jobs que esperaban entre etapas al apagar: guardarlos para que se reanuden"""
+        for job_id in list(self._pipeline_jobs):
+            job = self.jobs.get(job_id)
+            if job is not None and job.status == JobStatus.PROCESSING:
+                job.status = JobStatus.QUEUED
+                job.message = "Interrumpido por reinicio, se reanudará"
+            if job is not None:
+                # Un job ya transcrito pero sin persistir se guarda completado
+                await self.store.save(job)
+            self._finish_job(job_id)
+
     async def submit_job(
         self,
         audio_file_path: str,
         request_params: TranscriptionRequest,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        cache_key: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        priority: int = 0
     ) -> str:
-        """Enviar un job a la cola"""
+        """Enviar un job a la sub-cola de su tenant"""
+
+        # La misma entrada (contenido + parámetros) ya en curso no se procesa dos veces
+        leader = self._inflight_leader(cache_key)
+        if leader is not None:
+            return await self._attach_follower(
+                leader, audio_file_path, request_params, progress_callback, tenant_id, priority
+            )
         
         job_id = str(uuid.uuid4())
         
@@ -87,6 +278,9 @@ class JobQueueService:
             status=JobStatus.PENDING,
             audio_file_path=audio_file_path,
             request_params=request_params,
+            cache_key=cache_key,
+            tenant_id=tenant_id or DEFAULT_TENANT,
+            priority=priority,
             created_at=datetime.now()
         )
         
@@ -94,40 +288,402 @@ class JobQueueService:
         self.jobs[job_id] = job
         if progress_callback:
             self.progress_callbacks[job_id] = progress_callback
+        if cache_key:
+            self._inflight[cache_key] = job_id
         
-        # Agregar a la cola
-        await self.job_queue.put(job_id)
-        
-        # Actualizar estado
+        # Actualizar estado (con store compartido, guardarlo ya lo pone al alcance de los workers)
         job.status = JobStatus.QUEUED
         job.message = "Job en cola"
+        await self.store.save(job)
+
+        # Agregar a la cola
+        if self.mode == "local":
+            self._enqueue(job)
         
         # Notificar progreso
         await self._notify_progress(job_id)
+        self._enforce_memory_cap()
         
-        logger.info(f"📋 Job enviado a cola: {job_id}")
+        logger.info(f"📋 Job enviado a cola: {job_id} (tenant {job.tenant_id}, prioridad {priority})")
+        return job_id
+    
+    async def list_dead_letters(self, limit: int = 100) -> List[TranscriptionJob]:
+        """Jobs fallidos definitivamente, los más recientes primero"""
+        jobs = {job.job_id: job for job in await self.store.list_dead_letters(limit)}
+        # Los de memoria tienen el estado más reciente (y son los únicos con JOB_STORE=memory)
+        for job in self.jobs.values():
+            if job.dead_lettered_at and job.status == JobStatus.FAILED:
+                jobs[job.job_id] = job
+            elif job.job_id in jobs:
+                del jobs[job.job_id]
+        return sorted(jobs.values(), key=lambda job: job.dead_lettered_at, reverse=True)[:limit]
+
+    async def requeue_job(self, job_id: str) -> Optional[TranscriptionJob]:
+        """
+        Volver a encolar un job de la dead-letter
+
+        Reutiliza el audio ya decodificado si sigue en disco (la etapa de
+        decodificación lo reconoce y no vuelve a pasar por FFmpeg).
+
+        Returns:
+            Optional[TranscriptionJob]: El job re-encolado, o None si no existe
+
+        Raises:
+            ValueError: Si el job no está en la dead-letter o su audio ya no existe
+        """
+        job = await self._get_job(job_id)
+        if job is None:
+            return None
+        if job.status != JobStatus.FAILED or job.dead_lettered_at is None:
+            raise ValueError(f"El job no está en la dead-letter (estado {job.status.value})")
+
+        if os.path.exists(job.request_params.audio_file_path):
+            job.audio_file_path = job.request_params.audio_file_path
+        elif os.path.exists(job.audio_file_path):
+            job.request_params.audio_file_path = job.audio_file_path
+        else:
+            raise ValueError("El audio del job ya no está disponible, hay que volver a subirlo")
+
+        job.status = JobStatus.QUEUED
+        job.progress = 0.0
+        job.message = "Job re-encolado desde la dead-letter"
+        job.error = None
+        job.result = None
+        job.retries = 0
+        job.dead_lettered_at = None
+        job.started_at = None
+        job.completed_at = None
+        await self.store.save(job)
+
+        if self.mode == "local":
+            self._enqueue(job)
+        if job.cache_key and self._inflight_leader(job.cache_key) is None:
+            self._inflight[job.cache_key] = job_id
+
+        await self._notify_progress(job_id)
+        logger.info(f"♻️ Job re-encolado desde la dead-letter: {job_id}")
+        return job
+
+    def _inflight_leader(self, cache_key: Optional[str]) -> Optional[TranscriptionJob]:
+        """Job sin terminar de este proceso con la misma clave de contenido"""
+        if not cache_key:
+            return None
+        leader = self.jobs.get(self._inflight.get(cache_key))
+        if leader is None or leader.status in TERMINAL_STATUSES:
+            self._inflight.pop(cache_key, None)
+            return None
+        return leader
+
+    def inflight_job_id(self, cache_key: Optional[str]) -> Optional[str]:
+        """Job en curso con la misma clave de contenido (un upload repetido no se decodifica)"""
+        leader = self._inflight_leader(cache_key)
+        return leader.job_id if leader else None
+
+    async def attach_to_job(
+        self,
+        leader_id: str,
+        request_params: TranscriptionRequest,
+        progress_callback: Optional[Callable] = None,
+        tenant_id: Optional[str] = None,
+        priority: int = 0
+    ) -> Optional[str]:
+        """
+        Adjuntar a un job en curso un upload repetido que no se ha decodificado
+
+        Si el job original terminó mientras se recibía el upload, el nuevo job
+        nace completado con su resultado.
+
+        Returns:
+            Optional[str]: job_id del nuevo job, o None si el original ya no
+            está o terminó sin resultado (el upload hay que procesarlo)
+        """
+        leader = self.jobs.get(leader_id)
+        if leader is None:
+            return None
+
+        if leader.status not in TERMINAL_STATUSES:
+            return await self._attach_follower(
+                leader, request_params.audio_file_path, request_params, progress_callback, tenant_id, priority
+            )
+
+        result = None
+        if leader.status == JobStatus.COMPLETED:
+            result = leader.result or await self._load_result(leader_id)
+        if result is None:
+            return None
+        return await self.submit_cached_result(request_params, result, progress_callback)
+
+    async def _attach_follower(
+        self,
+        leader: TranscriptionJob,
+        audio_file_path: str,
+        request_params: TranscriptionRequest,
+        progress_callback: Optional[Callable],
+        tenant_id: Optional[str],
+        priority: int
+    ) -> str:
+        """
+        Registrar un job que sigue a otro en curso con la misma entrada
+
+        El seguidor tiene su propio job_id y callback, pero no pasa por la cola:
+        recibe el progreso y el resultado del job original. Solo se guarda en el
+        store al terminar, para que ningún worker lo reclame como trabajo.
+        """
+        job_id = str(uuid.uuid4())
+        job = TranscriptionJob(
+            job_id=job_id,
+            status=leader.status,
+            progress=leader.progress,
+            message=leader.message,
+            audio_file_path=audio_file_path,
+            request_params=request_params,
+            cache_key=leader.cache_key,
+            tenant_id=tenant_id or DEFAULT_TENANT,
+            priority=priority,
+            coalesced_with=leader.job_id,
+            created_at=datetime.now(),
+            started_at=leader.started_at,
+            estimated_time_remaining=leader.estimated_time_remaining
+        )
+
+        self.jobs[job_id] = job
+        if progress_callback:
+            self.progress_callbacks[job_id] = progress_callback
+        self._followers.setdefault(leader.job_id, []).append(job_id)
+        self.coalesced_jobs += 1
+
+        await self._dispatch_progress(job)
+
+        logger.info(f"🔗 Job {job_id} adjuntado al job en curso {leader.job_id} (misma entrada)")
+        return job_id
+
+    async def _mirror_to_followers(self, leader: TranscriptionJob):
+        """Copiar el estado del job original a los jobs adjuntados"""
+        terminal = leader.status in TERMINAL_STATUSES
+        if terminal and leader.cache_key and self._inflight.get(leader.cache_key) == leader.job_id:
+            del self._inflight[leader.cache_key]
+
+        if leader.status == JobStatus.CANCELLED:
+            # La cancelación es del cliente del original, no de los adjuntados:
+            # el primero vuelve a procesar la entrada para todos
+            await self._promote_follower(leader, handover=False)
+            return
+
+        follower_ids = self._followers.pop(leader.job_id, []) if terminal else self._followers.get(leader.job_id, [])
+        for follower_id in list(follower_ids):
+            follower = self.jobs.get(follower_id)
+            if follower is None or follower.status in TERMINAL_STATUSES:
+                continue
+
+            follower.status = leader.status
+            follower.progress = leader.progress
+            follower.message = leader.message
+            follower.started_at = leader.started_at
+            follower.completed_at = leader.completed_at
+            follower.error = leader.error
+            follower.result = leader.result
+            follower.estimated_time_remaining = leader.estimated_time_remaining
+
+            if terminal:
+                await self.store.save(follower)
+                self._discard_job_audio(follower)
+            await self._dispatch_progress(follower)
+            if terminal:
+                await self._release_result(follower)
+
+    async def _promote_follower(self, leader: TranscriptionJob, handover: bool) -> Optional[str]:
+        """
+        Relevo del single-flight: el primer job adjuntado vivo pasa a ser el original
+
+        Con `handover` (modo local, el trabajo del original sigue en este proceso)
+        el adjuntado hereda ese trabajo tal cual está: el registro que recorre el
+        pipeline pasa a ser el suyo, sus entradas cambian de clave y el original
+        se queda con una copia que se cancela. Sin él (el trabajo ya se detuvo o
+        lo tiene un worker) el adjuntado se encola como un job nuevo con una
+        copia del audio del original.
+
+        Returns:
+            Optional[str]: job_id del nuevo original, o None si no quedan adjuntados vivos
+        """
+        leader_id = leader.job_id
+        follower_ids = [
+            follower_id for follower_id in self._followers.pop(leader_id, [])
+            if follower_id in self.jobs and self.jobs[follower_id].status not in TERMINAL_STATUSES
+        ]
+        if not follower_ids:
+            return None
+
+        heir_id, rest = follower_ids[0], follower_ids[1:]
+        heir = self.jobs[heir_id]
+
+        if handover:
+            # El original conserva un registro propio para su cancelación
+            self.jobs[leader_id] = leader.model_copy(deep=True)
+            run = leader
+            run.job_id = heir_id
+            run.tenant_id = heir.tenant_id
+            run.priority = heir.priority
+            run.created_at = heir.created_at
+            self.jobs[heir_id] = run
+
+            for registry in (self.active_jobs, self._cancel_tokens, self._job_stages, self._job_tenants, self._retry_timers):
+                if leader_id in registry:
+                    registry[heir_id] = registry.pop(leader_id)
+            if leader_id in self._pipeline_jobs:
+                self._pipeline_jobs.discard(leader_id)
+                self._pipeline_jobs.add(heir_id)
+            for old_id, new_id in list(self._handovers.items()):
+                if new_id == leader_id:
+                    self._handovers[old_id] = heir_id
+            self._handovers[leader_id] = heir_id
+            # El upload propio del adjuntado ya no hace falta
+            self._discard_job_audio(heir)
+        else:
+            run = heir
+            run.coalesced_with = None
+            if not os.path.exists(run.audio_file_path):
+                # Adjuntado sin audio propio (no llegó a decodificarse): copia del original
+                run.request_params = leader.request_params.model_copy(deep=True)
+                run.audio_file_path = self._clone_audio(leader.audio_file_path, heir_id)
+            run.request_params.audio_file_path = run.audio_file_path
+            run.status = JobStatus.QUEUED
+            run.progress = 0.0
+            run.message = "Job en cola (relevo del job cancelado)"
+            run.started_at = None
+            run.estimated_time_remaining = None
+
+        for follower_id in rest:
+            self.jobs[follower_id].coalesced_with = heir_id
+        if rest:
+            self._followers[heir_id] = rest
+        if leader.cache_key:
+            self._inflight[leader.cache_key] = heir_id
+
+        await self.store.save(run)
+        if not handover and self.mode == "local":
+            self._enqueue(run)
+        await self._notify_progress(heir_id)
+
+        logger.info(f"👑 Job {heir_id} toma el relevo del job cancelado {leader_id} ({len(rest)} adjuntados)")
+        return heir_id
+
+    def _clone_audio(self, path: str, job_id: str) -> str:
+        """Copia propia del audio de otro job (enlace duro si se puede): sobrevive a que el otro lo borre"""
+        source = Path(path)
+        target = source.with_name(f"{job_id}{source.suffix}")
+        try:
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo copiar el audio {path} para el job {job_id}: {e}")
+            return path
+        return str(target)
+
+    def _run_id(self, job_id: str) -> str:
+        """Job que lleva ahora el trabajo encolado con `job_id` (tras un relevo)"""
+        return self._handovers.get(job_id, job_id)
+
+    async def submit_cached_result(
+        self,
+        request_params: TranscriptionRequest,
+        result: TranscriptionResponse,
+        progress_callback: Optional[Callable] = None
+    ) -> str:
+        """Registrar un job ya completado con un resultado de la caché"""
+        job_id = str(uuid.uuid4())
+        now = datetime.now()
+
+        job = TranscriptionJob(
+            job_id=job_id,
+            status=JobStatus.COMPLETED,
+            progress=100.0,
+            message="Transcripción completada (caché)",
+            audio_file_path=request_params.audio_file_path,
+            request_params=request_params,
+            result=result,
+            created_at=now,
+            started_at=now,
+            completed_at=now
+        )
+
+        self.jobs[job_id] = job
+        if progress_callback:
+            self.progress_callbacks[job_id] = progress_callback
+
+        await self.store.save(job)
+        await self._notify_progress(job_id)
+        await self._sync_job_with_convex(job)
+        await self._release_result(job)
+        self._enforce_memory_cap()
+
+        logger.info(f"♻️ Job resuelto desde caché: {job_id}")
         return job_id
     
     async def get_job_status(self, job_id: str) -> Optional[TranscriptionJob]:
-        """Obtener estado de un job"""
-        return self.jobs.get(job_id)
+        """
+        Obtener estado de un job (en memoria o, tras un reinicio o expulsión, desde el store)
+
+        Si el resultado está fuera de memoria se carga para esta respuesta sin
+        volver a retenerlo en la tabla.
+        """
+        job = await self._get_job(job_id)
+        if job is None:
+            return None
+
+        if job.result is None and job.status == JobStatus.COMPLETED:
+            result = await self._load_result(job_id)
+            if result is not None:
+                return job.model_copy(update={"result": result})
+
+        return job
+
+    async def _get_job(self, job_id: str) -> Optional[TranscriptionJob]:
+        """Registro del job en la tabla en memoria, recargándolo del store si hace falta"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = await self.store.get(job_id)
+            if job is not None:
+                self.jobs[job_id] = job
+                self._enforce_memory_cap()
+        return job
     
     async def cancel_job(self, job_id: str) -> bool:
         """Cancelar un job"""
-        job = self.jobs.get(job_id)
-        if not job:
+        job = await self._get_job(job_id)
+        if not job or job.status in TERMINAL_STATUSES:
+            # Un job terminado no se cancela: conserva su estado y su resultado
             return False
-            
-        # Si está activo, cancelar task
-        if job_id in self.active_jobs:
-            self.active_jobs[job_id].cancel()
-            del self.active_jobs[job_id]
-            
-        # Actualizar estado
+
+        handed_over = False
+        if job.coalesced_with:
+            # Un job adjuntado solo se desengancha: el original sigue para los demás
+            followers = self._followers.get(job.coalesced_with, [])
+            if job_id in followers:
+                followers.remove(job_id)
+        elif self._followers.get(job_id):
+            # Los adjuntados no se cancelan con el original: el primero hereda su
+            # trabajo en curso (en modo local) o lo vuelve a encolar
+            handover = self.mode == "local"
+            handed_over = await self._promote_follower(job, handover) is not None and handover
+            job = self.jobs[job_id]
+
+        # Actualizar estado antes de cortar: las etapas lo ven y no lo retoman
         job.status = JobStatus.CANCELLED
         job.message = "Job cancelado"
         job.completed_at = datetime.now()
+
+        # El token lo saca de su sub-cola, cancela el task en curso (FFmpeg se
+        # mata y la subida a Groq se aborta) o el temporizador de su reintento
+        running = job_id in self.active_jobs
+        if not handed_over:
+            self._cancel_token(job_id).cancel()
+        if not running and not handed_over:
+            # En cola, entre etapas o esperando un reintento: liberar ya su cupo y su audio
+            self._finish_job(job_id)
         
+        await self.store.save(job)
         await self._notify_progress(job_id)
         
         logger.info(f"❌ Job cancelado: {job_id}")
@@ -135,131 +691,724 @@ class JobQueueService:
     
     async def get_queue_info(self) -> Dict[str, Any]:
         """Obtener información de la cola"""
+        if self.mode == "local":
+            queue_size = self.job_queue.qsize()
+            active_jobs = len(self.active_jobs)
+        else:
+            # La cola vive en el store compartido: contar allí
+            counts = await self.store.count_by_status()
+            queue_size = counts.get(JobStatus.QUEUED.value, 0)
+            active_jobs = counts.get(JobStatus.PROCESSING.value, 0)
+
         return {
-            "queue_size": self.job_queue.qsize(),
-            "active_jobs": len(self.active_jobs),
+            "mode": self.mode,
+            "worker_id": self.worker_id,
+            "queue_size": queue_size,
+            "active_jobs": active_jobs,
             "total_jobs": len(self.jobs),
             "max_concurrent_jobs": self.max_concurrent_jobs,
-            "is_running": self.is_running
+            "is_running": self.is_running,
+            "scheduler": self.job_queue.get_stats(),
+            "concurrency": groq_concurrency.get_stats(),
+            "retries": {
+                **job_retry_policies.get_stats(),
+                "waiting": len(self._retry_timers),
+                "retried_jobs": self.retried_jobs,
+                "dead_lettered_jobs": self.dead_lettered_jobs
+            },
+            "single_flight": {"in_flight": len(self._inflight), "coalesced_jobs": self.coalesced_jobs},
+            "pipeline": pipeline_stats(self.stages) if self.mode != "api" else None,
+            "eta": eta_estimator.get_stats(),
+            "progress": progress_publisher.get_stats(),
+            "event_bus": event_bus.get_stats(),
+            "store": type(self.store).__name__,
+            "memory": self._memory_stats()
         }
-    
-    async def _worker(self, worker_name: str):
-        """Worker que procesa jobs de la cola"""
-        logger.info(f"👷 Worker {worker_name} iniciado")
-        
+
+    def _memory_stats(self) -> Dict[str, Any]:
+        """Estadísticas de memoria de la tabla de jobs"""
+        return {
+            "jobs_in_memory": len(self.jobs),
+            "max_jobs_in_memory": self.max_jobs_in_memory,
+            "results_in_memory": sum(1 for job in self.jobs.values() if job.result is not None),
+            "results_in_memory_mb": round(sum(self._result_sizes.values()) / (1024 * 1024), 2),
+            "spilled_results": sum(
+                1 for job in self.jobs.values()
+                if job.result is None and job.status == JobStatus.COMPLETED
+            ),
+            "spill_disk_mb": round(sum(self._spill_sizes.values()) / (1024 * 1024), 2),
+            "evicted_jobs": self.evicted_jobs,
+            "retention_seconds": self.retention_seconds
+        }
+
+    async def _release_result(self, job: TranscriptionJob):
+        """
+        Sacar de memoria el resultado de un job terminado si es grande
+
+        Con un store persistente el resultado ya está guardado; si no, se
+        escribe comprimido en `spill_dir`. En ambos casos se carga bajo demanda.
+        """
+        if job.result is None:
+            return
+
+        payload = job.result.model_dump_json()
+        if len(payload) < self.spill_threshold_bytes:
+            self._result_sizes[job.job_id] = len(payload)
+            return
+
+        if not self.store.persists_results:
+            size = await asyncio.get_event_loop().run_in_executor(
+                None, self._write_spill, job.job_id, payload
+            )
+            if size is None:
+                self._result_sizes[job.job_id] = len(payload)
+                return
+            self._spill_sizes[job.job_id] = size
+
+        job.result = None
+        self._result_sizes.pop(job.job_id, None)
+
+    async def _load_result(self, job_id: str) -> Optional[TranscriptionResponse]:
+        """Cargar un resultado que está fuera de memoria"""
+        if job_id in self._spill_sizes:
+            payload = await asyncio.get_event_loop().run_in_executor(None, self._read_spill, job_id)
+            return TranscriptionResponse.model_validate_json(payload) if payload else None
+
+        return await self.store.load_result(job_id)
+
+    def _spill_path(self, job_id: str) -> Path:
+        return self.spill_dir / f"{job_id}.json.gz"
+
+    def _write_spill(self, job_id: str, payload: str) -> Optional[int]:
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self._spill_path(job_id)
+            with gzip.open(path, "wt", encoding="utf-8") as spill_file:
+                spill_file.write(payload)
+            return path.stat().st_size
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo volcar el resultado del job {job_id} a disco: {e}")
+            return None
+
+    def _read_spill(self, job_id: str) -> Optional[str]:
+        try:
+            with gzip.open(self._spill_path(job_id), "rt", encoding="utf-8") as spill_file:
+                return spill_file.read()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el resultado volcado del job {job_id}: {e}")
+            return None
+
+    def _reset_spill_dir(self):
+        """Sin store persistente, los volcados de una ejecución anterior no pertenecen a ningún job"""
+        if self.store.persists_results or not self.spill_dir.exists():
+            return
+        for path in self.spill_dir.glob("*.json.gz"):
+            path.unlink(missing_ok=True)
+
+    def _evict(self, job_id: str):
+        """Quitar un job terminado de la memoria"""
+        self.jobs.pop(job_id, None)
+        self.progress_callbacks.pop(job_id, None)
+        self._result_sizes.pop(job_id, None)
+        if self._spill_sizes.pop(job_id, None) is not None:
+            self._spill_path(job_id).unlink(missing_ok=True)
+        self.evicted_jobs += 1
+
+    def _enforce_memory_cap(self):
+        """Expulsar los jobs terminados más antiguos si la tabla supera el máximo"""
+        excess = len(self.jobs) - self.max_jobs_in_memory
+        if excess <= 0:
+            return
+
+        finished = sorted(
+            (job for job in self.jobs.values()
+             if job.status in TERMINAL_STATUSES and job.job_id not in self.active_jobs
+             and job.job_id not in self._pipeline_jobs),
+            key=lambda job: job.completed_at or job.created_at
+        )
+        for job in finished[:excess]:
+            self._evict(job.job_id)
+
+    async def _purge_expired(self):
+        """Eliminar los jobs terminados hace más de `retention_seconds` (memoria y store)"""
+        cutoff = datetime.now() - timedelta(seconds=self.retention_seconds)
+
+        expired = [
+            job.job_id for job in self.jobs.values()
+            if job.status in TERMINAL_STATUSES and (job.completed_at or job.created_at) < cutoff
+        ]
+        for job_id in expired:
+            self._discard_job_audio(self.jobs[job_id])
+            self._evict(job_id)
+
+        purged = await self.store.purge_finished_before(cutoff)
+        if expired or purged:
+            logger.info(f"🧹 Jobs caducados eliminados: {len(expired)} en memoria, {purged} en el store")
+
+    async def _sweeper(self):
+        """Tarea periódica de retención"""
         while self.is_running:
             try:
-                # Esperar por un job (con timeout para poder salir)
-                job_id = await asyncio.wait_for(
-                    self.job_queue.get(),
-                    timeout=1.0
-                )
-                
-                # Procesar job
-                await self._process_job(job_id, worker_name)
-                
-            except asyncio.TimeoutError:
-                # Timeout normal, continuar
-                continue
+                await asyncio.sleep(self.sweep_interval)
+                await self._purge_expired()
+                self._enforce_memory_cap()
             except asyncio.CancelledError:
-                # Worker cancelado
                 break
             except Exception as e:
-                logger.error(f"❌ Error en worker {worker_name}: {e}")
-                
-        logger.info(f"👷 Worker {worker_name} detenido")
+                logger.error(f"❌ Error limpiando jobs caducados: {e}")
+
+    async def _eta_refresher(self):
+        """Reenviar el ETA de los jobs vivos cuando cambia de forma apreciable"""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.eta_refresh_interval)
+                for job in list(self.jobs.values()):
+                    if job.status not in (JobStatus.QUEUED, JobStatus.PROCESSING) or job.coalesced_with:
+                        continue
+                    previous = job.estimated_time_remaining
+                    estimate = self._estimate_remaining(job)
+                    if previous is None or abs(estimate - previous) > max(2.0, previous * 0.1):
+                        await self._notify_progress(job.job_id)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Error actualizando ETAs: {e}")
+
+    def _estimate_remaining(self, job: TranscriptionJob) -> Optional[float]:
+        """
+        Segundos restantes del job según el throughput aprendido por etapa
+
+        Suma el trabajo por delante en la cola justa (modo local), la etapa en
+        curso descontando lo transcurrido, la espera en la cola de transcripción
+        y las etapas que faltan.
+        """
+        if job.status in TERMINAL_STATUSES:
+            return 0.0 if job.status == JobStatus.COMPLETED else None
+
+        audio_seconds = eta_estimator.audio_seconds(job)
+        transcribe_parallel = min(self.transcribe_stage.concurrency, groq_concurrency.current_limit)
+        stage, entered_at = self._job_stages.get(job.job_id, (None, 0.0))
+        elapsed = time.monotonic() - entered_at
+        remaining = 0.0
+
+        if stage is None:
+            # En cola: el trabajo por delante (su propio audio incluido) limitado por la etapa más lenta
+            ahead = self.job_queue.work_ahead(job.job_id) if self.mode == "local" else None
+            if ahead is not None:
+                parallelism = {"decode": self.decode_stage.concurrency, "transcribe": transcribe_parallel}
+                remaining += max(eta_estimator.backlog_seconds(ahead - audio_seconds, parallelism), 0.0)
+            stage, elapsed = "decode", 0.0
+
+        if stage == "retry":
+            # Esperando el backoff de un reintento (entered_at = momento de volver a transcribir)
+            remaining += max(-elapsed, 0.0)
+            stage = "decoded"
+
+        if stage == "decode":
+            remaining += eta_estimator.stage_remaining("decode", audio_seconds, elapsed)
+
+        if stage in ("decode", "decoded"):
+            # Jobs ya decodificados esperando un worker de transcripción
+            service = self.transcribe_stage.average_service_seconds()
+            if service:
+                remaining += self.transcribe_stage.queue_depth() * service / transcribe_parallel
+            remaining += eta_estimator.stage_seconds("transcribe", audio_seconds)
+
+        elif stage == "transcribe":
+            # El progreso de la transcripción se mapea a 20-90%
+            fraction = (job.progress - 20.0) / 70.0
+            remaining += eta_estimator.stage_remaining("transcribe", audio_seconds, elapsed, fraction)
+
+        return round(remaining, 1)
+
+    async def _recover_unfinished_jobs(self):
+        """Volver a encolar los jobs pendientes o interrumpidos en el último apagado"""
+        recovered = await self.store.load_unfinished()
+        requeued = 0
+
+        for job in recovered:
+            if job.job_id in self.jobs:
+                continue
+
+            self.jobs[job.job_id] = job
+
+            if not os.path.exists(job.audio_file_path):
+                job.status = JobStatus.FAILED
+                job.error = "El audio del job no sobrevivió al reinicio"
+                job.message = f"Error: {job.error}"
+                job.completed_at = datetime.now()
+                await self.store.save(job)
+                continue
+
+            # Un job interrumpido empieza de cero con su audio original
+            job.request_params.audio_file_path = job.audio_file_path
+            job.status = JobStatus.QUEUED
+            job.progress = 0.0
+            job.message = "Job en cola (recuperado tras reinicio)"
+            job.started_at = None
+            await self.store.save(job)
+            self._enqueue(job)
+            if job.cache_key:
+                self._inflight[job.cache_key] = job.job_id
+            requeued += 1
+
+        if recovered:
+            logger.info(f"♻️ Jobs recuperados tras reinicio: {requeued} re-encolados, {len(recovered) - requeued} fallidos")
     
-    async def _process_job(self, job_id: str, worker_name: str):
-        """Procesar un job específico"""
+    def _enqueue(self, job: TranscriptionJob):
+        """Encolar un job con su tenant, prioridad y coste (segundos de audio)"""
+        metadata = job.request_params.audio_metadata
+        self.job_queue.put_nowait(
+            job.job_id,
+            tenant_id=job.tenant_id,
+            priority=job.priority,
+            cost_seconds=metadata.duration if metadata else None
+        )
+        job_id = job.job_id
+        self._cancel_token(job_id).add_callback(lambda: self.job_queue.remove(job_id))
+
+    def _cancel_token(self, job_id: str) -> CancellationToken:
+        token = self._cancel_tokens.get(job_id)
+        if token is None:
+            token = self._cancel_tokens[job_id] = CancellationToken()
+        return token
+
+    def _discard_job_audio(self, job: TranscriptionJob):
+        """Borrar el audio de un job que ya no lo necesita (si ningún otro job vivo lo usa)"""
+        paths = {job.audio_file_path, job.request_params.audio_file_path}
+        in_use = {
+            path for other in self.jobs.values()
+            if other.job_id != job.job_id and other.status not in TERMINAL_STATUSES
+            for path in (other.audio_file_path, other.request_params.audio_file_path)
+        }
+        owned_dirs = [os.path.realpath(self.audio_dir), os.path.realpath(tempfile.gettempdir())]
+        for path in paths - in_use:
+            # Solo audio propio (uploads y audio decodificado), nunca rutas de usuario
+            if not path or not os.path.exists(path):
+                continue
+            real_path = os.path.realpath(path)
+            if any(real_path.startswith(directory + os.sep) for directory in owned_dirs):
+                try:
+                    os.unlink(path)
+                    logger.debug(f"🗑️ Audio del job {job.job_id} eliminado: {path}")
+                except OSError as e:
+                    logger.warning(f"⚠️ No se pudo eliminar el audio {path}: {e}")
+
+    async def _next_queued_job(self) -> str:
+        """Fuente de la etapa de decodificación en modo local: la cola justa"""
+        job_id, tenant_id = await self.job_queue.get()
+        self._job_tenants[self._run_id(job_id)] = tenant_id
+        return job_id
+
+    async def _claim_next_job(self) -> Optional[str]:
+        """Fuente de la etapa de decodificación en modo worker: reclamar del store compartido"""
+        job = await self.store.claim(self.worker_id, self.lease_seconds)
+        if job is None:
+            await asyncio.sleep(self.poll_interval)
+            return None
+
+        self.jobs[job.job_id] = job
+        # El lease se renueva mientras el job recorre todas las etapas
+        self._heartbeats[job.job_id] = asyncio.create_task(self._heartbeat(job.job_id))
+        return job.job_id
+
+    async def _heartbeat(self, job_id: str):
+        """Renovar el lease de un job mientras se procesa; si se pierde, abandonar el job"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self.store.heartbeat(job_id, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo renovar el lease del job {job_id}: {e}")
+                continue
+
+            if not renewed:
+                logger.warning(f"⚠️ Lease perdido para el job {job_id} (cancelado o reclamado por otro worker)")
+                self._lost_leases.add(job_id)
+                task = self.active_jobs.get(job_id)
+                if task:
+                    task.cancel()
+                return
+
+    async def _watch_store(self):
+        """Modo API: seguir el feed de cambios del store y notificar el progreso de los workers"""
+        cursor = None
+        while self.is_running:
+            try:
+                jobs, cursor = await self.store.list_updated_since(cursor)
+                for job in jobs:
+                    await self._apply_remote_update(job)
+                if not jobs:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Error leyendo cambios del store: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _watch_cancellations(self):
+        """Modo worker: cortar los jobs propios que la API cancela"""
+        cursor = None
+        while self.is_running:
+            try:
+                jobs, cursor = await self.store.list_updated_since(cursor)
+                for job in jobs:
+                    local = self.jobs.get(job.job_id)
+                    if job.status != JobStatus.CANCELLED or local is None or local.status in TERMINAL_STATUSES:
+                        continue
+
+                    logger.info(f"❌ Job cancelado desde la API: {job.job_id}")
+                    # El estado ya está en el store: este worker solo libera lo que tiene en curso
+                    self._lost_leases.add(job.job_id)
+                    local.status = JobStatus.CANCELLED
+                    running = job.job_id in self.active_jobs
+                    self._cancel_token(job.job_id).cancel()
+                    if not running:
+                        self._finish_job(job.job_id)
+                if not jobs:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Error leyendo cancelaciones del store: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _on_bus_event(self, event: Dict[str, Any]):
+        """Evento de otro proceso: reflejar el cambio y notificar a los WebSockets de este"""
+        if event.get("type") == "job":
+            await self._apply_remote_update(TranscriptionJob.model_validate(event["job"]))
+
+    async def _apply_remote_update(self, job: TranscriptionJob):
+        """Reflejar en este proceso un cambio de estado escrito por un worker"""
+        local = self.jobs.get(job.job_id)
+        state = (job.status, job.progress, job.message, job.estimated_time_remaining)
+        if local is not None and (
+            (local.status, local.progress, local.message, local.estimated_time_remaining) == state
+        ):
+            # Escritura propia de este proceso, o ya recibida por el bus: ya se notificó
+            return
+        known = local is not None
+
+        # El bus entrega el estado final antes de que el feed del store devuelva la
+        # última fila de progreso (o el guardado final de la etapa de persistencia):
+        # tras un estado final solo se acepta un re-encolado desde la dead-letter
+        previous = local.status if known else self._remote_states.get(job.job_id, (None,))[0]
+        if previous in TERMINAL_STATUSES:
+            requeued = job.status == JobStatus.QUEUED and job.started_at is None
+            if job.status == previous or (job.status not in TERMINAL_STATUSES and not requeued):
+                return
+
+        if not known:
+            if self._remote_states.get(job.job_id) == state:
+                return
+            self._remote_states.pop(job.job_id, None)
+            self._remote_states[job.job_id] = state
+            while len(self._remote_states) > self.max_jobs_in_memory:
+                del self._remote_states[next(iter(self._remote_states))]
+
+        if job.status == JobStatus.COMPLETED:
+            # El resultado va en la notificación final y alimenta la caché local
+            # (los eventos del bus ya lo traen; el feed del store no)
+            if job.result is None:
+                job.result = await self.store.load_result(job.job_id)
+            if job.result is not None:
+                await transcription_cache.put(job.cache_key, job.result)
+
+        if known:
+            self.jobs[job.job_id] = job
+
+        await self._dispatch_progress(job, remote=True)
+
+        if known and job.status in TERMINAL_STATUSES:
+            await self._release_result(job)
+            self._enforce_memory_cap()
+
+    def _pending_job(self, job_id: str) -> Optional[TranscriptionJob]:
+        """Job que sigue vivo al llegar a una etapa (no cancelado ni con el lease perdido)"""
+        job_id = self._run_id(job_id)
         job = self.jobs.get(job_id)
-        if not job:
+        if job is None:
             logger.error(f"❌ Job no encontrado: {job_id}")
-            return
-            
+        elif job.status == JobStatus.CANCELLED or job_id in self._lost_leases:
+            job = None
+        elif job_id in self._cancel_tokens and self._cancel_tokens[job_id].cancelled:
+            job = None
+
+        if job is None:
+            self._finish_job(job_id)
+        return job
+
+    async def _decode_stage(self, job_id: str, worker_name: str) -> bool:
+        """Etapa 1 (CPU): decodificar el audio en el pool de FFmpeg"""
+        job = self._pending_job(job_id)
+        if job is None:
+            return False
+
+        job_id = job.job_id
+        logger.info(f"🔄 Procesando job {job_id} en {worker_name}")
+        self._pipeline_jobs.add(job_id)
+        self._job_stages[job_id] = ("decode", time.monotonic())
+        metadata = job.request_params.audio_metadata
+        input_size = metadata.size_bytes if metadata else None
+
+        # Actualizar estado
+        job.status = JobStatus.PROCESSING
+        job.message = "Procesando audio..."
+        job.started_at = datetime.now()
+        job.progress = 0.0
+
+        await self.store.save(job)
+        await self._notify_progress(job.job_id)
+
+        succeeded, _ = await self._run_step(job, self._decode_audio(job))
+        if succeeded:
+            # Tras un relevo del single-flight el trabajo sigue con el id del heredero
+            job_id = job.job_id
+            audio_seconds = job.request_params.audio_metadata.duration
+            eta_estimator.record("decode", audio_seconds, time.monotonic() - self._job_stages[job_id][1])
+            eta_estimator.record_size(input_size, audio_seconds)
+            self._job_stages[job_id] = ("decoded", time.monotonic())
+        return succeeded
+
+    async def _transcribe_stage(self, job_id: str, worker_name: str) -> bool:
+        """Etapa 2 (red): transcribir con Groq dentro del límite de concurrencia adaptativo"""
+        job = self._pending_job(job_id)
+        if job is None:
+            return False
+
+        self._job_stages[job.job_id] = ("transcribe", time.monotonic())
+        succeeded, result = await self._run_step(job, self._transcribe(job), retry_stage=self.transcribe_stage)
+        if not succeeded:
+            return False
+        job_id = job.job_id
+        eta_estimator.record(
+            "transcribe",
+            job.request_params.audio_metadata.duration,
+            time.monotonic() - self._job_stages[job_id][1]
+        )
+        self._job_stages.pop(job_id, None)
+
+        # Actualizar con resultado exitoso (el cliente lo recibe ya; persistir es la etapa siguiente)
+        job.status = JobStatus.COMPLETED
+        job.message = "Transcripción completada"
+        job.progress = 100.0
+        job.result = result
+        job.completed_at = datetime.now()
+        await self._notify_progress(job_id)
+        return True
+
+    async def _persist_stage(self, job_id: str, worker_name: str) -> bool:
+        """Etapa 3 (background): guardar, cachear y sincronizar con Convex"""
+        job_id = self._run_id(job_id)
+        job = self.jobs.get(job_id)
         try:
-            logger.info(f"🔄 Procesando job {job_id} en {worker_name}")
-            
-            # Actualizar estado
-            job.status = JobStatus.PROCESSING
-            job.message = "Procesando transcripción..."
-            job.started_at = datetime.now()
-            job.progress = 0.0
-            
-            await self._notify_progress(job_id)
-            
-            # Crear task para el procesamiento
-            process_task = asyncio.create_task(
-                self._transcribe_audio(job)
-            )
-            self.active_jobs[job_id] = process_task
-            
-            # Esperar resultado
-            result = await process_task
-            
-            # Actualizar con resultado exitoso
-            job.status = JobStatus.COMPLETED
-            job.message = "Transcripción completada"
-            job.progress = 100.0
-            job.result = result
-            job.completed_at = datetime.now()
+            if job is None or job.status != JobStatus.COMPLETED:
+                return False
 
-            await self._notify_progress(job_id)
+            await self.store.save(job)
+            await transcription_cache.put(job.cache_key, job.result)
 
             # 🆕 SINCRONIZAR CON CONVEX
             await self._sync_job_with_convex(job)
 
+            # El resultado ya se entregó: si es grande, fuera de memoria
+            await self._release_result(job)
             logger.info(f"✅ Job completado: {job_id}")
-            
+            return False
+        finally:
+            self._finish_job(job_id)
+            self._enforce_memory_cap()
+
+    async def _run_step(
+        self,
+        job: TranscriptionJob,
+        step: Awaitable,
+        retry_stage: Optional[PipelineStage] = None
+    ) -> Tuple[bool, Any]:
+        """
+        Ejecutar el trabajo de una etapa como task cancelable
+
+        Args:
+            job: Job en proceso
+            step: Trabajo de la etapa
+            retry_stage: Etapa a la que vuelve el job si el error es transitorio
+
+        Returns:
+            Tuple[bool, Any]: (éxito, resultado). Si falla o se cancela, el job ya
+            quedó en su estado final o esperando un reintento.
+        """
+        job_id = job.job_id
+        task = asyncio.create_task(step)
+        self.active_jobs[job_id] = task
+        unregister = self._cancel_token(job_id).add_callback(task.cancel)
+
+        try:
+            # asyncio.wait no propaga la cancelación del task del job, solo la del worker
+            await asyncio.wait({task})
         except asyncio.CancelledError:
+            # Se detiene el worker de la etapa: detener el job y propagar la cancelación
+            task.cancel()
+            await asyncio.wait({task})
+            await self._handle_cancelled(job)
+            raise
+        finally:
+            # Limpiar job activo (con el id del heredero si hubo un relevo)
+            self.active_jobs.pop(job.job_id, None)
+            unregister()
+
+        if task.cancelled():
+            await self._handle_cancelled(job)
+            return False, None
+
+        if task.exception() is not None:
+            await self._fail_or_retry(job, task.exception(), retry_stage)
+            return False, None
+
+        return True, task.result()
+
+    async def _handle_cancelled(self, job: TranscriptionJob):
+        """El trabajo de un job se canceló: por el usuario, por apagado o por perder el lease"""
+        try:
+            if job.job_id in self._lost_leases:
+                # Otro proceso decide el estado del job (cancelación o nuevo dueño)
+                return
+
+            if not self.is_running:
+                # Apagado del servicio: el job queda en cola para el próximo arranque
+                job.status = JobStatus.QUEUED
+                job.message = "Interrumpido por reinicio, se reanudará"
+                await self.store.save(job)
+                return
+
+            if job.status == JobStatus.CANCELLED:
+                # cancel_job ya guardó y notificó el estado
+                return
+
             # Job cancelado
             job.status = JobStatus.CANCELLED
             job.message = "Job cancelado"
             job.completed_at = datetime.now()
-            await self._notify_progress(job_id)
-            
-        except Exception as e:
-            # Error en el procesamiento
+            await self.store.save(job)
+            await self._notify_progress(job.job_id)
+        finally:
+            self._finish_job(job.job_id)
+
+    async def _fail_or_retry(
+        self,
+        job: TranscriptionJob,
+        error: Exception,
+        retry_stage: Optional[PipelineStage]
+    ):
+        """Reintentar el job si el error es transitorio y le quedan reintentos; si no, fallarlo"""
+        error_class, delay = job_retry_policies.next_delay(error, job.retries)
+        if retry_stage is None or delay is None or not self.is_running:
+            await self._fail_job(job, error)
+            return
+
+        job_id = job.job_id
+        job.retries += 1
+        job.progress = 20.0
+        job.message = (
+            f"Error transitorio ({error_class}), reintento {job.retries}/"
+            f"{job_retry_policies.max_retries(error_class)} en {delay:.0f}s"
+        )
+        self.retried_jobs += 1
+        # El audio ya decodificado se reutiliza: el job vuelve directamente a la etapa
+        self._job_stages[job_id] = ("retry", time.monotonic() + delay)
+        timer = self._retry_timers[job_id] = asyncio.create_task(self._retry_after(job_id, retry_stage, delay))
+        self._cancel_token(job_id).add_callback(timer.cancel)
+
+        await self.store.save(job)
+        await self._notify_progress(job_id)
+        logger.warning(f"🔁 Job {job_id}: {error_class}, reintento {job.retries} en {delay:.1f}s ({error})")
+
+    async def _retry_after(self, job_id: str, stage: PipelineStage, delay: float):
+        """Devolver el job a su etapa cuando termine el backoff"""
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._retry_timers.pop(self._run_id(job_id), None)
+        await stage.put(job_id)
+
+    async def _fail_job(self, job: TranscriptionJob, error: Exception):
+        """Error en el procesamiento: el job queda fallido en la dead-letter"""
+        try:
             job.status = JobStatus.FAILED
-            job.message = f"Error: {str(e)}"
-            job.error = str(e)
+            job.message = f"Error: {str(error)}"
+            job.error = str(error)
             job.completed_at = datetime.now()
+            job.dead_lettered_at = job.completed_at
+            self.dead_lettered_jobs += 1
 
-            await self._notify_progress(job_id)
+            await self.store.save(job)
+            await self._notify_progress(job.job_id)
 
             # 🆕 SINCRONIZAR ERROR CON CONVEX
             await self._sync_job_with_convex(job)
-            
-            logger.error(f"❌ Job falló {job_id}: {e}")
-            
+
+            logger.error(f"❌ Job falló {job.job_id}: {error}")
         finally:
-            # Limpiar job activo
-            if job_id in self.active_jobs:
-                del self.active_jobs[job_id]
-    
-    async def _transcribe_audio(self, job: TranscriptionJob) -> TranscriptionResponse:
-        """Transcribir audio con callbacks de progreso"""
+            self._finish_job(job.job_id)
+
+    def _finish_job(self, job_id: str):
+        """El job sale del pipeline: liberar cupo del tenant, lease y memoria del worker"""
+        self._pipeline_jobs.discard(job_id)
+        self._job_stages.pop(job_id, None)
+        self._cancel_tokens.pop(job_id, None)
+        for old_id, new_id in list(self._handovers.items()):
+            if new_id == job_id:
+                del self._handovers[old_id]
+
+        job = self.jobs.get(job_id)
+        if job is not None and job.status in (JobStatus.COMPLETED, JobStatus.CANCELLED):
+            # Los fallidos conservan el audio para re-encolarlos desde la dead-letter
+            self._discard_job_audio(job)
+
+        tenant_id = self._job_tenants.pop(job_id, None)
+        if tenant_id is not None:
+            self.job_queue.release(tenant_id)
+
+        heartbeat = self._heartbeats.pop(job_id, None)
+        if heartbeat is not None:
+            heartbeat.cancel()
+        self._lost_leases.discard(job_id)
+
+        if self.mode == "worker":
+            # El estado queda en el store; este proceso no atiende consultas
+            self._evict(job_id)
+
+    async def _decode_audio(self, job: TranscriptionJob):
+        """Decodificar el audio del job (con los metadatos ya conocidos no se vuelve a hacer probe)"""
         # Importar aquí para evitar circular imports
-        from services.transcription_service import TranscriptionService
         from services.audio_processor import AudioProcessor
-        
-        # Crear instancias de servicios
-        transcription_service = TranscriptionService()
+
         audio_processor = AudioProcessor()
-        
-        # Asegurar que el servicio esté inicializado
-        if not transcription_service.models:
-            await transcription_service.initialize()
-        
-        # Procesar audio si es necesario
-        processed_audio_path = await audio_processor.process_audio_file(
-            job.audio_file_path
+        processed_audio_path, audio_metadata = await audio_processor.process_audio_file_with_metadata(
+            job.audio_file_path,
+            job.request_params.audio_metadata
         )
-        
+        job.request_params.audio_file_path = processed_audio_path
+        job.request_params.audio_metadata = audio_metadata
+
         # Actualizar progreso
         job.progress = 20.0
-        job.message = "Audio procesado, iniciando transcripción..."
+        job.message = "Audio procesado, esperando turno de transcripción..."
         await self._notify_progress(job.job_id)
-        
+
+    async def _transcribe(self, job: TranscriptionJob) -> TranscriptionResponse:
+        """Transcribir el audio ya decodificado con callbacks de progreso"""
+        # Importar aquí para evitar circular imports
+        from services.transcription_service import TranscriptionService
+
+        transcription_service = TranscriptionService()
+
+        # Asegurar que el servicio esté inicializado
+        if not transcription_service.models:
+            await transcription_service.initialize()
+
+        job.message = "Iniciando transcripción..."
+        await self._notify_progress(job.job_id)
+
         # Crear callback de progreso personalizado
         async def progress_callback(progress: float, message: str):
             # Mapear progreso de transcripción (20-90%)
@@ -267,18 +1416,18 @@ class JobQueueService:
             job.progress = min(mapped_progress, 90.0)
             job.message = message
             await self._notify_progress(job.job_id)
-        
+
         # Transcribir con callback
         result = await transcription_service.transcribe_with_progress(
             job.request_params,
             progress_callback
         )
-        
+
         # Progreso final
         job.progress = 95.0
         job.message = "Finalizando transcripción..."
         await self._notify_progress(job.job_id)
-        
+
         return result
 
     async def _sync_job_with_convex(self, job: TranscriptionJob):
@@ -333,13 +1482,48 @@ class JobQueueService:
 
     async def _notify_progress(self, job_id: str):
         """Notificar progreso a través del callback"""
-        if job_id in self.progress_callbacks:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+
+        if not job.coalesced_with:
+            # Los jobs adjuntados reciben el ETA del job original
+            job.estimated_time_remaining = self._estimate_remaining(job)
+
+        if self.mode == "worker" and job.status not in TERMINAL_STATUSES:
+            # Los procesos de la API siguen el progreso a través del store
+            # (el estado final lo guarda la etapa de persistencia)
             try:
-                callback = self.progress_callbacks[job_id]
-                job = self.jobs[job_id]
-                await callback(job)
+                await self.store.save(job, transition=False)
             except Exception as e:
-                logger.error(f"❌ Error en callback de progreso {job_id}: {e}")
+                logger.warning(f"⚠️ No se pudo publicar el progreso del job {job_id}: {e}")
+
+        await self._dispatch_progress(job)
+
+    async def _dispatch_progress(self, job: TranscriptionJob, remote: bool = False):
+        """
+        Publicar el estado del job para su callback (o el callback por defecto)
+
+        El envío lo hace el publicador de progreso: el worker no espera a los
+        sockets y las actualizaciones intermedias se fusionan. Los cambios de
+        este proceso salen además por el bus de eventos (si es distribuido);
+        los que llegan de otro proceso (`remote`) no se reenvían.
+        """
+        callback = self.progress_callbacks.get(job.job_id, self.default_progress_callback)
+        broadcast = event_bus.distributed and not remote
+        if callback or broadcast:
+            progress_publisher.publish(job, partial(self._send_progress, callback, broadcast))
+
+        await self._mirror_to_followers(job)
+
+    async def _send_progress(self, callback: Optional[Callable], broadcast: bool, job: TranscriptionJob):
+        """Entregar un estado al callback local y a los demás procesos"""
+        try:
+            if callback:
+                await callback(job)
+        finally:
+            if broadcast:
+                await event_bus.publish({"type": "job", "job": job.model_dump(mode="json")})
 
 
 # Instancia global del servicio
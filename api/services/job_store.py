@@ -0,0 +1,775 @@
+"""
+Almacenamiento persistente de jobs de transcripción
+Guarda los jobs, sus transiciones de estado y los resultados para sobrevivir a reinicios.
+SQLite y Redis sirven además de cola compartida entre procesos (reclamos con lease)
+"""
+
+import os
+import gzip
+import json
+import time
+import sqlite3
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from models.transcription_models import (
+    TranscriptionJob,
+    TranscriptionRequest,
+    TranscriptionResponse,
+    JobStatus
+)
+
+
+UNFINISHED_STATUSES = (JobStatus.PENDING, JobStatus.QUEUED, JobStatus.PROCESSING)
+
+# Columnas añadidas después de la primera versión del esquema (se migran al arrancar)
+ADDED_JOB_COLUMNS = {
+    "tenant_id": "TEXT NOT NULL DEFAULT 'default'",
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "lease_owner": "TEXT",
+    "lease_expires_at": "REAL",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "seq": "INTEGER NOT NULL DEFAULT 0",
+    "estimated_time_remaining": "REAL",
+    "retries": "INTEGER NOT NULL DEFAULT 0",
+    "dead_lettered_at": "TEXT"
+}
+
+JOB_COLUMNS = (
+    "job_id, status, progress, message, audio_file_path, request_params, cache_key, "
+    "error, created_at, started_at, completed_at, tenant_id, priority, estimated_time_remaining, "
+    "retries, dead_lettered_at"
+)
+
+# Páginas del feed de cambios que leen los procesos de la API
+UPDATES_PAGE_SIZE = 200
+
+
+class JobStore(ABC):
+    """Interfaz del almacén de jobs"""
+
+    # El almacén guarda los resultados y puede devolverlos más tarde
+    persists_results = False
+    # El almacén es compartido entre procesos y admite reclamos con lease
+    supports_claims = False
+
+    async def initialize(self):
+        """Preparar el almacén (crear tablas, abrir conexiones)"""
+
+    @abstractmethod
+    async def save(self, job: TranscriptionJob, transition: bool = True):
+        """
+        Guardar el estado de un job
+
+        Args:
+            job: Job a guardar
+            transition: Registrar el estado actual en el historial de transiciones
+        """
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        """Obtener un job por ID (sin el resultado, que se carga con load_result)"""
+
+    @abstractmethod
+    async def load_unfinished(self) -> List[TranscriptionJob]:
+        """Jobs que quedaron pendientes o en proceso, en orden de creación"""
+
+    @abstractmethod
+    async def get_transitions(self, job_id: str) -> List[Dict[str, str]]:
+        """Historial de estados de un job"""
+
+    async def load_result(self, job_id: str) -> Optional[TranscriptionResponse]:
+        """Cargar solo el resultado de un job"""
+        return None
+
+    async def purge_finished_before(self, cutoff: datetime) -> int:
+        """Eliminar los jobs terminados antes de `cutoff`; devuelve cuántos se borraron"""
+        return 0
+
+    async def list_dead_letters(self, limit: int = 100) -> List[TranscriptionJob]:
+        """Jobs fallidos definitivamente (dead-letter), los más recientes primero"""
+        return []
+
+    @abstractmethod
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[TranscriptionJob]:
+        """
+        Reclamar el siguiente job en cola (o uno cuyo lease expiró)
+
+        El job queda asignado a `worker_id` hasta que el lease caduque; el
+        worker debe renovarlo con `heartbeat` mientras lo procesa.
+        """
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Renovar el lease de un job
+
+        Returns:
+            bool: False si el worker ya no es dueño del job o el job se canceló
+        """
+
+    @abstractmethod
+    async def list_updated_since(self, cursor: Optional[str]) -> Tuple[List[TranscriptionJob], str]:
+        """
+        Jobs modificados después de `cursor`, en orden de escritura
+
+        Con `cursor=None` no devuelve nada y fija el cursor en el momento actual.
+        """
+
+    @abstractmethod
+    async def count_by_status(self) -> Dict[str, int]:
+        """Número de jobs en cola y en proceso"""
+
+    async def close(self):
+        """Liberar recursos"""
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Almacén sin persistencia: la tabla de JobQueueService es la única copia
+
+    Solo guarda el historial de transiciones. No sobrevive a reinicios
+    (desarrollo y tests manuales).
+    """
+
+    def __init__(self):
+        self.transitions: Dict[str, List[Dict[str, str]]] = {}
+
+    async def save(self, job: TranscriptionJob, transition: bool = True):
+        if transition:
+            self.transitions.setdefault(job.job_id, []).append({
+                "status": job.status.value,
+                "message": job.message,
+                "at": datetime.now().isoformat()
+            })
+
+    async def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        return None
+
+    async def load_unfinished(self) -> List[TranscriptionJob]:
+        return []
+
+    async def get_transitions(self, job_id: str) -> List[Dict[str, str]]:
+        return list(self.transitions.get(job_id, []))
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[TranscriptionJob]:
+        # La cola vive en JobQueueService: no hay nada que reclamar
+        return None
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        return False
+
+    async def list_updated_since(self, cursor: Optional[str]) -> Tuple[List[TranscriptionJob], str]:
+        # Sin otros procesos no hay cambios ajenos que seguir
+        return [], cursor or "0"
+
+    async def count_by_status(self) -> Dict[str, int]:
+        counts = {status.value: 0 for status in UNFINISHED_STATUSES}
+        for transitions in self.transitions.values():
+            if transitions[-1]["status"] in counts:
+                counts[transitions[-1]["status"]] += 1
+        return counts
+
+    async def purge_finished_before(self, cutoff: datetime) -> int:
+        expired = [
+            job_id for job_id, transitions in self.transitions.items()
+            if transitions[-1]["status"] not in [status.value for status in UNFINISHED_STATUSES]
+            and datetime.fromisoformat(transitions[-1]["at"]) < cutoff
+        ]
+        for job_id in expired:
+            del self.transitions[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Almacén embebido en SQLite (modo WAL)
+
+    Todas las operaciones corren en un único hilo dedicado, dueño de la
+    conexión, para no bloquear el event loop. Los resultados se guardan como
+    JSON comprimido en una tabla aparte.
+
+    Varios procesos del mismo host pueden compartir el archivo: cada escritura
+    recibe un número de secuencia (las escrituras en SQLite son serializadas)
+    que sirve de cursor del feed de cambios, y los reclamos son UPDATE atómicos.
+    """
+
+    persists_results = True
+    supports_claims = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    async def initialize(self):
+        await self._run(self._initialize_sync)
+        logger.info(f"🗄️ Job store SQLite listo: {self.path}")
+
+    def _initialize_sync(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                audio_file_path TEXT NOT NULL,
+                request_params TEXT NOT NULL,
+                cache_key TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                completed_at TEXT,
+                updated_at TEXT NOT NULL,
+                tenant_id TEXT NOT NULL DEFAULT 'default',
+                priority INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT PRIMARY KEY,
+                result BLOB NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS job_transitions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                message TEXT,
+                at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transitions_job ON job_transitions (job_id, id);
+
+            CREATE TABLE IF NOT EXISTS job_sequence (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO job_sequence (id, value) VALUES (1, 0);
+        """)
+        existing = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+        for column, definition in ADDED_JOB_COLUMNS.items():
+            if column not in existing:
+                connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_seq ON jobs (seq)")
+        connection.commit()
+        self._connection = connection
+
+    async def save(self, job: TranscriptionJob, transition: bool = True):
+        # Serializar en el event loop: el job puede seguir mutando mientras se escribe
+        record = (
+            job.job_id,
+            job.status.value,
+            job.progress,
+            job.message,
+            job.audio_file_path,
+            job.request_params.model_dump_json(),
+            job.cache_key,
+            job.error,
+            job.created_at.isoformat(),
+            job.started_at.isoformat() if job.started_at else None,
+            job.completed_at.isoformat() if job.completed_at else None,
+            datetime.now().isoformat(),
+            job.tenant_id,
+            job.priority,
+            job.estimated_time_remaining,
+            job.retries,
+            job.dead_lettered_at.isoformat() if job.dead_lettered_at else None
+        )
+        result = gzip.compress(job.result.model_dump_json().encode()) if job.result else None
+        await self._run(self._save_sync, record, result, transition)
+
+    def _save_sync(self, record: tuple, result: Optional[bytes], transition: bool):
+        with self._connection:
+            self._connection.execute("UPDATE job_sequence SET value = value + 1 WHERE id = 1")
+            # Un job cancelado sigue cancelado aunque un worker escriba su progreso después
+            self._connection.execute("""
+                INSERT INTO jobs (
+                    job_id, status, progress, message, audio_file_path, request_params,
+                    cache_key, error, created_at, started_at, completed_at, updated_at,
+                    tenant_id, priority, estimated_time_remaining, retries, dead_lettered_at, seq
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                          (SELECT value FROM job_sequence WHERE id = 1))
+                ON CONFLICT(job_id) DO UPDATE SET
+                    status = excluded.status,
+                    progress = excluded.progress,
+                    message = excluded.message,
+                    audio_file_path = excluded.audio_file_path,
+                    request_params = excluded.request_params,
+                    error = excluded.error,
+                    started_at = excluded.started_at,
+                    completed_at = excluded.completed_at,
+                    updated_at = excluded.updated_at,
+                    priority = excluded.priority,
+                    estimated_time_remaining = excluded.estimated_time_remaining,
+                    retries = excluded.retries,
+                    dead_lettered_at = excluded.dead_lettered_at,
+                    seq = excluded.seq
+                WHERE jobs.status != 'cancelled' OR excluded.status = 'cancelled'
+            """, record)
+
+            if result is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO job_results (job_id, result) VALUES (?, ?)",
+                    (record[0], result)
+                )
+
+            if transition:
+                self._connection.execute(
+                    "INSERT INTO job_transitions (job_id, status, message, at) VALUES (?, ?, ?, ?)",
+                    (record[0], record[1], record[3], record[11])
+                )
+
+    async def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        row = await self._run(self._get_sync, job_id)
+        return self._row_to_job(row) if row else None
+
+    def _get_sync(self, job_id: str):
+        # El resultado se carga aparte y solo cuando se pide (load_result)
+        return self._connection.execute(f"""
+            SELECT {JOB_COLUMNS} FROM jobs
+            WHERE job_id = ?
+        """, (job_id,)).fetchone()
+
+    async def load_unfinished(self) -> List[TranscriptionJob]:
+        rows = await self._run(self._load_unfinished_sync)
+        return [self._row_to_job(row) for row in rows]
+
+    def _load_unfinished_sync(self):
+        placeholders = ", ".join("?" for _ in UNFINISHED_STATUSES)
+        return self._connection.execute(f"""
+            SELECT {JOB_COLUMNS} FROM jobs
+            WHERE status IN ({placeholders})
+            ORDER BY created_at
+        """, [status.value for status in UNFINISHED_STATUSES]).fetchall()
+
+    async def get_transitions(self, job_id: str) -> List[Dict[str, str]]:
+        rows = await self._run(self._get_transitions_sync, job_id)
+        return [{"status": status, "message": message, "at": at} for status, message, at in rows]
+
+    def _get_transitions_sync(self, job_id: str):
+        return self._connection.execute(
+            "SELECT status, message, at FROM job_transitions WHERE job_id = ? ORDER BY id",
+            (job_id,)
+        ).fetchall()
+
+    async def load_result(self, job_id: str) -> Optional[TranscriptionResponse]:
+        row = await self._run(self._load_result_sync, job_id)
+        return TranscriptionResponse.model_validate_json(gzip.decompress(row[0])) if row else None
+
+    def _load_result_sync(self, job_id: str):
+        return self._connection.execute(
+            "SELECT result FROM job_results WHERE job_id = ?", (job_id,)
+        ).fetchone()
+
+    async def purge_finished_before(self, cutoff: datetime) -> int:
+        return await self._run(self._purge_sync, cutoff.isoformat())
+
+    def _purge_sync(self, cutoff: str) -> int:
+        placeholders = ", ".join("?" for _ in UNFINISHED_STATUSES)
+        with self._connection:
+            job_ids = [row[0] for row in self._connection.execute(f"""
+                SELECT job_id FROM jobs
+                WHERE status NOT IN ({placeholders}) AND completed_at < ?
+            """, [status.value for status in UNFINISHED_STATUSES] + [cutoff]).fetchall()]
+
+            for job_id in job_ids:
+                self._connection.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+                self._connection.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                self._connection.execute("DELETE FROM job_transitions WHERE job_id = ?", (job_id,))
+
+        return len(job_ids)
+
+    async def list_dead_letters(self, limit: int = 100) -> List[TranscriptionJob]:
+        rows = await self._run(self._list_dead_letters_sync, limit)
+        return [self._row_to_job(row) for row in rows]
+
+    def _list_dead_letters_sync(self, limit: int):
+        return self._connection.execute(f"""
+            SELECT {JOB_COLUMNS} FROM jobs
+            WHERE dead_lettered_at IS NOT NULL AND status = ?
+            ORDER BY dead_lettered_at DESC
+            LIMIT ?
+        """, (JobStatus.FAILED.value, limit)).fetchall()
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[TranscriptionJob]:
+        row = await self._run(self._claim_sync, worker_id, lease_seconds)
+        return self._row_to_job(row) if row else None
+
+    def _claim_sync(self, worker_id: str, lease_seconds: float):
+        claimable = "(status = 'queued' OR (status = 'processing' AND lease_expires_at < :now))"
+
+        for _ in range(5):
+            now = time.time()
+            # Mayor prioridad primero; a igualdad, el tenant con menos jobs en proceso
+            candidate = self._connection.execute(f"""
+                SELECT job_id FROM jobs j
+                WHERE {claimable}
+                ORDER BY
+                    priority DESC,
+                    (SELECT COUNT(*) FROM jobs r
+                     WHERE r.tenant_id = j.tenant_id AND r.status = 'processing'
+                     AND r.lease_expires_at >= :now),
+                    created_at
+                LIMIT 1
+            """, {"now": now}).fetchone()
+            if candidate is None:
+                return None
+
+            # El UPDATE repite la condición: si otro proceso lo reclamó antes, no afecta filas
+            with self._connection:
+                self._connection.execute("UPDATE job_sequence SET value = value + 1 WHERE id = 1")
+                claimed = self._connection.execute(f"""
+                    UPDATE jobs SET
+                        status = 'processing',
+                        lease_owner = :worker_id,
+                        lease_expires_at = :expires_at,
+                        attempts = attempts + 1,
+                        updated_at = :updated_at,
+                        seq = (SELECT value FROM job_sequence WHERE id = 1)
+                    WHERE job_id = :job_id AND {claimable}
+                """, {
+                    "now": now,
+                    "worker_id": worker_id,
+                    "expires_at": now + lease_seconds,
+                    "updated_at": datetime.now().isoformat(),
+                    "job_id": candidate[0]
+                }).rowcount
+
+            if claimed:
+                return self._connection.execute(
+                    f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id = ?", (candidate[0],)
+                ).fetchone()
+
+        return None
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        return await self._run(self._heartbeat_sync, job_id, worker_id, lease_seconds)
+
+    def _heartbeat_sync(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        with self._connection:
+            return self._connection.execute("""
+                UPDATE jobs SET lease_expires_at = ?
+                WHERE job_id = ? AND lease_owner = ? AND status = 'processing'
+            """, (time.time() + lease_seconds, job_id, worker_id)).rowcount == 1
+
+    async def list_updated_since(self, cursor: Optional[str]) -> Tuple[List[TranscriptionJob], str]:
+        rows, cursor = await self._run(self._list_updated_sync, cursor)
+        return [self._row_to_job(row[:-1]) for row in rows], cursor
+
+    def _list_updated_sync(self, cursor: Optional[str]):
+        if cursor is None:
+            current = self._connection.execute("SELECT value FROM job_sequence WHERE id = 1").fetchone()
+            return [], str(current[0])
+
+        rows = self._connection.execute(f"""
+            SELECT {JOB_COLUMNS}, seq FROM jobs
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        """, (int(cursor), UPDATES_PAGE_SIZE)).fetchall()
+        return rows, str(rows[-1][-1]) if rows else cursor
+
+    async def count_by_status(self) -> Dict[str, int]:
+        rows = await self._run(self._count_sync)
+        counts = {status.value: 0 for status in UNFINISHED_STATUSES}
+        counts.update(dict(rows))
+        return counts
+
+    def _count_sync(self):
+        placeholders = ", ".join("?" for _ in UNFINISHED_STATUSES)
+        return self._connection.execute(f"""
+            SELECT status, COUNT(*) FROM jobs
+            WHERE status IN ({placeholders})
+            GROUP BY status
+        """, [status.value for status in UNFINISHED_STATUSES]).fetchall()
+
+    async def close(self):
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, function, *args):
+        return await asyncio.get_event_loop().run_in_executor(self._executor, function, *args)
+
+    @staticmethod
+    def _row_to_job(row) -> TranscriptionJob:
+        (job_id, status, progress, message, audio_file_path, request_params, cache_key,
+         error, created_at, started_at, completed_at, tenant_id, priority,
+         estimated_time_remaining, retries, dead_lettered_at) = row
+
+        return TranscriptionJob(
+            job_id=job_id,
+            status=JobStatus(status),
+            progress=progress,
+            message=message or "",
+            audio_file_path=audio_file_path,
+            request_params=TranscriptionRequest.model_validate_json(request_params),
+            cache_key=cache_key,
+            tenant_id=tenant_id,
+            priority=priority,
+            error=error,
+            created_at=datetime.fromisoformat(created_at),
+            started_at=datetime.fromisoformat(started_at) if started_at else None,
+            completed_at=datetime.fromisoformat(completed_at) if completed_at else None,
+            estimated_time_remaining=estimated_time_remaining,
+            retries=retries,
+            dead_lettered_at=datetime.fromisoformat(dead_lettered_at) if dead_lettered_at else None
+        )
+
+
+class RedisJobStore(JobStore):
+    """
+    Almacén compartido en Redis (o compatible), para workers en varios nodos
+
+    Claves bajo `prefix`:
+    - job:{id}: JSON del job (sin resultado); result:{id} y transitions:{id}
+    - queued: sorted set por prioridad y antigüedad
+    - leases: sorted set de jobs reclamados por fecha de caducidad del lease
+    - updated: feed de cambios (score = secuencia de escritura)
+    - finished / unfinished: índices para la retención y la recuperación
+    - dead_letters: jobs fallidos definitivamente, por fecha
+
+    Las operaciones que deben ser atómicas (guardar respetando cancelaciones,
+    reclamar, que también marca el job:{id} como processing, y renovar leases)
+    son scripts Lua. Requiere el paquete `redis`.
+    """
+
+    persists_results = True
+    supports_claims = True
+
+    SAVE_SCRIPT = """
+        local current = redis.call('GET', KEYS[1])
+        if current and ARGV[3] ~= 'cancelled' and cjson.decode(current)['status'] == 'cancelled' then
+            return 0
+        end
+        redis.call('SET', KEYS[1], ARGV[2])
+        redis.call('ZADD', KEYS[4], redis.call('INCR', KEYS[6]), ARGV[1])
+        if ARGV[3] == 'queued' then
+            redis.call('ZADD', KEYS[2], ARGV[4], ARGV[1])
+            redis.call('ZREM', KEYS[3], ARGV[1])
+        else
+            redis.call('ZREM', KEYS[2], ARGV[1])
+        end
+        if ARGV[5] ~= '' then
+            redis.call('ZREM', KEYS[3], ARGV[1])
+            redis.call('HDEL', KEYS[8], ARGV[1])
+            redis.call('ZADD', KEYS[5], ARGV[5], ARGV[1])
+            redis.call('SREM', KEYS[7], ARGV[1])
+        else
+            redis.call('SADD', KEYS[7], ARGV[1])
+        end
+        return 1
+    """
+
+    CLAIM_SCRIPT = """
+        local job_id
+        local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[1], 'LIMIT', 0, 1)
+        if #expired > 0 then
+            job_id = expired[1]
+        else
+            local popped = redis.call('ZPOPMIN', KEYS[1])
+            if #popped == 0 then
+                return false
+            end
+            job_id = popped[1]
+        end
+        redis.call('ZADD', KEYS[2], ARGV[2], job_id)
+        redis.call('HSET', KEYS[3], job_id, ARGV[3])
+        redis.call('HINCRBY', KEYS[4], job_id, 1)
+        local job_key = ARGV[4] .. job_id
+        local payload = redis.call('GET', job_key)
+        if payload then
+            local job = cjson.decode(payload)
+            job['status'] = 'processing'
+            redis.call('SET', job_key, cjson.encode(job))
+            redis.call('ZADD', KEYS[5], redis.call('INCR', KEYS[6]), job_id)
+        end
+        return job_id
+    """
+
+    HEARTBEAT_SCRIPT = """
+        if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+            return 0
+        end
+        if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+            return 0
+        end
+        redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+        return 1
+    """
+
+    def __init__(self, url: str, prefix: str = "retender"):
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    async def initialize(self):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("JOB_STORE=redis requiere el paquete redis (pip install redis)") from e
+
+        self._client = redis.from_url(self.url)
+        await self._client.ping()
+        self._save_script = self._client.register_script(self.SAVE_SCRIPT)
+        self._claim_script = self._client.register_script(self.CLAIM_SCRIPT)
+        self._heartbeat_script = self._client.register_script(self.HEARTBEAT_SCRIPT)
+        logger.info(f"🗄️ Job store Redis listo: {self.prefix}@{self.url.split('@')[-1]}")
+
+    async def save(self, job: TranscriptionJob, transition: bool = True):
+        terminal = job.status not in UNFINISHED_STATUSES
+        queue_score = -job.priority * 1e11 + job.created_at.timestamp()
+        finished_score = (job.completed_at or datetime.now()).timestamp() if terminal else ""
+
+        saved = await self._save_script(
+            keys=[
+                self._key("job", job.job_id), self._key("queued"), self._key("leases"),
+                self._key("updated"), self._key("finished"), self._key("seq"), self._key("unfinished"),
+                self._key("lease_owners")
+            ],
+            args=[
+                job.job_id, job.model_dump_json(exclude={"result"}), job.status.value,
+                queue_score, finished_score
+            ]
+        )
+        if not saved:
+            return
+
+        pipeline = self._client.pipeline(transaction=False)
+        if job.dead_lettered_at and job.status == JobStatus.FAILED:
+            pipeline.zadd(self._key("dead_letters"), {job.job_id: job.dead_lettered_at.timestamp()})
+        else:
+            pipeline.zrem(self._key("dead_letters"), job.job_id)
+        if job.result is not None:
+            pipeline.set(self._key("result", job.job_id), gzip.compress(job.result.model_dump_json().encode()))
+        if transition:
+            pipeline.rpush(self._key("transitions", job.job_id), json.dumps({
+                "status": job.status.value,
+                "message": job.message,
+                "at": datetime.now().isoformat()
+            }))
+        await pipeline.execute()
+
+    async def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        payload = await self._client.get(self._key("job", job_id))
+        return TranscriptionJob.model_validate_json(payload) if payload else None
+
+    async def _get_many(self, job_ids: List[bytes]) -> List[TranscriptionJob]:
+        if not job_ids:
+            return []
+        payloads = await self._client.mget([self._key("job", job_id.decode()) for job_id in job_ids])
+        return [TranscriptionJob.model_validate_json(payload) for payload in payloads if payload]
+
+    async def load_unfinished(self) -> List[TranscriptionJob]:
+        jobs = await self._get_many(list(await self._client.smembers(self._key("unfinished"))))
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    async def get_transitions(self, job_id: str) -> List[Dict[str, str]]:
+        entries = await self._client.lrange(self._key("transitions", job_id), 0, -1)
+        return [json.loads(entry) for entry in entries]
+
+    async def load_result(self, job_id: str) -> Optional[TranscriptionResponse]:
+        payload = await self._client.get(self._key("result", job_id))
+        return TranscriptionResponse.model_validate_json(gzip.decompress(payload)) if payload else None
+
+    async def purge_finished_before(self, cutoff: datetime) -> int:
+        job_ids = [
+            job_id.decode() for job_id in
+            await self._client.zrangebyscore(self._key("finished"), "-inf", cutoff.timestamp())
+        ]
+        if not job_ids:
+            return 0
+
+        pipeline = self._client.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipeline.delete(
+                self._key("job", job_id), self._key("result", job_id), self._key("transitions", job_id)
+            )
+        pipeline.zrem(self._key("finished"), *job_ids)
+        pipeline.zrem(self._key("dead_letters"), *job_ids)
+        pipeline.zrem(self._key("updated"), *job_ids)
+        pipeline.hdel(self._key("lease_owners"), *job_ids)
+        pipeline.hdel(self._key("attempts"), *job_ids)
+        await pipeline.execute()
+        return len(job_ids)
+
+    async def list_dead_letters(self, limit: int = 100) -> List[TranscriptionJob]:
+        return await self._get_many(await self._client.zrevrange(self._key("dead_letters"), 0, limit - 1))
+
+    async def claim(self, worker_id: str, lease_seconds: float) -> Optional[TranscriptionJob]:
+        now = time.time()
+        job_id = await self._claim_script(
+            keys=[
+                self._key("queued"), self._key("leases"), self._key("lease_owners"), self._key("attempts"),
+                self._key("updated"), self._key("seq")
+            ],
+            args=[now, now + lease_seconds, worker_id, self._key("job", "")]
+        )
+        if not job_id:
+            return None
+        return await self.get(job_id.decode())
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        renewed = await self._heartbeat_script(
+            keys=[self._key("lease_owners"), self._key("leases")],
+            args=[job_id, worker_id, time.time() + lease_seconds]
+        )
+        return bool(renewed)
+
+    async def list_updated_since(self, cursor: Optional[str]) -> Tuple[List[TranscriptionJob], str]:
+        if cursor is None:
+            return [], str(int(await self._client.get(self._key("seq")) or 0))
+
+        entries = await self._client.zrangebyscore(
+            self._key("updated"), f"({cursor}", "+inf",
+            start=0, num=UPDATES_PAGE_SIZE, withscores=True
+        )
+        if not entries:
+            return [], cursor
+
+        jobs = await self._get_many([job_id for job_id, _ in entries])
+        return jobs, str(int(entries[-1][1]))
+
+    async def count_by_status(self) -> Dict[str, int]:
+        return {
+            JobStatus.QUEUED.value: await self._client.zcard(self._key("queued")),
+            JobStatus.PROCESSING.value: await self._client.zcard(self._key("leases"))
+        }
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_job_store() -> JobStore:
+    """Crear el almacén configurado en JOB_STORE (sqlite, redis o memory)"""
+    backend = os.getenv("JOB_STORE", "sqlite").lower()
+
+    if backend == "memory":
+        return InMemoryJobStore()
+
+    if backend == "redis":
+        return RedisJobStore(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            os.getenv("REDIS_KEY_PREFIX", "retender")
+        )
+
+    if backend != "sqlite":
+        logger.warning(f"⚠️ JOB_STORE no soportado: {backend}, se usa sqlite")
+
+    return SQLiteJobStore(os.getenv("JOB_STORE_PATH", "./data/jobs.db"))
@@ -0,0 +1,137 @@
+"""
+Publicador de progreso de jobs
+Desacopla a los workers del envío por WebSocket: cada job tiene un único envío
+en curso y las actualizaciones intermedias se fusionan (gana la última)
+"""
+
+import os
+import time
+import asyncio
+from typing import Optional, Callable, Awaitable, Dict, Any
+
+from loguru import logger
+
+from models.transcription_models import TranscriptionJob, JobStatus
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class _JobChannel:
+    """Estado de publicación de un job"""
+
+    def __init__(self):
+        self.pending: Optional[TranscriptionJob] = None
+        self.callback: Optional[Callable[[TranscriptionJob], Awaitable[None]]] = None
+        self.last_sent = 0.0
+        self.terminal = False
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class ProgressPublisher:
+    """
+    Entrega del progreso limitada por job a PROGRESS_MAX_UPDATES_PER_SECOND
+
+    - `publish` no espera: guarda una copia del job y vuelve al worker.
+    - Si llegan varias actualizaciones dentro del intervalo, solo se envía la última.
+    - Los estados finales se envían siempre y sin esperar al intervalo.
+    - El canal de un job se libera tras el estado final o tras un intervalo sin
+      actualizaciones.
+    """
+
+    def __init__(self):
+        rate = float(os.getenv("PROGRESS_MAX_UPDATES_PER_SECOND") or 4)
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self._channels: Dict[str, _JobChannel] = {}
+
+        # Contabilidad
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def publish(
+        self,
+        job: TranscriptionJob,
+        callback: Callable[[TranscriptionJob], Awaitable[None]]
+    ):
+        """Encolar el estado actual del job para su callback (sin bloquear al llamador)"""
+        channel = self._channels.get(job.job_id)
+        if channel is None:
+            channel = self._channels[job.job_id] = _JobChannel()
+
+        self.published += 1
+        if channel.pending is not None:
+            self.coalesced += 1
+
+        # Copia: el job sigue cambiando (y puede soltar su resultado) antes del envío
+        channel.pending = job.model_copy()
+        channel.callback = callback
+        channel.terminal = job.status in TERMINAL_STATUSES
+        channel.wake.set()
+
+        if channel.task is None:
+            channel.task = asyncio.create_task(self._deliver(job.job_id, channel))
+
+    async def _deliver(self, job_id: str, channel: _JobChannel):
+        try:
+            while True:
+                if channel.pending is None:
+                    if channel.terminal:
+                        break
+                    # Seguir un intervalo a la escucha: el límite se respeta también entre ráfagas
+                    if not await self._wait_wake(channel, self.min_interval):
+                        break
+                    continue
+
+                # Respetar el intervalo, salvo que llegue un estado final
+                while not channel.terminal:
+                    wait = channel.last_sent + self.min_interval - time.monotonic()
+                    if wait <= 0:
+                        break
+                    await self._wait_wake(channel, wait)
+
+                job, channel.pending = channel.pending, None
+                channel.last_sent = time.monotonic()
+                try:
+                    await channel.callback(job)
+                    self.delivered += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"❌ Error en callback de progreso {job_id}: {e}")
+        finally:
+            channel.task = None
+            if channel.pending is None:
+                self._channels.pop(job_id, None)
+
+    @staticmethod
+    async def _wait_wake(channel: _JobChannel, timeout: float) -> bool:
+        """Esperar una nueva publicación; False si pasa `timeout` sin ninguna"""
+        channel.wake.clear()
+        try:
+            await asyncio.wait_for(channel.wake.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def drain(self, timeout: float = 5.0):
+        """Esperar a que se entreguen las actualizaciones pendientes (apagado)"""
+        tasks = [channel.task for channel in self._channels.values() if channel.task is not None]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Actualizaciones publicadas, entregadas y fusionadas"""
+        return {
+            "max_updates_per_second": round(1.0 / self.min_interval, 2) if self.min_interval else None,
+            "active_jobs": len(self._channels),
+            "sending": sum(1 for channel in self._channels.values() if channel.task is not None),
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "failed": self.failed
+        }
+
+
+# Instancia global del publicador
+progress_publisher = ProgressPublisher()
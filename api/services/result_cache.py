@@ -0,0 +1,249 @@
+"""
+Caché de resultados de transcripción direccionada por contenido
+Clave: SHA-256 de los bytes subidos + parámetros de transcripción
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from loguru import logger
+
+from models.transcription_models import TranscriptionResponse
+
+
+class CachedResultAvailable(Exception):
+    """El upload ya tiene un resultado en caché; se usa para abortar el procesamiento"""
+
+    def __init__(self, cache_key: str, response: TranscriptionResponse):
+        super().__init__(cache_key)
+        self.cache_key = cache_key
+        self.response = response
+
+
+class TranscriptionResultCache:
+    """LRU en memoria con capa opcional en disco, con expulsión por tamaño y antigüedad"""
+
+    def __init__(self):
+        self.enabled = os.getenv("TRANSCRIPTION_CACHE_ENABLED", "true").lower() == "true"
+        self.max_entries = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", "256"))
+        self.max_bytes = int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "64")) * 1024 * 1024
+        self.ttl_seconds = float(os.getenv("TRANSCRIPTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+        # Capa en disco opcional (JSON comprimido, un archivo por entrada)
+        disk_dir = os.getenv("TRANSCRIPTION_CACHE_DIR")
+        self.disk_dir: Optional[Path] = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = int(os.getenv("TRANSCRIPTION_CACHE_DISK_MAX_MB", "512")) * 1024 * 1024
+
+        # key -> (creado_en, tamaño, JSON serializado)
+        self._memory: "OrderedDict[str, Tuple[float, int, str]]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> (creado_en, tamaño en disco), ordenado por antigüedad
+        self._disk_index: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.enabled and self.disk_dir:
+            self._load_disk_index()
+
+    @staticmethod
+    def build_key(content_sha256: str, params: Dict[str, Any]) -> str:
+        """
+        Construir la clave de caché
+
+        Args:
+            content_sha256: SHA-256 (hex) de los bytes subidos
+            params: language, model, temperature, initial_prompt y return_timestamps
+        """
+        relevant = {
+            "language": params.get("language"),
+            "model": params.get("model"),
+            "temperature": params.get("temperature"),
+            "initial_prompt": params.get("initial_prompt"),
+            "return_timestamps": params.get("return_timestamps"),
+        }
+        encoded = json.dumps(relevant, sort_keys=True, default=str)
+        return hashlib.sha256(f"{content_sha256}:{encoded}".encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[TranscriptionResponse]:
+        """Obtener un resultado de la caché (memoria y luego disco)"""
+        if not self.enabled:
+            return None
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, _, payload = entry
+            if self._is_expired(created_at):
+                self._remove_from_memory(key)
+            else:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._mark_hit(TranscriptionResponse.model_validate_json(payload))
+
+        if self.disk_dir and key in self._disk_index:
+            disk_entry = self._disk_index[key]
+            created_at, _ = disk_entry
+            if self._is_expired(created_at):
+                self._remove_from_disk(key)
+            else:
+                payload = await asyncio.get_event_loop().run_in_executor(None, self._read_disk, key)
+                if payload is not None:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    # Promover a memoria
+                    self._store_in_memory(key, payload, created_at)
+                    return self._mark_hit(TranscriptionResponse.model_validate_json(payload))
+                # Entrada ilegible: se quita aquí, en el loop, salvo que un `put`
+                # concurrente ya la haya reemplazado mientras se leía
+                if self._disk_index.get(key) is disk_entry:
+                    self._remove_from_disk(key)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: TranscriptionResponse):
+        """Guardar un resultado en la caché"""
+        if not self.enabled or not key:
+            return
+
+        payload = response.model_dump_json()
+        created_at = time.time()
+        self._store_in_memory(key, payload, created_at)
+
+        if self.disk_dir:
+            size = await asyncio.get_event_loop().run_in_executor(
+                None, self._write_disk, key, payload
+            )
+            if size is not None:
+                self._index_disk_entry(key, created_at, size)
+
+        logger.debug(f"💾 Resultado guardado en caché: {key[:12]}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la caché"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "memory_mb": round(self._memory_bytes / (1024 * 1024), 2),
+            "disk_entries": len(self._disk_index),
+            "disk_mb": round(self._disk_bytes / (1024 * 1024), 2)
+        }
+
+    def _mark_hit(self, response: TranscriptionResponse) -> TranscriptionResponse:
+        response.config = {**response.config, "cache_hit": True}
+        return response
+
+    def _is_expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def _store_in_memory(self, key: str, payload: str, created_at: float):
+        if key in self._memory:
+            self._remove_from_memory(key)
+
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        self._memory[key] = (created_at, size, payload)
+        self._memory_bytes += size
+
+        # Expulsar por antigüedad, número de entradas y tamaño (LRU primero)
+        for old_key in [k for k, (created, _, _) in self._memory.items() if self._is_expired(created)]:
+            self._remove_from_memory(old_key)
+            self.evictions += 1
+
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            old_key = next(iter(self._memory))
+            self._remove_from_memory(old_key)
+            self.evictions += 1
+
+    def _remove_from_memory(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json.gz"
+
+    def _load_disk_index(self):
+        """Reconstruir el índice de la capa en disco al arrancar"""
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.disk_dir.glob("*.json.gz"):
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.name[:-len(".json.gz")], stat.st_size))
+
+            for mtime, key, size in sorted(entries):
+                self._disk_index[key] = (mtime, size)
+                self._disk_bytes += size
+
+            logger.info(f"💾 Caché en disco: {len(self._disk_index)} entradas en {self.disk_dir}")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo cargar la caché en disco, se desactiva: {e}")
+            self.disk_dir = None
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        """Leer una entrada comprimida de disco (corre en un hilo: no toca el índice)"""
+        try:
+            with gzip.open(self._disk_path(key), "rt", encoding="utf-8") as cache_file:
+                return cache_file.read()
+        except Exception as e:
+            logger.warning(f"⚠️ Entrada de caché en disco ilegible {key[:12]}: {e}")
+            return None
+
+    def _write_disk(self, key: str, payload: str) -> Optional[int]:
+        """Escribir una entrada comprimida en disco (corre en un hilo)"""
+        try:
+            path = self._disk_path(key)
+            temp_path = path.with_suffix(".tmp")
+            with gzip.open(temp_path, "wt", encoding="utf-8") as cache_file:
+                cache_file.write(payload)
+            os.replace(temp_path, path)
+            return path.stat().st_size
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo escribir la caché en disco: {e}")
+            return None
+
+    def _index_disk_entry(self, key: str, created_at: float, size: int):
+        if key in self._disk_index:
+            self._disk_bytes -= self._disk_index.pop(key)[1]
+        self._disk_index[key] = (created_at, size)
+        self._disk_bytes += size
+
+        # Expulsar las entradas más antiguas por tamaño total o TTL
+        while self._disk_index and (
+            self._disk_bytes > self.disk_max_bytes or
+            self._is_expired(next(iter(self._disk_index.values()))[0])
+        ):
+            self._remove_from_disk(next(iter(self._disk_index)))
+            self.evictions += 1
+
+    def _remove_from_disk(self, key: str):
+        entry = self._disk_index.pop(key, None)
+        if entry is not None:
+            self._disk_bytes -= entry[1]
+        try:
+            self._disk_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+# Instancia global de la caché
+transcription_cache = TranscriptionResultCache()
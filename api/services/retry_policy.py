@@ -0,0 +1,146 @@
+"""
+Políticas de reintento de jobs por tipo de error
+Los errores transitorios de Groq (rate limit, timeouts, 5xx) se reintentan con
+backoff exponencial y jitter, respetando Retry-After en los 429
+"""
+
+import os
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+from groq import APIStatusError, APIConnectionError, APITimeoutError
+
+
+class RetryPolicy:
+    """Número máximo de reintentos y backoff de una clase de error"""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float, honor_retry_after: bool = False):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.honor_retry_after = honor_retry_after
+
+    def delay(self, retries: int, retry_after: Optional[float] = None) -> float:
+        """
+        Espera antes del reintento número `retries + 1`
+
+        Backoff exponencial con jitter (la mitad fija, la otra mitad aleatoria)
+        para que los jobs que fallaron a la vez no vuelvan a la vez. Con
+        Retry-After se espera lo que pide el servidor más un jitter pequeño.
+        """
+        if self.honor_retry_after and retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+
+        backoff = min(self.max_delay, self.base_delay * (2 ** retries))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class JobRetryPolicies:
+    """Clasificación de errores y política de reintento de cada clase"""
+
+    def __init__(self):
+        self.enabled = os.getenv("JOB_RETRY_ENABLED", "true").lower() == "true"
+        base_delay = float(os.getenv("JOB_RETRY_BASE_SECONDS") or 2)
+        max_delay = float(os.getenv("JOB_RETRY_MAX_DELAY_SECONDS") or 120)
+
+        self.policies: Dict[str, RetryPolicy] = {
+            "rate_limit": RetryPolicy(
+                int(os.getenv("JOB_RETRY_RATE_LIMIT_RETRIES") or 5), base_delay, max_delay, honor_retry_after=True
+            ),
+            "timeout": RetryPolicy(int(os.getenv("JOB_RETRY_TIMEOUT_RETRIES") or 3), base_delay, max_delay),
+            "connection": RetryPolicy(int(os.getenv("JOB_RETRY_CONNECTION_RETRIES") or 3), base_delay, max_delay),
+            "server_error": RetryPolicy(int(os.getenv("JOB_RETRY_SERVER_ERROR_RETRIES") or 3), base_delay, max_delay)
+        }
+
+    @staticmethod
+    def _causes(error: BaseException):
+        """El error y los que lo provocaron (los servicios re-lanzan envolviendo el original)"""
+        seen = set()
+        while error is not None and id(error) not in seen:
+            seen.add(id(error))
+            yield error
+            error = error.__cause__ or error.__context__
+
+    def classify(self, error: BaseException) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Clase de error transitorio y Retry-After (si lo hay)
+
+        Returns:
+            Tuple[Optional[str], Optional[float]]: (clase, segundos pedidos por el
+            servidor); clase None si el error no es transitorio.
+        """
+        for cause in self._causes(error):
+            if isinstance(cause, (APITimeoutError, httpx.TimeoutException)):
+                return "timeout", None
+            if isinstance(cause, (APIConnectionError, httpx.TransportError)):
+                return "connection", None
+            if isinstance(cause, APIStatusError):
+                if cause.status_code == 429:
+                    return "rate_limit", _retry_after_seconds(cause.response)
+                if cause.status_code == 408:
+                    return "timeout", None
+                if cause.status_code >= 500:
+                    return "server_error", None
+                return None, None
+        return None, None
+
+    def next_delay(self, error: BaseException, retries: int) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Decidir si un job que falló se reintenta
+
+        Returns:
+            Tuple[Optional[str], Optional[float]]: (clase del error, espera en
+            segundos); espera None si no se reintenta (error permanente o
+            reintentos agotados).
+        """
+        error_class, retry_after = self.classify(error)
+        policy = self.policies.get(error_class)
+        if not self.enabled or policy is None or retries >= policy.max_retries:
+            return error_class, None
+        return error_class, policy.delay(retries, retry_after)
+
+    def max_retries(self, error_class: Optional[str]) -> int:
+        policy = self.policies.get(error_class)
+        return policy.max_retries if policy else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Configuración de reintentos por clase de error"""
+        return {
+            "enabled": self.enabled,
+            "policies": {
+                error_class: {"max_retries": policy.max_retries, "honor_retry_after": policy.honor_retry_after}
+                for error_class, policy in self.policies.items()
+            }
+        }
+
+
+def _retry_after_seconds(response: Optional[httpx.Response]) -> Optional[float]:
+    """Segundos de Retry-After (número o fecha HTTP; también retry-after-ms)"""
+    if response is None:
+        return None
+
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# Instancia global de las políticas
+job_retry_policies = JobRetryPolicies()
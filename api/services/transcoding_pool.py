@@ -0,0 +1,293 @@
+"""
+Pool de transcodificación con control de admisión
+Limita los procesos FFmpeg concurrentes y contabiliza su tiempo de CPU
+"""
+
+import os
+import re
+import time
+import asyncio
+from collections import deque
+from typing import Optional, List, AsyncIterator, Dict, Any, BinaryIO
+
+from loguru import logger
+
+
+def _available_cores() -> int:
+    """Núcleos disponibles para este proceso (respeta la afinidad de CPU)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class TranscodingPoolBusyError(Exception):
+    """El pool está saturado y la cola de espera llena"""
+
+    def __init__(self, retry_after: float, waiting: int):
+        super().__init__(f"Pool de transcodificación ocupado, reintentar en {retry_after:.0f}s")
+        self.retry_after = retry_after
+        self.waiting = waiting
+
+
+class TranscodingPool:
+    """
+    Pool acotado de procesos FFmpeg con cola de espera limitada
+
+    Las decodificaciones en streaming (stdin alimentado por un upload) avanzan
+    al ritmo del cliente, así que tienen su propio límite y no ocupan los
+    slots de las transcodificaciones de archivos.
+    """
+
+    # Línea que FFmpeg imprime con -benchmark al terminar
+    BENCH_PATTERN = re.compile(r"bench: utime=([\d.]+)s stime=([\d.]+)s rtime=([\d.]+)s")
+
+    def __init__(self):
+        self.max_workers = int(os.getenv("TRANSCODE_MAX_WORKERS") or _available_cores())
+        self.max_waiting = int(os.getenv("TRANSCODE_MAX_QUEUE") or self.max_workers * 4)
+        self.max_streaming = int(os.getenv("TRANSCODE_MAX_STREAMING") or self.max_workers * 2)
+        self.pipe_read_size = 64 * 1024
+
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self.active = 0
+        self.waiting = 0
+
+        self._streaming_semaphore = asyncio.Semaphore(self.max_streaming)
+        self.streaming_active = 0
+        self.streaming_waiting = 0
+
+        # Contabilidad
+        self.total_jobs = 0
+        self.failed_jobs = 0
+        self.rejected_jobs = 0
+        self.total_cpu_seconds = 0.0
+        self.total_wall_seconds = 0.0
+        self.recent_jobs: deque = deque(maxlen=50)
+
+    def ensure_capacity(self, streaming: bool = False):
+        """Rechazar de inmediato si no hay sitio ni en el pool ni en la cola de espera"""
+        if streaming:
+            full = self.streaming_active >= self.max_streaming and self.streaming_waiting >= self.max_waiting
+            waiting = self.streaming_waiting
+        else:
+            full = self.active >= self.max_workers and self.waiting >= self.max_waiting
+            waiting = self.waiting
+
+        if full:
+            self.rejected_jobs += 1
+            retry_after = self.estimate_retry_after(streaming)
+            logger.warning(f"🚦 Pool de transcodificación saturado, reintentar en {retry_after:.0f}s")
+            raise TranscodingPoolBusyError(retry_after, waiting)
+
+    def estimate_retry_after(self, streaming: bool = False) -> float:
+        """Estimar cuándo habrá hueco: duración media reciente × trabajos por delante / workers"""
+        durations = [job["wall_seconds"] for job in self.recent_jobs]
+        average = sum(durations) / len(durations) if durations else 5.0
+        if streaming:
+            return max(1.0, average * (self.streaming_waiting + 1) / self.max_streaming)
+        return max(1.0, average * (self.waiting + 1) / self.max_workers)
+
+    async def run(
+        self,
+        args: List[str],
+        input_chunks: Optional[AsyncIterator[bytes]] = None,
+        label: str = "ffmpeg",
+        admission: bool = True,
+        output: Optional[BinaryIO] = None
+    ) -> bytes:
+        """
+        Ejecutar FFmpeg dentro de un slot del pool
+
+        Args:
+            args: Argumentos de FFmpeg (sin el binario ni las opciones globales de log)
+            input_chunks: Datos para stdin; si es None, stdin no se usa. Con
+                datos el trabajo usa los slots de streaming, y solo después de
+                que llegue el primer chunk
+            label: Etiqueta para logs y contabilidad
+            admission: Si es False no se rechaza nunca (trabajo ya aceptado
+                que solo debe esperar su turno, p. ej. codificar para Groq)
+            output: Archivo donde volcar stdout a medida que llega, sin
+                acumularlo en memoria (el resultado es entonces vacío)
+
+        Returns:
+            bytes: Lo que FFmpeg escriba en stdout (vacío si se indica `output`)
+        """
+        streaming = input_chunks is not None
+        if admission:
+            self.ensure_capacity(streaming)
+
+        if streaming:
+            # Un cliente que aún no envía nada no debe retener un slot con FFmpeg parado
+            input_chunks = await self._after_first_chunk(input_chunks)
+
+        await self._acquire(streaming)
+        start_time = time.monotonic()
+        cpu_seconds = None
+        success = False
+
+        try:
+            stdout, errors, return_code = await self._execute(args, input_chunks, output)
+
+            match = self.BENCH_PATTERN.search(errors)
+            if match:
+                cpu_seconds = float(match.group(1)) + float(match.group(2))
+
+            if return_code != 0:
+                detail = self._error_detail(errors)
+                logger.error(f"❌ Error procesando con FFmpeg ({label}): {detail}")
+                raise RuntimeError(f"Error procesando audio con FFmpeg: {detail or return_code}")
+
+            success = True
+            return stdout
+
+        finally:
+            wall_seconds = time.monotonic() - start_time
+            self._release(streaming)
+
+            self.total_jobs += 1
+            self.failed_jobs += 0 if success else 1
+            self.total_wall_seconds += wall_seconds
+            self.total_cpu_seconds += cpu_seconds or 0.0
+            self.recent_jobs.append({
+                "label": label,
+                "wall_seconds": round(wall_seconds, 3),
+                "cpu_seconds": round(cpu_seconds, 3) if cpu_seconds is not None else None,
+                "success": success
+            })
+
+    async def _acquire(self, streaming: bool):
+        """Esperar un slot del pool (o de los de streaming)"""
+        if streaming:
+            self.streaming_waiting += 1
+            try:
+                await self._streaming_semaphore.acquire()
+            finally:
+                self.streaming_waiting -= 1
+            self.streaming_active += 1
+        else:
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            self.active += 1
+
+    def _release(self, streaming: bool):
+        if streaming:
+            self.streaming_active -= 1
+            self._streaming_semaphore.release()
+        else:
+            self.active -= 1
+            self._semaphore.release()
+
+    @staticmethod
+    async def _after_first_chunk(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Esperar al primer chunk y devolver un iterador que lo incluye"""
+        iterator = chunks.__aiter__()
+        try:
+            first = await iterator.__anext__()
+        except StopAsyncIteration:
+            first = None
+
+        async def resumed():
+            if first is None:
+                return
+            yield first
+            async for chunk in iterator:
+                yield chunk
+
+        return resumed()
+
+    async def _execute(
+        self,
+        args: List[str],
+        input_chunks: Optional[AsyncIterator[bytes]],
+        output: Optional[BinaryIO] = None
+    ):
+        """Lanzar el proceso, alimentar stdin y drenar stdout/stderr concurrentemente"""
+        process = await asyncio.create_subprocess_exec(
+            'ffmpeg', '-hide_banner', '-nostats', '-loglevel', 'info', '-benchmark',
+            *args,
+            stdin=asyncio.subprocess.PIPE if input_chunks is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        output_buffer = bytearray()
+        errors = bytearray()
+
+        async def feed():
+            try:
+                async for chunk in input_chunks:
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # FFmpeg cerró stdin antes de tiempo; el código de salida indica el motivo
+                pass
+            finally:
+                process.stdin.close()
+
+        async def drain(stream, buffer: bytearray, sink: Optional[BinaryIO] = None):
+            while True:
+                data = await stream.read(self.pipe_read_size)
+                if not data:
+                    break
+                if sink is not None:
+                    sink.write(data)
+                else:
+                    buffer.extend(data)
+
+        coroutines = [drain(process.stdout, output_buffer, output), drain(process.stderr, errors)]
+        if input_chunks is not None:
+            coroutines.append(feed())
+        tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+
+        try:
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # Si una tarea falla (o nos cancelan) las demás no pueden quedar
+                # leyendo de un proceso que se va a matar ni del upload
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            return_code = await process.wait()
+        finally:
+            # Error o cancelación: no dejar procesos FFmpeg huérfanos
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+        return bytes(output_buffer), errors.decode(errors='replace'), return_code
+
+    @staticmethod
+    def _error_detail(errors: str) -> str:
+        """Quedarse con las últimas líneas útiles de stderr (sin el benchmark)"""
+        lines = [
+            line.strip() for line in errors.splitlines()
+            if line.strip() and not line.startswith("bench:")
+        ]
+        return " | ".join(lines[-3:])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del pool"""
+        return {
+            "max_workers": self.max_workers,
+            "max_waiting": self.max_waiting,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_streaming": self.max_streaming,
+            "streaming_active": self.streaming_active,
+            "streaming_waiting": self.streaming_waiting,
+            "total_jobs": self.total_jobs,
+            "failed_jobs": self.failed_jobs,
+            "rejected_jobs": self.rejected_jobs,
+            "total_cpu_seconds": round(self.total_cpu_seconds, 2),
+            "total_wall_seconds": round(self.total_wall_seconds, 2),
+            "recent_jobs": list(self.recent_jobs)[-10:]
+        }
+
+
+# Instancia global del pool
+transcoding_pool = TranscodingPool()
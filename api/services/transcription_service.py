@@ -14,9 +14,12 @@ from models.transcription_models import (
     TranscriptionRequest,
     TranscriptionResponse,
     TranscriptionSegment,
-    AudioInfo
+    AudioInfo,
+    AudioMetadata
 )
 from services.groq_transcription_service import groq_transcription_service
+from services.audio_processor import AudioProcessor
+from services.chunked_transcription import chunked_transcription_engine, GROQ_MAX_REQUEST_BYTES
 
 
 class TranscriptionService:
@@ -28,6 +31,7 @@ class TranscriptionService:
         # Config flags
         self.use_faster_whisper = True  # Local CPU/GPU inference
         self.use_openai_api = False  # Usar solo modelo local
+        self.audio_processor = AudioProcessor()
         
     async def initialize(self):
         """Inicializar el servicio de transcripción"""
@@ -89,6 +93,11 @@ class TranscriptionService:
         logger.info(f"🎤 Iniciando transcripción con Groq Cloud - Archivo: {Path(request.audio_file_path).name}")
 
         try:
+            # WAV 16kHz mono: recorte de silencios y, si es largo, ventanas en paralelo
+            pcm = await self._load_pcm(request.audio_file_path, request.audio_metadata)
+            if pcm is not None:
+                return await self._transcribe_pcm(pcm, request)
+
             # Usar Groq Cloud API para transcripción
             response = await groq_transcription_service.transcribe_audio(request)
 
@@ -99,6 +108,138 @@ class TranscriptionService:
             logger.error(f"❌ Error en transcripción: {e}")
             raise Exception(f"Error en transcripción: {str(e)}")
     
+    async def _load_pcm(self, file_path: str, metadata: Optional[AudioMetadata] = None) -> Optional[bytes]:
+        """
+        Cargar el PCM del audio procesado si hay que trabajar sobre él
+
+        Se carga cuando el VAD está activo, cuando el audio debe trocearse o
+        cuando se sube a Groq con un códec comprimido. El audio extraído de un
+        video por copia de stream ya está comprimido: se envía tal cual salvo
+        que no quepa en un único request.
+
+        Returns:
+            Optional[bytes]: PCM del audio, o None para enviar el archivo tal cual
+        """
+        try:
+            file_size = os.path.getsize(file_path)
+        except OSError:
+            return None
+
+        if metadata is not None and metadata.source == 'stream_copy':
+            bytes_per_second = 2 * self.audio_processor.target_channels * self.audio_processor.target_sample_rate
+            pcm_size = int(metadata.duration * bytes_per_second)
+            if file_size <= GROQ_MAX_REQUEST_BYTES and not chunked_transcription_engine.needs_chunking(pcm_size):
+                return None
+
+            logger.info(f"✂️ Audio extraído demasiado largo para un request, decodificando: {Path(file_path).name}")
+            return await self.audio_processor.decode_to_pcm(file_path)
+
+        needs_chunking = chunked_transcription_engine.needs_chunking(file_size)
+        needs_encoding = self.audio_processor.upload_codec != 'wav'
+        if not self.audio_processor.vad_enabled and not needs_chunking and not needs_encoding:
+            return None
+
+        pcm = await self.audio_processor.load_wav_pcm(file_path)
+        if pcm is None and needs_chunking:
+            logger.warning(f"⚠️ Audio largo no está en WAV 16kHz mono, no se puede trocear: {Path(file_path).name}")
+        return pcm
+
+    async def _transcribe_pcm(
+        self,
+        pcm: bytes,
+        request: TranscriptionRequest,
+        progress_callback: Optional[Callable] = None
+    ) -> TranscriptionResponse:
+        """
+        Transcribir PCM: recorte de silencios (VAD) → Groq (una llamada o por ventanas)
+
+        Los timestamps devueltos siempre se refieren a la grabación original.
+        """
+        start_time = time.time()
+        bytes_per_second = 2 * self.audio_processor.target_channels * self.audio_processor.target_sample_rate
+        original_duration = len(pcm) / bytes_per_second
+        speech_map = None
+
+        if self.audio_processor.vad_enabled:
+            if progress_callback:
+                await progress_callback(5.0, "Detectando silencios...")
+
+            pcm, speech_map = await self.audio_processor.trim_silence(pcm)
+
+            # Todo silencio: no hace falta llamar a Groq
+            if speech_map.is_silent:
+                if progress_callback:
+                    await progress_callback(100.0, "Audio sin voz detectada")
+                return TranscriptionResponse(
+                    text="",
+                    segments=[] if request.return_timestamps else None,
+                    language=request.language or "unknown",
+                    processing_time=time.time() - start_time,
+                    model_used="whisper-large-v3-turbo-groq",
+                    audio_info=self._pcm_audio_info(original_duration),
+                    config={"vad": {"silent": True, "original_duration": original_duration}}
+                )
+
+        if chunked_transcription_engine.needs_chunking(len(pcm)):
+            result = await chunked_transcription_engine.transcribe(pcm, request, progress_callback)
+        else:
+            if progress_callback:
+                await progress_callback(40.0, "Enviando a Groq Cloud...")
+
+            audio_data, extension, codec = await self.audio_processor.encode_for_upload(pcm)
+            result = await groq_transcription_service.transcribe_audio_bytes(
+                audio_data,
+                f"{Path(request.audio_file_path).stem}{extension}",
+                request,
+                self._pcm_audio_info(len(pcm) / bytes_per_second, codec, len(audio_data))
+            )
+
+            if progress_callback:
+                await progress_callback(100.0, "Transcripción completada")
+
+        if speech_map is not None:
+            # Volver a la línea de tiempo original
+            if result.segments:
+                for segment in result.segments:
+                    segment.start = round(speech_map.to_original(segment.start), 3)
+                    segment.end = round(speech_map.to_original(segment.end, is_end=True), 3)
+
+            result.audio_info = self._pcm_audio_info(
+                original_duration,
+                result.audio_info.upload_codec,
+                int((result.audio_info.upload_size_mb or 0) * 1024 * 1024)
+            )
+            result.config = {
+                **result.config,
+                "vad": {
+                    "original_duration": round(original_duration, 3),
+                    "speech_duration": round(speech_map.speech_duration, 3),
+                    "removed_seconds": round(original_duration - speech_map.speech_duration, 3)
+                }
+            }
+
+        result.processing_time = time.time() - start_time
+        logger.info(f"✅ Transcripción completada en {result.processing_time:.2f}s")
+        return result
+
+    def _pcm_audio_info(
+        self,
+        duration: float,
+        upload_codec: Optional[str] = None,
+        upload_bytes: Optional[int] = None
+    ) -> AudioInfo:
+        """AudioInfo de un PCM 16kHz mono (sin necesidad de ffprobe)"""
+        size_bytes = duration * 2 * self.audio_processor.target_channels * self.audio_processor.target_sample_rate
+        return AudioInfo(
+            duration=round(duration, 3),
+            sample_rate=self.audio_processor.target_sample_rate,
+            channels=self.audio_processor.target_channels,
+            format="pcm_s16le",
+            size_mb=round(size_bytes / (1024 * 1024), 2),
+            upload_codec=upload_codec,
+            upload_size_mb=round(upload_bytes / (1024 * 1024), 2) if upload_bytes else None
+        )
+
     async def _transcribe_faster_whisper(self, model: Any, request: TranscriptionRequest) -> Dict[str, Any]:
         """Transcribir usando faster-whisper"""
         
@@ -142,50 +283,8 @@ class TranscriptionService:
 
     
     async def _get_audio_info(self, file_path: str) -> AudioInfo:
-        """Obtener información del archivo de audio"""
-        try:
-            import ffmpeg
-            
-            # Obtener información usando ffprobe
-            probe = ffmpeg.probe(file_path)
-            audio_stream = next(
-                (stream for stream in probe['streams'] if stream['codec_type'] == 'audio'),
-                None
-            )
-            
-            if not audio_stream:
-                raise Exception("No se encontró stream de audio")
-            
-            duration = float(audio_stream.get('duration', 0))
-            sample_rate = int(audio_stream.get('sample_rate', 0))
-            channels = int(audio_stream.get('channels', 1))
-            
-            # Obtener tamaño del archivo
-            file_size = os.path.getsize(file_path)
-            size_mb = file_size / (1024 * 1024)
-            
-            # Obtener formato
-            format_name = probe['format']['format_name']
-            
-            return AudioInfo(
-                duration=duration,
-                sample_rate=sample_rate,
-                channels=channels,
-                format=format_name,
-                size_mb=round(size_mb, 2)
-            )
-            
-        except Exception as e:
-            logger.warning(f"⚠️ No se pudo obtener info de audio: {e}")
-            # Fallback con información básica
-            file_size = os.path.getsize(file_path)
-            return AudioInfo(
-                duration=0.0,
-                sample_rate=16000,
-                channels=1,
-                format="unknown",
-                size_mb=round(file_size / (1024 * 1024), 2)
-            )
+        """Obtener información del archivo de audio (cabecera WAV o un único ffprobe)"""
+        return await groq_transcription_service.get_audio_info(file_path)
     
     async def health_check(self) -> bool:
         """Verificar que el servicio esté funcionando"""
@@ -213,6 +312,11 @@ class TranscriptionService:
         Transcribir audio con callbacks de progreso usando Groq Cloud
         """
         try:
+            # WAV 16kHz mono: recorte de silencios y, si es largo, ventanas con progreso
+            pcm = await self._load_pcm(request.audio_file_path, request.audio_metadata)
+            if pcm is not None:
+                return await self._transcribe_pcm(pcm, request, progress_callback)
+
             # Usar Groq Cloud API con progreso
             response = await groq_transcription_service.transcribe_with_progress(
                 request, progress_callback
@@ -299,6 +403,9 @@ class TranscriptionService:
         self.models.clear()
         self.current_model_name = None
 
+        # Cerrar el pool de conexiones con Groq
+        await groq_transcription_service.close()
+
         logger.info("✅ Recursos limpiados")
     
     def get_loaded_models(self) -> list:
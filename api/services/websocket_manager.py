@@ -2,53 +2,184 @@
 WebSocket Manager para comunicación en tiempo real
 """
 
+import os
 import json
+import uuid
 import asyncio
-from typing import Dict, Set, Optional, Any
+from collections import deque
+from typing import Dict, Set, Optional, Any, Deque, Tuple, List
 from datetime import datetime
 from loguru import logger
 
 from fastapi import WebSocket, WebSocketDisconnect
 from models.transcription_models import (
     WebSocketMessage,
-    TranscriptionJob
+    TranscriptionJob,
+    BatchJob
 )
 
 
+# Mensajes que se pueden descartar si llega uno más reciente del mismo tipo
+DROPPABLE_MESSAGE_TYPES = ("progress", "batch_progress")
+# Último mensaje de un canal terminado: se reenvía desde el registro al reconectar
+FINAL_MESSAGE_TYPES = ("completed", "error", "batch_completed")
+
+
+class _EventLog:
+    """Últimos mensajes de un canal (job o lote), numerados para reanudar tras reconectar"""
+
+    def __init__(self, size: int):
+        # Identifica este registro: los `seq` de otro proceso o de antes de un reinicio no valen
+        self.stream = uuid.uuid4().hex[:8]
+        self.size = size
+        self.seq = 0
+        # (seq, texto JSON, tipo de mensaje, si se guardó sin su resultado)
+        self.entries: Deque[Tuple[int, str, str, bool]] = deque()
+        # (seq, texto) del mensaje final ya con su resultado: se codifica una vez por canal
+        self.final_text: Optional[Tuple[int, str]] = None
+        self.bytes = 0
+
+    def append(self, text: str, message_type: str, result_ref: bool = False) -> int:
+        """Guardar un mensaje ya numerado; devuelve los bytes liberados por los que salen"""
+        self.entries.append((self.seq, text, message_type, result_ref))
+        self.bytes += len(text)
+        freed = 0
+        if self.final_text:
+            # El mensaje final deja de serlo (p. ej. re-encolado desde la dead-letter)
+            freed += len(self.final_text[1])
+            self.final_text = None
+        while len(self.entries) > self.size:
+            freed += len(self.entries.popleft()[1])
+        self.bytes -= freed
+        return freed
+
+    def cache_final_text(self, seq: int, text: str) -> int:
+        """Guardar el mensaje final ya codificado con su resultado; devuelve los bytes liberados"""
+        freed = len(self.final_text[1]) if self.final_text else 0
+        self.final_text = (seq, text)
+        self.bytes += len(text) - freed
+        return freed
+
+    def since(self, last_seq: int, stream: Optional[str]) -> Optional[List[Tuple[int, str, str, bool]]]:
+        """Mensajes posteriores a `last_seq`; None si no se pueden reconstruir desde el registro"""
+        if (stream and stream != self.stream) or last_seq > self.seq:
+            return None
+        if last_seq < self.seq and (not self.entries or self.entries[0][0] > last_seq + 1):
+            # El cliente se perdió mensajes que ya salieron del registro
+            return None
+        return [entry for entry in self.entries if entry[0] > last_seq]
+
+    def final_entry(self) -> Optional[Tuple[int, str, str, bool]]:
+        if self.entries and self.entries[-1][2] in FINAL_MESSAGE_TYPES:
+            return self.entries[-1]
+        return None
+
+
+class _Connection:
+    """Cola de envío de un WebSocket y su tarea escritora"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        # (texto JSON, tipo de mensaje)
+        self.queue: Deque[Tuple[str, str]] = deque()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        # Consumidor lento: solo se conserva el último mensaje descartable de cada tipo
+        self.downgraded = False
+        self.dropped = 0
+
+
+def _parse_seq(value: Any) -> Optional[int]:
+    """`last_seq` enviado por el cliente (None si no es un entero válido)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
 class WebSocketManager:
-    """Manager para conexiones WebSocket y broadcasting"""
+    """
+    Manager para conexiones WebSocket y broadcasting
+
+    Cada mensaje se serializa una sola vez y se deja en la cola de envío de
+    cada conexión; una tarea escritora por conexión la vacía. Un cliente lento
+    no retrasa al resto:
+    - Si su cola se llena pasa a modo degradado: los mensajes de progreso
+      pendientes se sustituyen por el más reciente.
+    - Si aun así no cabe un mensaje final, o un envío tarda más de
+      WEBSOCKET_SEND_TIMEOUT_SECONDS, la conexión se cierra.
+
+    Los mensajes de cada canal llevan `seq` y `stream`: al reconectar con
+    `last_seq` se reenvían solo los que faltan (del registro de eventos del
+    canal); si ya no están, se envía el estado actual.
+    """
     
     def __init__(self):
         # Conexiones activas por job_id
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Índice inverso: jobs (o lotes) a los que está suscrita cada conexión
+        self.subscriptions: Dict[WebSocket, Set[str]] = {}
+        self.max_subscriptions = int(os.getenv("WEBSOCKET_MAX_SUBSCRIPTIONS") or 100)
         # Metadata de conexiones
         self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
+        # Colas de envío por conexión
+        self._connections: Dict[WebSocket, _Connection] = {}
+        self.send_queue_size = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE") or 32)
+        self.send_timeout = float(os.getenv("WEBSOCKET_SEND_TIMEOUT_SECONDS") or 10)
+
+        # Registro de eventos por canal (los canales menos recientes salen al superar el tope)
+        self._event_logs: Dict[str, _EventLog] = {}
+        self.event_log_size = int(os.getenv("WEBSOCKET_EVENT_LOG_SIZE") or 64)
+        self.event_log_max_bytes = int(float(os.getenv("WEBSOCKET_EVENT_LOG_MAX_MB") or 32) * 1024 * 1024)
+        self._event_log_bytes = 0
+
+        # Contabilidad
+        self.messages_replayed = 0
+        self.snapshots_sent = 0
+        self.messages_encoded = 0
+        self.messages_dropped = 0
+        self.connections_downgraded = 0
+        self.connections_evicted = 0
         
-    async def connect(self, websocket: WebSocket, job_id: str):
-        """Conectar un WebSocket a un job específico"""
+    async def connect(
+        self,
+        websocket: WebSocket,
+        job_id: Optional[str] = None,
+        last_seq: Optional[int] = None,
+        stream: Optional[str] = None
+    ):
+        """
+        Conectar un WebSocket
+
+        Con `job_id` la conexión queda suscrita a ese job (endpoint por job);
+        sin él es una conexión multiplexada que se suscribe con mensajes
+        `subscribe` / `unsubscribe`. Con `last_seq` (y `stream`) se reanuda
+        desde el último mensaje recibido.
+        """
         await websocket.accept()
         
-        # Agregar a conexiones activas
-        if job_id not in self.active_connections:
-            self.active_connections[job_id] = set()
-        
-        self.active_connections[job_id].add(websocket)
-        
         # Guardar metadata
         self.connection_metadata[websocket] = {
             "job_id": job_id,
             "connected_at": datetime.now(),
             "last_ping": datetime.now()
         }
+        self.subscriptions[websocket] = set()
+
+        connection = self._connections[websocket] = _Connection(websocket)
+        connection.writer = asyncio.create_task(self._write_loop(connection))
         
-        logger.info(f"🔌 WebSocket conectado para job: {job_id}")
+        if job_id:
+            logger.info(f"🔌 WebSocket conectado para job: {job_id}")
+        else:
+            logger.info("🔌 WebSocket multiplexado conectado")
         
         # Enviar mensaje de bienvenida
         await self.send_message_to_websocket(
             websocket,
             WebSocketMessage(
                 type="connected",
-                job_id=job_id,
+                job_id=job_id or "",
                 data={
                     "message": "Conectado exitosamente",
                     "job_id": job_id
@@ -56,8 +187,78 @@ class WebSocketManager:
             )
         )
 
-        # Enviar estado actual del job inmediatamente
-        await self._send_job_status(websocket, job_id)
+        if job_id:
+            # Suscribir y enviar el estado actual del job (o lo que se perdió) inmediatamente
+            await self.subscribe(websocket, [job_id], acknowledge=False, cursors={job_id: (last_seq, stream)})
+
+    async def subscribe(
+        self,
+        websocket: WebSocket,
+        job_ids: List[str],
+        acknowledge: bool = True,
+        cursors: Optional[Dict[str, Tuple[Optional[int], Optional[str]]]] = None
+    ):
+        """
+        Suscribir una conexión a jobs o lotes y enviarle su estado actual
+
+        `cursors`: (last_seq, stream) por job para reenviar solo los mensajes perdidos.
+        """
+        cursors = cursors or {}
+        subscribed = self.subscriptions.get(websocket)
+        if subscribed is None:
+            return
+
+        added = []
+        for job_id in dict.fromkeys(job_ids):
+            if job_id in subscribed:
+                continue
+            if len(subscribed) >= self.max_subscriptions:
+                await self.send_message_to_websocket(
+                    websocket,
+                    WebSocketMessage(
+                        type="error",
+                        job_id=job_id,
+                        data={"error": f"Máximo de {self.max_subscriptions} suscripciones por conexión"}
+                    )
+                )
+                break
+
+            subscribed.add(job_id)
+            self.active_connections.setdefault(job_id, set()).add(websocket)
+            added.append(job_id)
+
+        if acknowledge:
+            await self.send_message_to_websocket(
+                websocket,
+                WebSocketMessage(type="subscribed", job_id="", data={"job_ids": sorted(subscribed)})
+            )
+
+        for job_id in added:
+            await self._send_job_status(websocket, job_id, *cursors.get(job_id, (None, None)))
+
+    async def unsubscribe(self, websocket: WebSocket, job_ids: List[str]):
+        """Cancelar suscripciones de una conexión"""
+        subscribed = self.subscriptions.get(websocket)
+        if subscribed is None:
+            return
+
+        for job_id in job_ids:
+            subscribed.discard(job_id)
+            self._remove_subscriber(job_id, websocket)
+
+        await self.send_message_to_websocket(
+            websocket,
+            WebSocketMessage(type="unsubscribed", job_id="", data={"job_ids": sorted(subscribed)})
+        )
+
+    def _remove_subscriber(self, job_id: str, websocket: WebSocket):
+        subscribers = self.active_connections.get(job_id)
+        if subscribers is None:
+            return
+        subscribers.discard(websocket)
+        # Si no hay más conexiones para este job, limpiar
+        if not subscribers:
+            del self.active_connections[job_id]
     
     async def disconnect(self, websocket: WebSocket):
         """Desconectar un WebSocket"""
@@ -67,50 +268,193 @@ class WebSocketManager:
         metadata = self.connection_metadata[websocket]
         job_id = metadata["job_id"]
         
-        # Remover de conexiones activas
-        if job_id in self.active_connections:
-            self.active_connections[job_id].discard(websocket)
-            
-            # Si no hay más conexiones para este job, limpiar
-            if not self.active_connections[job_id]:
-                del self.active_connections[job_id]
+        # Remover de conexiones activas (solo los jobs a los que estaba suscrita)
+        for subscribed_job_id in self.subscriptions.pop(websocket, ()):
+            self._remove_subscriber(subscribed_job_id, websocket)
         
         # Remover metadata
         del self.connection_metadata[websocket]
+
+        # Detener la tarea escritora (salvo que sea ella quien desconecta)
+        connection = self._connections.pop(websocket, None)
+        if connection and connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
         
-        logger.info(f"🔌 WebSocket desconectado para job: {job_id}")
+        if job_id:
+            logger.info(f"🔌 WebSocket desconectado para job: {job_id}")
+        else:
+            logger.info("🔌 WebSocket multiplexado desconectado")
     
     async def send_message_to_job(self, job_id: str, message: WebSocketMessage):
-        """Enviar mensaje a todas las conexiones de un job"""
+        """Enviar mensaje a todas las conexiones de un job (sin esperar a los envíos)"""
+        # Numerar y registrar aunque no haya nadie conectado: un cliente que
+        # reconecte recibirá lo que se perdió
+        log = self._event_log(job_id)
+        log.seq += 1
+        message.seq, message.stream = log.seq, log.stream
+
+        # Serializar una sola vez para todos los destinatarios
+        text = self._encode(message)
+        if isinstance(message.data, dict) and "result" in message.data:
+            # El resultado ya está en el job store (o en su spill): el registro
+            # guarda el mensaje sin él y lo vuelve a cargar al reenviarlo
+            data = {key: value for key, value in message.data.items() if key != "result"}
+            self._record_event(job_id, log, self._encode(message.model_copy(update={"data": data})), message.type, True)
+        else:
+            self._record_event(job_id, log, text, message.type)
+
         if job_id not in self.active_connections:
             logger.debug(f"📡 No hay conexiones activas para job: {job_id}")
             return
-        
-        connections = self.active_connections[job_id].copy()
-        disconnected_connections = []
-        
-        for websocket in connections:
-            try:
-                await self.send_message_to_websocket(websocket, message)
-            except Exception as e:
-                logger.warning(f"❌ Error enviando mensaje a WebSocket: {e}")
-                disconnected_connections.append(websocket)
-        
-        # Limpiar conexiones muertas
-        for websocket in disconnected_connections:
-            await self.disconnect(websocket)
+
+        evicted = []
+
+        for websocket in self.active_connections[job_id].copy():
+            connection = self._connections.get(websocket)
+            if connection and not self._enqueue(connection, text, message.type):
+                evicted.append(websocket)
+
+        for websocket in evicted:
+            await self._evict(websocket, "cola de envío llena")
     
     async def send_message_to_websocket(self, websocket: WebSocket, message: WebSocketMessage):
-        """Enviar mensaje a un WebSocket específico"""
+        """Enviar mensaje a un WebSocket específico (por su cola, para no desordenar los mensajes)"""
+        await self._send_text(websocket, self._encode(message), message.type)
+
+    async def _send_text(self, websocket: WebSocket, text: str, message_type: str):
+        """Enviar un mensaje ya serializado a un WebSocket"""
+        connection = self._connections.get(websocket)
+        if connection:
+            if not self._enqueue(connection, text, message_type):
+                await self._evict(websocket, "cola de envío llena")
+            return
+
         try:
-            message_dict = message.dict()
-            # Convertir datetime a string para JSON serialization
-            if 'timestamp' in message_dict:
-                message_dict['timestamp'] = message_dict['timestamp'].isoformat()
-            await websocket.send_text(json.dumps(message_dict, default=str))
+            await websocket.send_text(text)
         except Exception as e:
             logger.error(f"❌ Error enviando mensaje WebSocket: {e}")
             raise
+
+    def _encode(self, message: WebSocketMessage) -> str:
+        """Serializar un mensaje a JSON"""
+        message_dict = message.dict()
+        # Convertir datetime a string para JSON serialization
+        if 'timestamp' in message_dict:
+            message_dict['timestamp'] = message_dict['timestamp'].isoformat()
+        self.messages_encoded += 1
+        return json.dumps(message_dict, default=str)
+
+    def _event_log(self, job_id: str) -> _EventLog:
+        """Registro de eventos del canal, marcado como el más reciente"""
+        log = self._event_logs.pop(job_id, None)
+        if log is None:
+            log = _EventLog(self.event_log_size)
+        self._event_logs[job_id] = log
+        return log
+
+    def _record_event(
+        self,
+        job_id: str,
+        log: _EventLog,
+        text: str,
+        message_type: str,
+        result_ref: bool = False
+    ):
+        self._event_log_bytes += len(text) - log.append(text, message_type, result_ref)
+        self._trim_event_logs()
+
+    def _trim_event_logs(self):
+        """Tope de memoria: fuera los registros de los canales sin actividad reciente"""
+        while self._event_log_bytes > self.event_log_max_bytes and len(self._event_logs) > 1:
+            oldest_id = next(iter(self._event_logs))
+            self._event_log_bytes -= self._event_logs.pop(oldest_id).bytes
+
+    def _enqueue(self, connection: _Connection, text: str, message_type: str) -> bool:
+        """
+        Dejar un mensaje en la cola de una conexión
+
+        Returns:
+            bool: False si la conexión no da abasto y debe cerrarse
+        """
+        queue = connection.queue
+        droppable = message_type in DROPPABLE_MESSAGE_TYPES
+
+        if len(queue) >= self.send_queue_size and not connection.downgraded:
+            # Cola llena: degradar a "solo el último progreso" y compactar lo pendiente
+            connection.downgraded = True
+            self.connections_downgraded += 1
+            latest = {}
+            for index, (_, queued_type) in enumerate(queue):
+                if queued_type in DROPPABLE_MESSAGE_TYPES:
+                    latest[queued_type] = index
+            kept = deque(
+                entry for index, entry in enumerate(queue)
+                if entry[1] not in DROPPABLE_MESSAGE_TYPES or latest[entry[1]] == index
+            )
+            self._count_dropped(connection, len(queue) - len(kept))
+            connection.queue = queue = kept
+            logger.warning(f"🐢 WebSocket lento, se envía solo el último progreso ({len(queue)} en cola)")
+
+        if connection.downgraded and droppable:
+            # Sustituir el progreso pendiente del mismo tipo por el nuevo
+            for index, (_, queued_type) in enumerate(queue):
+                if queued_type == message_type:
+                    del queue[index]
+                    self._count_dropped(connection, 1)
+                    break
+
+        if len(queue) >= self.send_queue_size:
+            if droppable:
+                self._count_dropped(connection, 1)
+                return True
+            return False
+
+        queue.append((text, message_type))
+        connection.ready.set()
+        return True
+
+    def _count_dropped(self, connection: _Connection, count: int):
+        connection.dropped += count
+        self.messages_dropped += count
+
+    async def _write_loop(self, connection: _Connection):
+        """Tarea escritora de una conexión: vacía su cola en orden"""
+        websocket = connection.websocket
+        try:
+            while True:
+                if not connection.queue:
+                    # Cola vacía: el cliente se ha puesto al día
+                    connection.downgraded = False
+                    connection.ready.clear()
+                    await connection.ready.wait()
+                    continue
+
+                text, _ = connection.queue.popleft()
+                try:
+                    await asyncio.wait_for(websocket.send_text(text), timeout=self.send_timeout)
+                except asyncio.TimeoutError:
+                    await self._evict(websocket, f"envío bloqueado más de {self.send_timeout:g}s")
+                    return
+                except Exception as e:
+                    logger.warning(f"❌ Error enviando mensaje a WebSocket: {e}")
+                    await self.disconnect(websocket)
+                    return
+        except asyncio.CancelledError:
+            pass
+
+    async def _evict(self, websocket: WebSocket, reason: str):
+        """Cerrar una conexión que no consume sus mensajes"""
+        if websocket not in self.connection_metadata:
+            return
+
+        self.connections_evicted += 1
+        logger.warning(f"🚫 Cerrando WebSocket lento: {reason}")
+        await self.disconnect(websocket)
+        try:
+            # 1013: "try again later"; el cliente puede reconectar y pedir el estado
+            await asyncio.wait_for(websocket.close(code=1013), timeout=1.0)
+        except Exception:
+            pass
     
     async def broadcast_progress(self, job: TranscriptionJob):
         """Broadcast de progreso de un job"""
@@ -152,6 +496,36 @@ class WebSocketManager:
         
         await self.send_message_to_job(job.job_id, message)
     
+    async def broadcast_batch_progress(self, batch: BatchJob):
+        """Broadcast del progreso agregado de un lote"""
+        message = WebSocketMessage(
+            type="batch_completed" if batch.completed_at else "batch_progress",
+            job_id=batch.batch_id,
+            data=self._batch_summary(batch)
+        )
+
+        await self.send_message_to_job(batch.batch_id, message)
+
+    def _batch_summary(self, batch: BatchJob) -> Dict[str, Any]:
+        """Resumen de un lote para WebSocket (sin los resultados completos)"""
+        return {
+            "status": batch.status.value,
+            "progress": batch.progress,
+            "total_files": len(batch.files),
+            "completed_files": sum(1 for entry in batch.files if entry.status.value == "completed"),
+            "failed_files": sum(1 for entry in batch.files if entry.status.value in ["failed", "cancelled"]),
+            "files": [
+                {
+                    "filename": entry.filename,
+                    "job_id": entry.job_id,
+                    "status": entry.status.value,
+                    "progress": entry.progress,
+                    "error": entry.error
+                }
+                for entry in batch.files
+            ]
+        }
+
     async def handle_websocket_message(self, websocket: WebSocket, data: str):
         """Manejar mensajes entrantes del WebSocket"""
         try:
@@ -173,6 +547,29 @@ class WebSocketManager:
                 if websocket in self.connection_metadata:
                     self.connection_metadata[websocket]["last_ping"] = datetime.now()
             
+            elif message_type in ("subscribe", "unsubscribe"):
+                # Uno o varios jobs: {"job_id": "..."} o {"job_ids": [...]}
+                job_ids = message_data.get("job_ids") or []
+                if message_data.get("job_id"):
+                    job_ids = [*job_ids, message_data["job_id"]]
+                job_ids = [str(job_id) for job_id in job_ids if job_id]
+
+                if message_type == "subscribe":
+                    # Reanudar: {"job_id", "last_seq", "stream"} o
+                    # {"job_ids", "cursors": {job_id: {"last_seq", "stream"}}}
+                    cursors = {
+                        str(job_id): (_parse_seq(cursor.get("last_seq")), cursor.get("stream"))
+                        for job_id, cursor in (message_data.get("cursors") or {}).items()
+                        if isinstance(cursor, dict)
+                    }
+                    if message_data.get("job_id") and message_data.get("last_seq") is not None:
+                        cursors[str(message_data["job_id"])] = (
+                            _parse_seq(message_data["last_seq"]), message_data.get("stream")
+                        )
+                    await self.subscribe(websocket, job_ids, cursors=cursors)
+                else:
+                    await self.unsubscribe(websocket, job_ids)
+
             elif message_type == "get_status":
                 # Enviar estado actual del job
                 job_id = message_data.get("job_id")
@@ -187,13 +584,54 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"❌ Error manejando mensaje WebSocket: {e}")
     
-    async def _send_job_status(self, websocket: WebSocket, job_id: str):
-        """Enviar estado actual de un job"""
+    async def _send_job_status(
+        self,
+        websocket: WebSocket,
+        job_id: str,
+        last_seq: Optional[int] = None,
+        stream: Optional[str] = None
+    ):
+        """Enviar estado actual de un job (o solo los mensajes posteriores a `last_seq`)"""
+        log = self._event_logs.get(job_id)
+        if log is not None:
+            missed = log.since(last_seq, stream) if last_seq is not None else None
+            if missed is None:
+                # Sin cursor válido: si el canal ya terminó, su mensaje final ya serializado
+                final = log.final_entry()
+                missed = [final] if final else None
+            if missed is not None:
+                texts = await self._replay_texts(job_id, log, missed)
+                # Si el resultado ya no se puede cargar se envía el estado actual
+                if texts is not None:
+                    for text, message_type in texts:
+                        await self._send_text(websocket, text, message_type)
+                    self.messages_replayed += len(texts)
+                    return
+
         # Importar aquí para evitar circular imports
         from services.job_queue_service import job_queue_service
         
+        self.snapshots_sent += 1
         job = await job_queue_service.get_job_status(job_id)
         if not job:
+            # El canal puede ser un lote en lugar de un job
+            from services.batch_transcription_service import batch_transcription_service
+
+            batch = batch_transcription_service.get_batch(job_id)
+            if batch:
+                log = self._event_log(job_id)
+                await self.send_message_to_websocket(
+                    websocket,
+                    WebSocketMessage(
+                        type="batch_completed" if batch.completed_at else "batch_progress",
+                        job_id=job_id,
+                        data=self._batch_summary(batch),
+                        seq=log.seq,
+                        stream=log.stream
+                    )
+                )
+                return
+
             await self.send_message_to_websocket(
                 websocket,
                 WebSocketMessage(
@@ -227,15 +665,55 @@ class WebSocketManager:
         elif job.status.value == "failed":
             message_type = "error"
 
+        # El estado lleva el `seq` actual del canal: desde él se puede reanudar
+        log = self._event_log(job_id)
         await self.send_message_to_websocket(
             websocket,
             WebSocketMessage(
                 type=message_type,
                 job_id=job_id,
-                data=message_data
+                data=message_data,
+                seq=log.seq,
+                stream=log.stream
             )
         )
     
+    async def _replay_texts(
+        self,
+        job_id: str,
+        log: _EventLog,
+        entries: List[Tuple[int, str, str, bool]]
+    ) -> Optional[List[Tuple[str, str]]]:
+        """
+        Textos a reenviar desde el registro, con el resultado del job vuelto a añadir
+        a los mensajes que se guardaron sin él (None si ya no se puede cargar)
+
+        El mensaje final con su resultado se carga y se codifica una sola vez
+        por canal; las reconexiones siguientes reenvían ese texto.
+        """
+        from services.job_queue_service import job_queue_service
+
+        texts = []
+        for seq, text, message_type, result_ref in entries:
+            if result_ref:
+                if log.final_text and log.final_text[0] == seq:
+                    text = log.final_text[1]
+                else:
+                    job = await job_queue_service.get_job_status(job_id)
+                    if job is None or job.result is None:
+                        return None
+                    message_dict = json.loads(text)
+                    message_dict["data"]["result"] = job.result.dict()
+                    self.messages_encoded += 1
+                    text = json.dumps(message_dict, default=str)
+                    final = log.final_entry()
+                    # Solo si el registro sigue vivo (pudo salir por el tope durante la carga)
+                    if final is not None and final[0] == seq and log is self._event_logs.get(job_id):
+                        self._event_log_bytes += len(text) - log.cache_final_text(seq, text)
+                        self._trim_event_logs()
+            texts.append((text, message_type))
+        return texts
+
     async def cleanup_stale_connections(self):
         """Limpiar conexiones inactivas (llamar periódicamente)"""
         current_time = datetime.now()
@@ -260,8 +738,27 @@ class WebSocketManager:
         
         return {
             "total_connections": total_connections,
+            "multiplexed_connections": sum(
+                1 for metadata in self.connection_metadata.values() if not metadata["job_id"]
+            ),
             "jobs_with_connections": jobs_with_connections,
-            "active_jobs": list(self.active_connections.keys())
+            "subscriptions": sum(len(subscribed) for subscribed in self.subscriptions.values()),
+            "active_jobs": list(self.active_connections.keys()),
+            "send_queues": {
+                "max_size": self.send_queue_size,
+                "queued_messages": sum(len(connection.queue) for connection in self._connections.values()),
+                "downgraded_connections": sum(1 for connection in self._connections.values() if connection.downgraded),
+                "messages_encoded": self.messages_encoded,
+                "messages_dropped": self.messages_dropped,
+                "downgrades": self.connections_downgraded,
+                "evictions": self.connections_evicted
+            },
+            "event_logs": {
+                "channels": len(self._event_logs),
+                "size_mb": round(self._event_log_bytes / (1024 * 1024), 2),
+                "messages_replayed": self.messages_replayed,
+                "snapshots_sent": self.snapshots_sent
+            }
         }
 
 
@@ -0,0 +1,33 @@
+"""
+Configuración común de los tests unitarios
+Se ejecutan desde api/: python -m pytest tests
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# Los servicios se importan como en la app (services.*, models.*)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.concurrency_controller import groq_concurrency  # noqa: E402
+from services.job_queue_service import JobQueueService  # noqa: E402
+
+
+@pytest.fixture
+def make_service(monkeypatch, tmp_path):
+    monkeypatch.setenv("JOB_STORE", "memory")
+    monkeypatch.setenv("JOB_QUEUE_MODE", "local")
+    monkeypatch.setenv("JOB_SPILL_DIR", str(tmp_path / "results"))
+    monkeypatch.setenv("JOB_AUDIO_DIR", str(tmp_path / "audio"))
+    monkeypatch.setenv("ETA_REFRESH_SECONDS", "0")
+    # Cada test corre en su propio event loop
+    monkeypatch.setattr(groq_concurrency, "_condition", asyncio.Condition())
+
+    def make(**env) -> JobQueueService:
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return JobQueueService()
+    return make
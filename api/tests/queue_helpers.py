@@ -0,0 +1,78 @@
+"""
+Utilidades de los tests de la cola de jobs: trabajo simulado y envío de jobs
+"""
+
+import asyncio
+
+from models.transcription_models import (
+    AudioInfo,
+    AudioMetadata,
+    TranscriptionRequest,
+    TranscriptionResponse
+)
+from services.job_queue_service import JobQueueService, TERMINAL_STATUSES
+
+
+class FakeWork:
+    """Decodificación y transcripción simuladas que se detienen donde indique el test"""
+
+    def __init__(self, service: JobQueueService):
+        self.decode_gate = asyncio.Event()
+        self.transcribe_gate = asyncio.Event()
+        self.decoding = asyncio.Event()
+        self.transcribing = asyncio.Event()
+        self.decodes = 0
+        self.transcriptions = 0
+        # Errores que lanzarán las próximas transcripciones (en orden)
+        self.errors = []
+        service._decode_audio = self.decode
+        service._transcribe = self.transcribe
+
+    async def decode(self, job):
+        self.decodes += 1
+        self.decoding.set()
+        await self.decode_gate.wait()
+        job.progress = 20.0
+
+    async def transcribe(self, job):
+        self.transcriptions += 1
+        self.transcribing.set()
+        await self.transcribe_gate.wait()
+        if self.errors:
+            raise self.errors.pop(0)
+        return TranscriptionResponse(
+            text="hola",
+            language="es",
+            model_used="fake",
+            audio_info=AudioInfo(duration=1.0, sample_rate=16000, channels=1, format="wav", size_mb=0.03),
+            processing_time=0.1
+        )
+
+
+def make_request(tmp_path, name: str) -> TranscriptionRequest:
+    audio = tmp_path / "audio" / f"{name}.wav"
+    audio.parent.mkdir(exist_ok=True)
+    audio.write_bytes(b"RIFF")
+    return TranscriptionRequest(
+        audio_file_path=str(audio),
+        audio_metadata=AudioMetadata(
+            duration=1.0, sample_rate=16000, channels=1, codec="pcm_s16le",
+            container="wav", size_bytes=4, source="pcm"
+        )
+    )
+
+
+async def submit(service: JobQueueService, tmp_path, name: str, cache_key: str = "same-input") -> str:
+    request = make_request(tmp_path, name)
+    return await service.submit_job(request.audio_file_path, request, cache_key=cache_key)
+
+
+async def wait_terminal(service: JobQueueService, *job_ids: str):
+    """Esperar a que los jobs terminen y salgan del pipeline (ya persistidos)"""
+    async def all_done():
+        while any(
+            service.jobs[job_id].status not in TERMINAL_STATUSES or job_id in service._pipeline_jobs
+            for job_id in job_ids
+        ):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(all_done(), timeout=5)
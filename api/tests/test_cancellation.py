@@ -0,0 +1,157 @@
+"""
+Tests de cancelación de jobs: en cola, durante FFmpeg, durante la llamada a Groq y ya terminados
+"""
+
+import asyncio
+
+import httpx
+
+from models.transcription_models import JobStatus, TranscriptionRequest
+from services import groq_transcription_service
+from services.transcoding_pool import TranscodingPool
+from queue_helpers import FakeWork, submit, wait_terminal
+
+# FFmpeg que tarda 30 s en tiempo real si nadie lo detiene
+SLOW_FFMPEG_ARGS = ['-re', '-f', 'lavfi', '-i', 'anullsrc=r=16000:cl=mono', '-t', '30', '-f', 's16le', 'pipe:1']
+
+
+def test_cancelling_a_queued_job_removes_it_from_the_scheduler(make_service, tmp_path):
+    async def scenario():
+        service = make_service(PIPELINE_DECODE_CONCURRENCY="1")
+        work = FakeWork(service)
+        await service.start()
+        try:
+            running_id = await submit(service, tmp_path, "running", cache_key="running")
+            await asyncio.wait_for(work.decoding.wait(), timeout=5)
+            queued_id = await submit(service, tmp_path, "queued", cache_key="queued")
+            assert service.job_queue.qsize() == 1
+
+            assert await service.cancel_job(queued_id)
+            assert service.job_queue.qsize() == 0
+            assert service.jobs[queued_id].status == JobStatus.CANCELLED
+
+            work.decode_gate.set()
+            work.transcribe_gate.set()
+            await wait_terminal(service, running_id)
+
+            # El cancelado nunca llegó a decodificarse
+            assert work.decodes == 1
+            assert service.jobs[queued_id].status == JobStatus.CANCELLED
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_during_decode_kills_ffmpeg(make_service, tmp_path, monkeypatch):
+    processes = []
+    spawn = asyncio.create_subprocess_exec
+
+    async def recording_spawn(*args, **kwargs):
+        process = await spawn(*args, **kwargs)
+        processes.append(process)
+        return process
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", recording_spawn)
+
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        pool = TranscodingPool()
+
+        async def decode_with_ffmpeg(job):
+            work.decoding.set()
+            await pool.run(SLOW_FFMPEG_ARGS, label="decode", admission=False)
+
+        service._decode_audio = decode_with_ffmpeg
+        await service.start()
+        try:
+            job_id = await submit(service, tmp_path, "job")
+            await asyncio.wait_for(work.decoding.wait(), timeout=5)
+            while not processes:
+                await asyncio.sleep(0.01)
+
+            assert await service.cancel_job(job_id)
+            await wait_terminal(service, job_id)
+
+            assert processes[0].returncode is not None
+            assert service.jobs[job_id].status == JobStatus.CANCELLED
+            assert pool.active == 0 and work.transcriptions == 0
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_during_transcription_aborts_the_groq_call(make_service, tmp_path, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_test")
+    monkeypatch.setenv("GROQ_PREWARM", "false")
+
+    async def scenario():
+        request_started = asyncio.Event()
+        request_aborted = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            request_started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                request_aborted.set()
+                raise
+
+        real_client = httpx.AsyncClient
+
+        class MockedClient(real_client):
+            def __init__(self, **kwargs):
+                super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+        monkeypatch.setattr(httpx, "AsyncClient", MockedClient)
+
+        groq = groq_transcription_service.GroqTranscriptionService()
+        await groq.initialize()
+
+        service = make_service()
+        work = FakeWork(service)
+        work.decode_gate.set()
+
+        async def transcribe_with_groq(job):
+            request = TranscriptionRequest(audio_file_path=job.audio_file_path, return_timestamps=False)
+            return await groq._create_transcription(("audio.wav", b"RIFF"), request)
+
+        service._transcribe = transcribe_with_groq
+        await service.start()
+        try:
+            job_id = await submit(service, tmp_path, "job")
+            await asyncio.wait_for(request_started.wait(), timeout=5)
+
+            assert await service.cancel_job(job_id)
+            await asyncio.wait_for(request_aborted.wait(), timeout=5)
+            await wait_terminal(service, job_id)
+
+            assert service.jobs[job_id].status == JobStatus.CANCELLED
+        finally:
+            await service.stop()
+            await groq.close()
+
+    asyncio.run(scenario())
+
+
+def test_a_finished_job_cannot_be_cancelled(make_service, tmp_path):
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        work.decode_gate.set()
+        work.transcribe_gate.set()
+        await service.start()
+        try:
+            job_id = await submit(service, tmp_path, "job")
+            await wait_terminal(service, job_id)
+
+            assert not await service.cancel_job(job_id)
+            job = service.jobs[job_id]
+            assert job.status == JobStatus.COMPLETED and job.result.text == "hola"
+            assert (await service.store.get_transitions(job_id))[-1]["status"] == "completed"
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
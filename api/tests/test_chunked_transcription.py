@@ -0,0 +1,106 @@
+"""
+Tests de la planificación de ventanas y del cosido de resultados del audio largo
+"""
+
+from typing import List, Optional, Tuple
+
+import pytest
+
+from models.transcription_models import AudioInfo, TranscriptionResponse, TranscriptionSegment
+from services.chunked_transcription import ChunkedTranscriptionEngine
+
+
+@pytest.fixture
+def engine(monkeypatch) -> ChunkedTranscriptionEngine:
+    monkeypatch.setenv("LONG_AUDIO_WINDOW_SECONDS", "60")
+    monkeypatch.setenv("LONG_AUDIO_OVERLAP_SECONDS", "5")
+    return ChunkedTranscriptionEngine()
+
+
+def response(text: str, segments: Optional[List[Tuple[float, float, str]]] = None) -> TranscriptionResponse:
+    return TranscriptionResponse(
+        text=text,
+        language="es",
+        model_used="whisper-large-v3-turbo",
+        segments=[
+            TranscriptionSegment(id=i, start=start, end=end, text=segment_text)
+            for i, (start, end, segment_text) in enumerate(segments)
+        ] if segments is not None else None,
+        audio_info=AudioInfo(duration=60, sample_rate=16000, channels=1, format="pcm_s16le", size_mb=1.8),
+        processing_time=1.0
+    )
+
+
+def test_windows_cover_audio_with_overlap(engine):
+    windows = engine.plan_windows(170)
+
+    assert windows[0][0] == 0 and windows[-1][1] == 170
+    for (_, previous_end), (start, end) in zip(windows, windows[1:]):
+        assert previous_end - start == pytest.approx(engine.overlap_seconds)
+        assert end - start <= engine.window_seconds
+
+
+def test_tiny_last_window_is_absorbed(engine):
+    # 55s de paso: la cuarta ventana (165s-173s) solo tendría 8s
+    windows = engine.plan_windows(173)
+
+    assert len(windows) == 3
+    assert windows[-1] == (110.0, 173.0)
+
+
+def test_stitch_cuts_overlap_at_midpoint_with_absolute_timestamps(engine):
+    windows = [(0.0, 60.0), (55.0, 120.0)]
+    results = [
+        response("hola a todos esto es una prueba", [
+            (0.0, 4.0, "hola a todos"),
+            (50.0, 56.0, "esto es una prueba"),
+            (56.5, 60.0, "del corte")
+        ]),
+        response("una prueba del corte y sigue", [
+            (0.0, 1.0, "una prueba"),
+            (1.5, 5.0, "del corte"),
+            (6.0, 10.0, "y sigue")
+        ])
+    ]
+
+    text, segments = engine._stitch(windows, results)
+
+    # Corte en 57.5s: cada segmento se queda en la ventana que contiene su centro
+    assert [(s.start, s.end, s.text) for s in segments] == [
+        (0.0, 4.0, "hola a todos"),
+        (50.0, 56.0, "esto es una prueba"),
+        (56.5, 60.0, "del corte"),
+        (61.0, 65.0, "y sigue")
+    ]
+    assert [s.id for s in segments] == [0, 1, 2, 3]
+    assert text == "hola a todos esto es una prueba del corte y sigue"
+
+
+def test_stitch_drops_words_repeated_across_the_cut(engine):
+    windows = [(0.0, 60.0), (55.0, 120.0)]
+    results = [
+        response("", [(40.0, 57.0, "vamos a ver el resultado final")]),
+        # La ventana siguiente repite el final (con otra puntuación) en un segmento que cae tras el corte
+        response("", [(3.0, 8.0, "Resultado final, y después más")])
+    ]
+
+    text, segments = engine._stitch(windows, results)
+
+    assert [s.text for s in segments] == ["vamos a ver el resultado final", "y después más"]
+    assert segments[1].start == 58.0
+    assert text == "vamos a ver el resultado final y después más"
+
+
+def test_stitch_text_only_dedupes_by_word_overlap(engine):
+    windows = [(0.0, 60.0), (55.0, 120.0), (115.0, 170.0)]
+    results = [
+        response("uno dos tres cuatro cinco"),
+        response("Cuatro, cinco. Seis siete"),
+        response("siete ocho")
+    ]
+
+    text, segments = engine._stitch(windows, results)
+
+    assert segments == []
+    # Se exigen dos palabras repetidas: "siete" solo no se elimina
+    assert text == "uno dos tres cuatro cinco Seis siete siete ocho"
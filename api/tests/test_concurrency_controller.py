@@ -0,0 +1,161 @@
+"""
+Tests del control adaptativo de concurrencia hacia Groq (AIMD)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from groq import RateLimitError
+
+from models.transcription_models import TranscriptionRequest
+from services import concurrency_controller, groq_transcription_service
+from services.concurrency_controller import AdaptiveConcurrencyLimiter
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    """Reloj manual para el enfriamiento del controlador"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(concurrency_controller, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def make_limiter(monkeypatch, clock):
+    def make(**env) -> AdaptiveConcurrencyLimiter:
+        for name in ("GROQ_ADAPTIVE_CONCURRENCY", "GROQ_CONCURRENCY_MIN", "GROQ_CONCURRENCY_MAX",
+                     "GROQ_CONCURRENCY_INITIAL", "GROQ_LATENCY_TOLERANCE", "GROQ_BACKOFF_FACTOR",
+                     "GROQ_LATENCY_WINDOW", "GROQ_LATENCY_SLOW_SAMPLES"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return AdaptiveConcurrencyLimiter()
+    return make
+
+
+def test_additive_increase_only_when_saturated_and_latency_is_stable(make_limiter):
+    limiter = make_limiter(GROQ_CONCURRENCY_INITIAL="2", GROQ_CONCURRENCY_MAX="4")
+
+    limiter._record_success(1.0, MB, saturated=False)
+    assert limiter.limit == 2.0
+
+    # +1/límite por llamada saturada: algo más de un hueco por cada `límite` llamadas
+    limiter._record_success(1.0, MB, saturated=True)
+    assert limiter.limit == pytest.approx(2.5)
+    limiter._record_success(1.0, MB, saturated=True)
+    limiter._record_success(1.0, MB, saturated=True)
+    assert limiter.current_limit == 3
+
+    for _ in range(20):
+        limiter._record_success(1.0, MB, saturated=True)
+    assert limiter.current_limit == 4
+
+
+def test_overload_cuts_multiplicatively_down_to_the_minimum(make_limiter, clock):
+    limiter = make_limiter(GROQ_CONCURRENCY_INITIAL="8", GROQ_CONCURRENCY_MIN="2", GROQ_BACKOFF_FACTOR="0.5")
+
+    limiter.record_overload("HTTP 429 de Groq")
+    assert limiter.current_limit == 4
+
+    for _ in range(3):
+        clock.now += 60
+        limiter.record_overload("HTTP 503 de Groq")
+    assert limiter.current_limit == 2
+
+
+def test_cooldown_turns_a_burst_into_one_signal(make_limiter, clock):
+    limiter = make_limiter(GROQ_CONCURRENCY_INITIAL="8", GROQ_BACKOFF_FACTOR="0.5")
+
+    for _ in range(5):
+        limiter.record_overload("HTTP 429 de Groq")
+    assert limiter.current_limit == 4
+    assert limiter.overloads == 5
+
+    # Durante el enfriamiento tampoco se sube
+    limiter._record_success(1.0, MB, saturated=True)
+    assert limiter.limit == 4.0
+
+    clock.now += 2.0
+    limiter.record_overload("HTTP 429 de Groq")
+    assert limiter.current_limit == 2
+
+
+def test_only_a_streak_of_slow_calls_cuts_the_limit(make_limiter, clock):
+    limiter = make_limiter(GROQ_CONCURRENCY_INITIAL="10", GROQ_LATENCY_SLOW_SAMPLES="3", GROQ_LATENCY_TOLERANCE="1.5")
+    for _ in range(10):
+        limiter._record_success(1.0, MB, saturated=False)
+
+    # Una lenta aislada, o dos seguidas de una normal, son ruido
+    limiter._record_success(5.0, MB, saturated=False)
+    limiter._record_success(5.0, MB, saturated=False)
+    limiter._record_success(1.0, MB, saturated=False)
+    assert limiter.limit == 10.0 and limiter.slow_streak == 0
+
+    for _ in range(3):
+        limiter._record_success(5.0, MB, saturated=False)
+    assert limiter.limit == pytest.approx(9.0)
+    # La base es la mediana: las lentas no la arrastran
+    assert limiter.baseline_latency == pytest.approx(1.0)
+
+
+def test_latency_is_normalised_by_upload_size(make_limiter):
+    limiter = make_limiter(GROQ_CONCURRENCY_INITIAL="10", GROQ_LATENCY_SLOW_SAMPLES="1")
+    for _ in range(5):
+        limiter._record_success(1.0, MB, saturated=False)
+
+    # Un archivo 8 veces mayor que tarda 8 veces más no es una llamada lenta
+    limiter._record_success(8.0, 8 * MB, saturated=False)
+    assert limiter.limit == 10.0
+
+
+def test_a_rate_limited_call_is_one_overload_signal(monkeypatch, make_limiter):
+    limiter = make_limiter(GROQ_CONCURRENCY_INITIAL="8")
+    monkeypatch.setattr(groq_transcription_service, "groq_concurrency", limiter)
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_test")
+    monkeypatch.setenv("GROQ_PREWARM", "false")
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "rate limit"}})
+
+    real_client = httpx.AsyncClient
+
+    class MockedClient(real_client):
+        def __init__(self, **kwargs):
+            super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(httpx, "AsyncClient", MockedClient)
+
+    async def scenario():
+        service = groq_transcription_service.GroqTranscriptionService()
+        await service.initialize()
+        try:
+            request = TranscriptionRequest(audio_file_path="audio.wav", return_timestamps=False)
+            with pytest.raises(RateLimitError):
+                await service._create_transcription(("audio.wav", b"RIFF"), request)
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
+
+    # Una sola petición (sin reintentos del SDK) y una sola señal de sobrecarga
+    assert len(requests) == 1
+    assert limiter.overloads == 1
+    assert limiter.current_limit == 4
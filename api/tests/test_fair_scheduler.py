@@ -0,0 +1,129 @@
+"""
+Tests del planificador justo (DRR ponderado, prioridad estricta y límite por tenant)
+"""
+
+import asyncio
+
+import pytest
+
+from services.fair_scheduler import FairScheduler
+
+
+@pytest.fixture
+def make_scheduler(monkeypatch):
+    def make(**env) -> FairScheduler:
+        for name in ("FAIR_QUANTUM_SECONDS", "FAIR_DEFAULT_COST_SECONDS", "TENANT_WEIGHTS", "TENANT_MAX_CONCURRENT"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return FairScheduler()
+    return make
+
+
+def drain(scheduler: FairScheduler, count: int):
+    """Sacar `count` jobs liberando cada uno al momento (sin límite de concurrencia en juego)"""
+    async def run():
+        picked = []
+        for _ in range(count):
+            job_id, tenant_id = await asyncio.wait_for(scheduler.get(), timeout=1)
+            scheduler.release(tenant_id)
+            picked.append((job_id, tenant_id))
+        return picked
+    return asyncio.run(run())
+
+
+def test_drr_shares_audio_seconds_between_tenants_with_different_costs(make_scheduler):
+    scheduler = make_scheduler(FAIR_QUANTUM_SECONDS="300")
+    costs = {"short": 30.0, "long": 300.0}
+    for i in range(100):
+        scheduler.put_nowait(f"short-{i}", "short", cost_seconds=costs["short"])
+        scheduler.put_nowait(f"long-{i}", "long", cost_seconds=costs["long"])
+
+    served = {"short": 0.0, "long": 0.0}
+    for _, tenant_id in drain(scheduler, 60):
+        served[tenant_id] += costs[tenant_id]
+
+    # Ambos reciben los mismos segundos de audio (± un job largo), no el mismo número de jobs
+    assert abs(served["short"] - served["long"]) <= costs["long"]
+    assert served["short"] > 0 and served["long"] > 0
+
+
+def test_drr_respects_tenant_weights(make_scheduler):
+    scheduler = make_scheduler(FAIR_QUANTUM_SECONDS="100", TENANT_WEIGHTS="gold:3,basic:1")
+    for i in range(200):
+        scheduler.put_nowait(f"gold-{i}", "gold", cost_seconds=50)
+        scheduler.put_nowait(f"basic-{i}", "basic", cost_seconds=50)
+
+    picked = [tenant_id for _, tenant_id in drain(scheduler, 120)]
+
+    assert picked.count("gold") / picked.count("basic") == pytest.approx(3.0, rel=0.1)
+
+
+def test_higher_priority_is_served_first(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.put_nowait("low-1", "a", priority=0)
+    scheduler.put_nowait("low-2", "b", priority=0)
+    scheduler.put_nowait("high-1", "b", priority=5)
+    scheduler.put_nowait("mid-1", "a", priority=1)
+    scheduler.put_nowait("high-2", "a", priority=5)
+
+    picked = [job_id for job_id, _ in drain(scheduler, 5)]
+
+    assert set(picked[:2]) == {"high-1", "high-2"}
+    assert picked[2] == "mid-1"
+    assert set(picked[3:]) == {"low-1", "low-2"}
+
+
+def test_tenant_at_concurrency_limit_is_skipped_until_release(make_scheduler):
+    scheduler = make_scheduler(TENANT_MAX_CONCURRENT="1")
+    scheduler.put_nowait("a-1", "a")
+    scheduler.put_nowait("a-2", "a")
+    scheduler.put_nowait("b-1", "b")
+
+    async def run():
+        first = await scheduler.get()
+        second = await scheduler.get()
+        assert first == ("a-1", "a")
+        # "a" está en su límite: se salta y se despacha "b" aunque "a" tenga trabajo
+        assert second == ("b-1", "b")
+
+        # Con ambos tenants en su límite, get espera hasta que uno libere
+        waiter = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        scheduler.release("a")
+        assert await asyncio.wait_for(waiter, timeout=1) == ("a-2", "a")
+
+    asyncio.run(run())
+
+
+def test_remove_drops_a_queued_job(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.put_nowait("a-1", "a")
+    scheduler.put_nowait("a-2", "a")
+    scheduler.put_nowait("b-1", "b", priority=2)
+
+    assert scheduler.remove("a-1")
+    assert scheduler.remove("b-1")
+    assert not scheduler.remove("b-1")
+    assert scheduler.qsize() == 1
+    assert scheduler.get_stats()["priority_levels"] == [0]
+
+    assert drain(scheduler, 1) == [("a-2", "a")]
+    assert scheduler.qsize() == 0
+
+
+def test_work_ahead_counts_higher_levels_and_weighted_share_of_other_tenants(make_scheduler):
+    scheduler = make_scheduler(TENANT_WEIGHTS="gold:3")
+    scheduler.put_nowait("urgent", "other", priority=1, cost_seconds=50)
+    for i in range(3):
+        scheduler.put_nowait(f"basic-{i}", "basic", cost_seconds=100)
+    scheduler.put_nowait("gold-0", "gold", cost_seconds=600)
+
+    # Nivel superior completo + 200s propios + lo que "gold" despacha mientras (3×200s, hasta 600s)
+    assert scheduler.work_ahead("basic-1") == pytest.approx(50 + 200 + 600)
+    # "gold" pesa 3 veces más: mientras despacha 600s, "basic" solo 200s
+    assert scheduler.work_ahead("gold-0") == pytest.approx(50 + 600 + 200)
+    assert scheduler.work_ahead("urgent") == pytest.approx(50)
+    assert scheduler.work_ahead("missing") is None
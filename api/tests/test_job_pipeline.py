@@ -0,0 +1,83 @@
+"""
+Tests del pipeline por etapas: paso entre etapas con backpressure y reintentos
+que reutilizan el audio ya decodificado
+"""
+
+import asyncio
+
+import httpx
+from groq import InternalServerError
+
+from models.transcription_models import JobStatus
+from services.retry_policy import RetryPolicy, job_retry_policies
+from queue_helpers import FakeWork, submit, wait_terminal
+
+
+async def wait_until(condition, timeout: float = 5):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout=timeout)
+
+
+def test_decoded_jobs_wait_for_transcription_while_others_decode(make_service, tmp_path):
+    async def scenario():
+        service = make_service(JOB_MAX_CONCURRENT="1", PIPELINE_TRANSCRIBE_QUEUE="1")
+        work = FakeWork(service)
+        work.decode_gate.set()
+        await service.start()
+        try:
+            first = await submit(service, tmp_path, "first", cache_key="first")
+            await asyncio.wait_for(work.transcribing.wait(), timeout=5)
+
+            # Mientras Groq atiende al primero, el segundo se decodifica y espera su turno
+            second = await submit(service, tmp_path, "second", cache_key="second")
+            await wait_until(lambda: service.transcribe_stage.queue_depth() == 1)
+            assert service._job_stages[second][0] == "decoded"
+
+            # Con la cola de transcribe llena, el tercero se decodifica y bloquea a su worker
+            third = await submit(service, tmp_path, "third", cache_key="third")
+            await wait_until(lambda: service.decode_stage.blocked == 1)
+            assert work.decodes == 3 and work.transcriptions == 1
+
+            work.transcribe_gate.set()
+            await wait_terminal(service, first, second, third)
+
+            assert all(service.jobs[job_id].status == JobStatus.COMPLETED for job_id in (first, second, third))
+            assert [stage.processed for stage in service.stages] == [3, 3, 3]
+            assert service.decode_stage.blocked == 0
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_transient_error_retries_transcription_with_the_decoded_audio(make_service, tmp_path, monkeypatch):
+    monkeypatch.setitem(job_retry_policies.policies, "server_error", RetryPolicy(3, 0.01, 0.01))
+
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        request = httpx.Request("POST", "https://api.groq.com/openai/v1/audio/transcriptions")
+        work.errors.append(InternalServerError(
+            "HTTP 500", response=httpx.Response(500, request=request), body=None
+        ))
+        work.decode_gate.set()
+        work.transcribe_gate.set()
+        await service.start()
+        try:
+            job_id = await submit(service, tmp_path, "job")
+            await wait_terminal(service, job_id)
+
+            job = service.jobs[job_id]
+            assert job.status == JobStatus.COMPLETED and job.retries == 1
+            # Solo se repitió la llamada a Groq
+            assert work.decodes == 1 and work.transcriptions == 2
+            assert service.retried_jobs == 1
+
+            messages = [entry["message"] for entry in await service.store.get_transitions(job_id)]
+            assert any("reintento 1/3" in message for message in messages)
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
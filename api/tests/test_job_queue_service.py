@@ -0,0 +1,66 @@
+"""
+Tests del ciclo de vida de los jobs: recuperación tras un reinicio y audio en el
+directorio duradero
+"""
+
+import asyncio
+import os
+
+from models.transcription_models import JobStatus
+from queue_helpers import FakeWork, submit, wait_terminal
+
+
+def test_queued_job_is_recovered_after_a_restart(make_service, tmp_path):
+    store_env = {"JOB_STORE": "sqlite", "JOB_STORE_PATH": str(tmp_path / "jobs.db")}
+
+    async def scenario():
+        service = make_service(**store_env)
+        work = FakeWork(service)
+        await service.start()
+        job_id = await submit(service, tmp_path, "interrupted", cache_key=None)
+        audio_path = service.jobs[job_id].audio_file_path
+        await asyncio.wait_for(work.decoding.wait(), timeout=5)
+        await service.stop()
+
+        # El audio sigue en el directorio duradero y el job, en cola en el store
+        assert os.path.exists(audio_path)
+        restarted = make_service(**store_env)
+        work = FakeWork(restarted)
+        await restarted.start()
+        try:
+            # Al arrancar se re-encola y vuelve a empezar con su audio
+            await asyncio.wait_for(work.decoding.wait(), timeout=5)
+            assert restarted.jobs[job_id].audio_file_path == audio_path
+
+            work.decode_gate.set()
+            work.transcribe_gate.set()
+            await wait_terminal(restarted, job_id)
+            assert restarted.jobs[job_id].status == JobStatus.COMPLETED
+            assert restarted.jobs[job_id].result.text == "hola"
+            # El audio se borra cuando el job termina
+            assert not os.path.exists(audio_path)
+        finally:
+            await restarted.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_keeps_its_audio_for_the_dead_letter(make_service, tmp_path):
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        work.errors.append(ValueError("audio corrupto"))
+        work.decode_gate.set()
+        work.transcribe_gate.set()
+        await service.start()
+        try:
+            job_id = await submit(service, tmp_path, "broken", cache_key=None)
+            await wait_terminal(service, job_id)
+
+            job = service.jobs[job_id]
+            assert job.status == JobStatus.FAILED
+            assert os.path.exists(job.audio_file_path)
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
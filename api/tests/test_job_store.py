@@ -0,0 +1,230 @@
+"""
+Tests del job store SQLite sobre un archivo temporal (persistencia, reclamos, leases, guarda de cancelados y feed de cambios)
+"""
+
+import asyncio
+from datetime import datetime
+
+from models.transcription_models import JobStatus, TranscriptionJob, TranscriptionRequest
+from services.job_store import SQLiteJobStore, InMemoryJobStore
+
+
+def make_job(job_id: str, status: JobStatus = JobStatus.QUEUED, **fields) -> TranscriptionJob:
+    return TranscriptionJob(
+        job_id=job_id,
+        status=status,
+        audio_file_path=f"/tmp/{job_id}.wav",
+        request_params=TranscriptionRequest(audio_file_path=f"/tmp/{job_id}.wav"),
+        **fields
+    )
+
+
+def run_with_stores(path, scenario, count: int = 1):
+    """Ejecutar `scenario(*stores)` con `count` stores sobre el mismo archivo (como varios procesos)"""
+    async def run():
+        stores = [SQLiteJobStore(str(path)) for _ in range(count)]
+        for store in stores:
+            await store.initialize()
+        try:
+            return await scenario(*stores)
+        finally:
+            for store in stores:
+                await store.close()
+    return asyncio.run(run())
+
+
+def test_jobs_survive_reopening_the_database(tmp_path):
+    async def write(store):
+        await store.save(make_job("job-1", JobStatus.PROCESSING, progress=35.0, message="Transcribiendo"))
+
+    async def read(store):
+        job = await store.get("job-1")
+        assert job.status == JobStatus.PROCESSING
+        assert job.progress == 35.0
+        assert job.message == "Transcribiendo"
+        assert job.request_params.audio_file_path == "/tmp/job-1.wav"
+        assert await store.get("missing") is None
+
+    run_with_stores(tmp_path / "jobs.db", write)
+    run_with_stores(tmp_path / "jobs.db", read)
+
+
+def test_load_unfinished_returns_pending_work_in_creation_order(tmp_path):
+    async def scenario(store):
+        await store.save(make_job("queued-late", created_at=datetime(2026, 1, 1, 12, 5)))
+        await store.save(make_job("processing", JobStatus.PROCESSING, created_at=datetime(2026, 1, 1, 12, 0)))
+        await store.save(make_job("done", JobStatus.COMPLETED, created_at=datetime(2026, 1, 1, 11, 0)))
+        await store.save(make_job("failed", JobStatus.FAILED, created_at=datetime(2026, 1, 1, 11, 0)))
+
+        unfinished = await store.load_unfinished()
+        assert [job.job_id for job in unfinished] == ["processing", "queued-late"]
+
+    run_with_stores(tmp_path / "jobs.db", scenario)
+
+
+def test_transitions_record_each_state_change(tmp_path):
+    async def scenario(store):
+        job = make_job("job-1", message="En cola")
+        await store.save(job)
+        await store.save(job.model_copy(update={"status": JobStatus.PROCESSING, "message": "Procesando"}))
+        # Progreso intermedio: se guarda el estado sin añadir transición
+        await store.save(job.model_copy(update={"status": JobStatus.PROCESSING, "progress": 50.0}), transition=False)
+        await store.save(job.model_copy(update={"status": JobStatus.COMPLETED, "message": "Listo"}))
+
+        transitions = await store.get_transitions("job-1")
+        assert [(t["status"], t["message"]) for t in transitions] == [
+            ("queued", "En cola"),
+            ("processing", "Procesando"),
+            ("completed", "Listo")
+        ]
+
+    run_with_stores(tmp_path / "jobs.db", scenario)
+
+
+class _RacingConnection:
+    """Conexión que ejecuta `interleave` justo después de leer el candidato de un reclamo"""
+
+    def __init__(self, connection, interleave):
+        self._connection = connection
+        self._interleave = interleave
+
+    def __enter__(self):
+        return self._connection.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._connection.__exit__(*exc_info)
+
+    def execute(self, sql, *args):
+        cursor = self._connection.execute(sql, *args)
+        if "SELECT job_id FROM jobs j" not in sql or self._interleave is None:
+            return cursor
+
+        row = cursor.fetchone()
+        interleave, self._interleave = self._interleave, None
+        interleave()
+        return _Row(row)
+
+
+class _Row:
+    def __init__(self, row):
+        self._row = row
+
+    def fetchone(self):
+        return self._row
+
+
+def test_claim_is_conditional_across_processes(tmp_path):
+    async def scenario(first, second):
+        await first.save(make_job("job-1"))
+
+        # Otro proceso reclama el mismo candidato entre la lectura y el UPDATE de `first`
+        winner = []
+        first._connection = _RacingConnection(
+            first._connection, lambda: winner.append(second._claim_sync("worker-b", 30))
+        )
+
+        assert await first.claim("worker-a", 30) is None
+        assert winner[0] is not None
+
+        claimed = await second.get("job-1")
+        assert claimed.status == JobStatus.PROCESSING
+
+        # Con el lease vigente nadie más puede reclamarlo
+        first._connection = first._connection._connection
+        assert await first.claim("worker-c", 30) is None
+        assert await second.claim("worker-c", 30) is None
+
+    run_with_stores(tmp_path / "jobs.db", scenario, count=2)
+
+
+def test_claim_prefers_higher_priority(tmp_path):
+    async def scenario(store):
+        await store.save(make_job("low"))
+        await store.save(make_job("high", priority=5))
+
+        assert (await store.claim("worker-a", 30)).job_id == "high"
+        assert (await store.claim("worker-a", 30)).job_id == "low"
+
+    run_with_stores(tmp_path / "jobs.db", scenario)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path):
+    async def scenario(first, second):
+        await first.save(make_job("job-1"))
+        assert (await first.claim("worker-a", 0.05)).job_id == "job-1"
+        assert await first.heartbeat("job-1", "worker-a", 0.05)
+
+        # worker-a deja de renovar: al vencer el lease el job vuelve a ser reclamable
+        await asyncio.sleep(0.1)
+        reclaimed = await second.claim("worker-b", 30)
+        assert reclaimed is not None and reclaimed.job_id == "job-1"
+
+        # El dueño anterior ya no puede renovar un lease que no es suyo
+        assert not await first.heartbeat("job-1", "worker-a", 30)
+        assert await second.heartbeat("job-1", "worker-b", 30)
+
+    run_with_stores(tmp_path / "jobs.db", scenario, count=2)
+
+
+def test_upsert_never_overwrites_a_cancelled_row(tmp_path):
+    async def scenario(store):
+        job = make_job("job-1", JobStatus.PROCESSING, progress=40.0)
+        await store.save(job)
+
+        await store.save(job.model_copy(update={"status": JobStatus.CANCELLED, "message": "Job cancelado"}))
+
+        # Un worker que no vio la cancelación escribe progreso y luego el resultado
+        await store.save(job.model_copy(update={"progress": 80.0, "message": "Transcribiendo"}))
+        await store.save(job.model_copy(update={"status": JobStatus.COMPLETED, "progress": 100.0}))
+
+        stored = await store.get("job-1")
+        assert stored.status == JobStatus.CANCELLED
+        assert stored.progress == 40.0
+        assert stored.message == "Job cancelado"
+
+    run_with_stores(tmp_path / "jobs.db", scenario)
+
+
+def test_updates_feed_follows_write_order(tmp_path):
+    async def scenario(writer, reader):
+        updates, cursor = await reader.list_updated_since(None)
+        assert updates == []
+
+        await writer.save(make_job("job-a"))
+        await writer.save(make_job("job-b"))
+        await writer.save(make_job("job-a", JobStatus.PROCESSING, progress=10.0))
+
+        # Cada fila aparece una vez, en el orden de su última escritura
+        updates, cursor = await reader.list_updated_since(cursor)
+        assert [(job.job_id, job.status) for job in updates] == [
+            ("job-b", JobStatus.QUEUED),
+            ("job-a", JobStatus.PROCESSING)
+        ]
+
+        updates, same_cursor = await reader.list_updated_since(cursor)
+        assert updates == [] and same_cursor == cursor
+
+        # Un reclamo también avanza la secuencia
+        await writer.claim("worker-a", 30)
+        updates, next_cursor = await reader.list_updated_since(cursor)
+        assert [job.job_id for job in updates] == ["job-b"]
+        assert int(next_cursor) > int(cursor)
+
+    run_with_stores(tmp_path / "jobs.db", scenario, count=2)
+
+
+def test_in_memory_store_counts_unfinished_jobs_without_a_shared_queue():
+    async def scenario():
+        store = InMemoryJobStore()
+        await store.save(make_job("queued"))
+        await store.save(make_job("running"))
+        await store.save(make_job("running", JobStatus.PROCESSING))
+        await store.save(make_job("done", JobStatus.COMPLETED))
+
+        assert await store.count_by_status() == {"pending": 0, "queued": 1, "processing": 1}
+        # La cola es la de JobQueueService: no hay reclamos ni feed de otros procesos
+        assert await store.claim("worker-a", 30) is None
+        assert await store.heartbeat("running", "worker-a", 30) is False
+        assert await store.list_updated_since(None) == ([], "0")
+
+    asyncio.run(scenario())
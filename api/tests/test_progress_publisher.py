@@ -0,0 +1,108 @@
+"""
+Tests del publicador de progreso: fusión de actualizaciones (gana la última) y
+estados finales sin esperar al intervalo
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from models.transcription_models import JobStatus, TranscriptionJob, TranscriptionRequest
+from services.progress_publisher import ProgressPublisher
+
+
+@pytest.fixture
+def make_publisher(monkeypatch):
+    def factory(rate: float = 10):
+        monkeypatch.setenv("PROGRESS_MAX_UPDATES_PER_SECOND", str(rate))
+        return ProgressPublisher()
+    return factory
+
+
+def make_job(job_id: str = "job-1") -> TranscriptionJob:
+    return TranscriptionJob(
+        job_id=job_id,
+        status=JobStatus.PROCESSING,
+        audio_file_path="/tmp/audio.wav",
+        request_params=TranscriptionRequest(audio_file_path="/tmp/audio.wav")
+    )
+
+
+class Recorder:
+    """Callback que guarda (estado, progreso, instante) de cada entrega"""
+
+    def __init__(self):
+        self.sent = []
+        self.delivered = asyncio.Event()
+
+    async def __call__(self, job: TranscriptionJob):
+        self.sent.append((job.status, job.progress, time.monotonic()))
+        self.delivered.set()
+
+
+def test_updates_within_the_interval_are_merged_into_the_latest(make_publisher):
+    async def scenario():
+        publisher = make_publisher(rate=10)
+        recorder = Recorder()
+        job = make_job()
+
+        job.progress = 10.0
+        publisher.publish(job, recorder)
+        await asyncio.wait_for(recorder.delivered.wait(), timeout=5)
+
+        # Ráfaga dentro del intervalo: solo debe salir la última
+        for progress in (20.0, 30.0, 40.0):
+            job.progress = progress
+            publisher.publish(job, recorder)
+        await publisher.drain()
+
+        assert [progress for _, progress, _ in recorder.sent] == [10.0, 40.0]
+        assert recorder.sent[1][2] - recorder.sent[0][2] >= publisher.min_interval * 0.9
+        assert publisher.coalesced == 2 and publisher.delivered == 2
+
+    asyncio.run(scenario())
+
+
+def test_published_state_is_a_snapshot(make_publisher):
+    async def scenario():
+        publisher = make_publisher()
+        recorder = Recorder()
+        job = make_job()
+
+        job.progress = 50.0
+        publisher.publish(job, recorder)
+        # El worker sigue modificando el job antes de que salga el envío
+        job.progress = 75.0
+        await publisher.drain()
+
+        assert [progress for _, progress, _ in recorder.sent] == [50.0]
+
+    asyncio.run(scenario())
+
+
+def test_final_state_skips_the_interval_and_releases_the_channel(make_publisher):
+    async def scenario():
+        publisher = make_publisher(rate=1)
+        recorder = Recorder()
+        job = make_job()
+
+        job.progress = 10.0
+        publisher.publish(job, recorder)
+        await asyncio.wait_for(recorder.delivered.wait(), timeout=5)
+
+        job.progress = 90.0
+        publisher.publish(job, recorder)
+        job.status, job.progress = JobStatus.COMPLETED, 100.0
+        publisher.publish(job, recorder)
+        await asyncio.wait_for(publisher.drain(), timeout=5)
+
+        # El final reemplaza al progreso pendiente y sale sin esperar el segundo del intervalo
+        assert [(status, progress) for status, progress, _ in recorder.sent] == [
+            (JobStatus.PROCESSING, 10.0),
+            (JobStatus.COMPLETED, 100.0)
+        ]
+        assert recorder.sent[1][2] - recorder.sent[0][2] < publisher.min_interval / 2
+        assert publisher.get_stats()["active_jobs"] == 0
+
+    asyncio.run(scenario())
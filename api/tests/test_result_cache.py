@@ -0,0 +1,94 @@
+"""
+Tests de la caché de resultados: estabilidad de la clave y capa en disco
+"""
+
+import asyncio
+
+import pytest
+
+from models.transcription_models import AudioInfo, TranscriptionResponse
+from services.result_cache import TranscriptionResultCache
+
+CONTENT_SHA256 = "ab" * 32
+PARAMS = {
+    "language": "es",
+    "model": "whisper-large-v3-turbo",
+    "temperature": 0.0,
+    "initial_prompt": None,
+    "return_timestamps": True
+}
+
+
+@pytest.fixture
+def make_cache(monkeypatch, tmp_path):
+    def factory(**env):
+        monkeypatch.setenv("TRANSCRIPTION_CACHE_DIR", str(tmp_path / "cache"))
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return TranscriptionResultCache()
+    return factory
+
+
+def make_response(text: str = "hola") -> TranscriptionResponse:
+    return TranscriptionResponse(
+        text=text,
+        language="es",
+        model_used="whisper-large-v3-turbo",
+        audio_info=AudioInfo(duration=1.0, sample_rate=16000, channels=1, format="wav", size_mb=0.03),
+        processing_time=0.1
+    )
+
+
+def test_cache_key_is_stable_across_processes():
+    # La capa en disco sobrevive a reinicios: la clave no puede depender del proceso
+    assert TranscriptionResultCache.build_key(CONTENT_SHA256, PARAMS) == (
+        "319cb399d499f93e7cb5e1fbb7ae16f2c8d1fd6c6b6e1b55b6394a8ee0c271f9"
+    )
+
+
+def test_cache_key_only_depends_on_content_and_transcription_params():
+    key = TranscriptionResultCache.build_key(CONTENT_SHA256, PARAMS)
+
+    reordered = dict(reversed(list(PARAMS.items())))
+    assert TranscriptionResultCache.build_key(CONTENT_SHA256, reordered) == key
+    assert TranscriptionResultCache.build_key(CONTENT_SHA256, {**PARAMS, "tenant_id": "otro"}) == key
+
+    assert TranscriptionResultCache.build_key("cd" * 32, PARAMS) != key
+    assert TranscriptionResultCache.build_key(CONTENT_SHA256, {**PARAMS, "language": "en"}) != key
+    assert TranscriptionResultCache.build_key(CONTENT_SHA256, {**PARAMS, "temperature": 0.2}) != key
+
+
+def test_disk_entries_survive_a_restart(make_cache):
+    key = TranscriptionResultCache.build_key(CONTENT_SHA256, PARAMS)
+
+    async def write():
+        await make_cache().put(key, make_response())
+
+    async def read():
+        cache = make_cache()
+        response = await cache.get(key)
+        assert response.text == "hola"
+        assert response.config["cache_hit"] is True
+        assert cache.disk_hits == 1
+
+    asyncio.run(write())
+    asyncio.run(read())
+
+
+def test_unreadable_disk_entry_is_dropped(make_cache):
+    key = TranscriptionResultCache.build_key(CONTENT_SHA256, PARAMS)
+    asyncio.run(make_cache().put(key, make_response()))
+
+    cache = make_cache()
+    path = cache._disk_path(key)
+    path.write_bytes(b"no es gzip")
+
+    assert asyncio.run(cache.get(key)) is None
+    assert not path.exists()
+    assert key not in cache._disk_index
+    assert cache.get_stats()["disk_entries"] == 0 and cache._disk_bytes == 0
+    assert cache.misses == 1
+
+    # Una escritura posterior vuelve a poblar la entrada
+    asyncio.run(cache.put(key, make_response("de nuevo")))
+    assert asyncio.run(make_cache().get(key)).text == "de nuevo"
@@ -0,0 +1,105 @@
+"""
+Tests de la clasificación de errores de Groq y del backoff de los reintentos
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+from groq import APIConnectionError, InternalServerError, RateLimitError
+
+from services.retry_policy import JobRetryPolicies, RetryPolicy
+
+TRANSCRIPTIONS_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+
+
+@pytest.fixture
+def policies(monkeypatch) -> JobRetryPolicies:
+    for name in ("JOB_RETRY_ENABLED", "JOB_RETRY_BASE_SECONDS", "JOB_RETRY_MAX_DELAY_SECONDS",
+                 "JOB_RETRY_RATE_LIMIT_RETRIES", "JOB_RETRY_TIMEOUT_RETRIES",
+                 "JOB_RETRY_CONNECTION_RETRIES", "JOB_RETRY_SERVER_ERROR_RETRIES"):
+        monkeypatch.delenv(name, raising=False)
+    return JobRetryPolicies()
+
+
+def groq_error(error_class, status_code: int, headers=None):
+    request = httpx.Request("POST", TRANSCRIPTIONS_URL)
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class(f"HTTP {status_code}", response=response, body=None)
+
+
+def wrapped(error: Exception) -> Exception:
+    """Error tal como llega al job: re-lanzado por los servicios sin `from`"""
+    try:
+        try:
+            raise error
+        except Exception as e:
+            raise Exception(f"Error en transcripción con Groq: {e}")
+    except Exception as outer:
+        return outer
+
+
+def test_errors_are_classified_through_the_context_chain(policies):
+    request = httpx.Request("POST", TRANSCRIPTIONS_URL)
+
+    assert policies.classify(wrapped(groq_error(RateLimitError, 429)))[0] == "rate_limit"
+    assert policies.classify(wrapped(groq_error(InternalServerError, 503)))[0] == "server_error"
+    assert policies.classify(wrapped(APIConnectionError(request=request)))[0] == "connection"
+    assert policies.classify(wrapped(httpx.ReadTimeout("timeout", request=request)))[0] == "timeout"
+    # Un error de la petición (4xx) o uno propio no se reintentan
+    assert policies.next_delay(wrapped(groq_error(RateLimitError, 400)), 0) == (None, None)
+    assert policies.next_delay(wrapped(ValueError("audio corrupto")), 0) == (None, None)
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after": "7"}, 7.0),
+    ({"retry-after-ms": "1500"}, 1.5),
+    ({"retry-after": format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)}, 30.0),
+])
+def test_rate_limit_honours_retry_after(policies, headers, expected):
+    error = wrapped(groq_error(RateLimitError, 429, headers))
+
+    error_class, retry_after = policies.classify(error)
+    assert error_class == "rate_limit"
+    # Una fecha HTTP tiene resolución de segundos
+    assert retry_after == pytest.approx(expected, abs=2.0)
+
+    # La espera es la pedida por el servidor más un jitter menor que el backoff base
+    _, delay = policies.next_delay(error, retries=3)
+    assert expected - 2.0 <= delay <= expected + policies.policies["rate_limit"].base_delay + 2.0
+
+
+def test_retry_after_is_ignored_outside_rate_limits():
+    policy = RetryPolicy(max_retries=3, base_delay=2, max_delay=120)
+
+    for retries in range(3):
+        backoff = min(120, 2 * 2 ** retries)
+        assert backoff / 2 <= policy.delay(retries, retry_after=60) <= backoff
+
+
+def test_retries_stop_when_the_class_runs_out(policies):
+    error = wrapped(groq_error(InternalServerError, 502))
+    max_retries = policies.max_retries("server_error")
+
+    assert policies.next_delay(error, max_retries - 1)[1] is not None
+    assert policies.next_delay(error, max_retries) == ("server_error", None)
+
+
+def test_groq_client_leaves_retries_to_the_job_queue(monkeypatch):
+    from services.groq_transcription_service import GroqTranscriptionService
+
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_test")
+    monkeypatch.setenv("GROQ_PREWARM", "false")
+
+    async def scenario():
+        service = GroqTranscriptionService()
+        await service.initialize()
+        try:
+            return service.client.max_retries
+        finally:
+            await service.close()
+
+    # Los reintentos del SDK se sumarían a los de la cola (y a su Retry-After)
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,141 @@
+"""
+Tests del single-flight de la cola de jobs: adjuntar uploads repetidos a un job
+en curso y cancelar el job original sin cancelar a los adjuntados
+"""
+
+import asyncio
+
+import pytest
+
+from models.transcription_models import JobStatus
+from services.job_queue_service import TERMINAL_STATUSES
+from queue_helpers import FakeWork, submit, wait_terminal
+
+
+def test_repeated_input_joins_the_job_in_flight(make_service, tmp_path):
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        await service.start()
+        try:
+            work.decode_gate.set()
+            leader_id = await submit(service, tmp_path, "leader")
+            await asyncio.wait_for(work.transcribing.wait(), timeout=5)
+            follower_id = await submit(service, tmp_path, "follower")
+
+            follower = service.jobs[follower_id]
+            assert follower.coalesced_with == leader_id
+            assert service._followers[leader_id] == [follower_id]
+            assert service.inflight_job_id("same-input") == leader_id
+
+            work.transcribe_gate.set()
+            await wait_terminal(service, leader_id, follower_id)
+
+            assert follower.status == JobStatus.COMPLETED
+            assert follower.result.text == "hola"
+            assert work.transcriptions == 1
+            assert service.inflight_job_id("same-input") is None
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("stage", ["decode", "transcribe"])
+def test_cancelling_the_leader_hands_its_run_to_the_followers(make_service, tmp_path, stage):
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        await service.start()
+        try:
+            leader_id = await submit(service, tmp_path, "leader")
+            first_id = await submit(service, tmp_path, "first")
+            second_id = await submit(service, tmp_path, "second")
+            if stage == "transcribe":
+                work.decode_gate.set()
+                await asyncio.wait_for(work.transcribing.wait(), timeout=5)
+            else:
+                await asyncio.wait_for(work.decoding.wait(), timeout=5)
+
+            assert await service.cancel_job(leader_id)
+
+            # El original queda cancelado; el primer adjuntado hereda su trabajo en curso
+            assert service.jobs[leader_id].status == JobStatus.CANCELLED
+            first, second = service.jobs[first_id], service.jobs[second_id]
+            assert first.status not in TERMINAL_STATUSES and first.coalesced_with is None
+            assert second.coalesced_with == first_id
+            assert service.inflight_job_id("same-input") == first_id
+            assert first_id in service.active_jobs and leader_id not in service.active_jobs
+
+            work.decode_gate.set()
+            work.transcribe_gate.set()
+            await wait_terminal(service, first_id, second_id)
+
+            assert first.status == JobStatus.COMPLETED and second.status == JobStatus.COMPLETED
+            assert second.result.text == "hola"
+            assert service.jobs[leader_id].status == JobStatus.CANCELLED
+            # El trabajo no se repitió
+            assert work.decodes == 1 and work.transcriptions == 1
+            assert (await service.store.get_transitions(first_id))[-1]["status"] == "completed"
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_a_follower_leaves_the_leader_running(make_service, tmp_path):
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        await service.start()
+        try:
+            leader_id = await submit(service, tmp_path, "leader")
+            follower_id = await submit(service, tmp_path, "follower")
+            await asyncio.wait_for(work.decoding.wait(), timeout=5)
+
+            assert await service.cancel_job(follower_id)
+
+            work.decode_gate.set()
+            work.transcribe_gate.set()
+            await wait_terminal(service, leader_id)
+
+            assert service.jobs[leader_id].status == JobStatus.COMPLETED
+            assert service.jobs[follower_id].status == JobStatus.CANCELLED
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
+
+
+def test_leader_cancelled_elsewhere_requeues_the_first_follower(make_service, tmp_path):
+    async def scenario():
+        service = make_service()
+        work = FakeWork(service)
+        await service.start()
+        try:
+            leader_id = await submit(service, tmp_path, "leader")
+            follower_id = await submit(service, tmp_path, "follower")
+            await asyncio.wait_for(work.decoding.wait(), timeout=5)
+
+            # Cancelación que no pasa por cancel_job (p. ej. escrita por otro proceso):
+            # el trabajo del original ya se detuvo y el adjuntado vuelve a empezar
+            leader = service.jobs[leader_id]
+            leader.status = JobStatus.CANCELLED
+            service._cancel_token(leader_id).cancel()
+            await service._dispatch_progress(leader)
+
+            follower = service.jobs[follower_id]
+            assert follower.coalesced_with is None
+            assert follower.status == JobStatus.QUEUED
+            assert service.inflight_job_id("same-input") == follower_id
+
+            work.decode_gate.set()
+            work.transcribe_gate.set()
+            await wait_terminal(service, follower_id)
+
+            assert follower.status == JobStatus.COMPLETED
+            assert work.decodes == 2
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
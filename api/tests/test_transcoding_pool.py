@@ -0,0 +1,162 @@
+"""
+Tests del pool de transcodificación: slots de streaming y control de admisión
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from services.transcoding_pool import TranscodingPool, TranscodingPoolBusyError
+
+# PCM crudo a PCM crudo: FFmpeg real, sin depender de archivos de prueba
+PCM_ARGS = ['-f', 's16le', '-ar', '16000', '-ac', '1', '-i', 'pipe:0', '-f', 's16le', 'pipe:1']
+# Sin sondeo ni buffer de salida: FFmpeg escribe sin esperar a más stdin
+FLUSHED_PCM_ARGS = ['-probesize', '32'] + PCM_ARGS[:-1] + ['-flush_packets', '1', 'pipe:1']
+SILENCE_ARGS = ['-f', 'lavfi', '-i', 'anullsrc=r=16000:cl=mono', '-t', '0.1', '-f', 's16le', 'pipe:1']
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    def factory(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return TranscodingPool()
+    return factory
+
+
+def test_streaming_upload_takes_no_slot_until_its_first_chunk(make_pool):
+    async def scenario():
+        pool = make_pool(TRANSCODE_MAX_WORKERS=1, TRANSCODE_MAX_STREAMING=1)
+        gate = asyncio.Event()
+
+        async def slow_upload():
+            await gate.wait()
+            yield b"\x00\x01" * 1600
+
+        stream = asyncio.create_task(pool.run(PCM_ARGS, slow_upload(), label="stream_decode"))
+        await asyncio.sleep(0.05)
+        assert pool.streaming_active == 0 and pool.streaming_waiting == 0
+
+        # El pool de archivos sigue libre mientras el cliente no envía
+        assert len(await asyncio.wait_for(pool.run(SILENCE_ARGS, label="decode"), timeout=10)) == 3200
+
+        gate.set()
+        assert await asyncio.wait_for(stream, timeout=10) == b"\x00\x01" * 1600
+        assert pool.streaming_active == 0 and pool.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_streaming_runs_do_not_use_the_file_slots(make_pool):
+    async def scenario():
+        pool = make_pool(TRANSCODE_MAX_WORKERS=1, TRANSCODE_MAX_STREAMING=2)
+        release = asyncio.Event()
+        started = 0
+
+        async def upload():
+            nonlocal started
+            yield b"\x00\x00" * 160
+            started += 1
+            await release.wait()
+
+        streams = [asyncio.create_task(pool.run(PCM_ARGS, upload())) for _ in range(2)]
+        while started < 2:
+            await asyncio.sleep(0.01)
+        assert pool.streaming_active == 2 and pool.active == 0
+
+        await asyncio.wait_for(pool.run(SILENCE_ARGS), timeout=10)
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(*streams), timeout=10)
+
+    asyncio.run(scenario())
+
+
+def test_failed_output_cancels_the_upload_feed_and_kills_ffmpeg(make_pool, monkeypatch):
+    processes = []
+    spawn = asyncio.create_subprocess_exec
+
+    async def recording_spawn(*args, **kwargs):
+        process = await spawn(*args, **kwargs)
+        processes.append(process)
+        return process
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", recording_spawn)
+
+    class DiskFull(Exception):
+        pass
+
+    class FullDisk:
+        def write(self, data):
+            raise DiskFull("No space left on device")
+
+    async def scenario():
+        pool = make_pool(TRANSCODE_MAX_WORKERS=1)
+
+        async def stalled_upload():
+            # Lo bastante para que FFmpeg empiece a escribir en stdout
+            yield b"\x00\x00" * 16000
+            await asyncio.Event().wait()
+
+        with pytest.raises(DiskFull):
+            await asyncio.wait_for(pool.run(FLUSHED_PCM_ARGS, stalled_upload(), output=FullDisk()), timeout=10)
+
+        # Ni el feed esperando al upload ni FFmpeg siguen vivos
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        assert processes[0].returncode is not None
+        assert pool.streaming_active == 0 and pool.failed_jobs == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_waiting_queue_rejects_with_retry_after(make_pool):
+    async def scenario():
+        pool = make_pool(TRANSCODE_MAX_WORKERS=1, TRANSCODE_MAX_STREAMING=1, TRANSCODE_MAX_QUEUE=1)
+        release = asyncio.Event()
+
+        async def upload():
+            yield b"\x00\x00" * 160
+            await release.wait()
+
+        running = asyncio.create_task(pool.run(PCM_ARGS, upload()))
+        queued = asyncio.create_task(pool.run(PCM_ARGS, upload()))
+        while pool.streaming_waiting < 1:
+            await asyncio.sleep(0.01)
+        assert pool.streaming_active == 1
+
+        with pytest.raises(TranscodingPoolBusyError) as busy:
+            await pool.run(PCM_ARGS, upload())
+        assert busy.value.waiting == 1
+        assert busy.value.retry_after >= 1.0
+        assert pool.rejected_jobs == 1
+
+        # Los slots de archivos no están saturados: su admisión sigue abierta
+        pool.ensure_capacity()
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(running, queued), timeout=10)
+        pool.ensure_capacity(streaming=True)
+
+    asyncio.run(scenario())
+
+
+def test_busy_pool_answers_503_with_retry_after(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    # main registra su log relativo al directorio de trabajo al importarse
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_test")
+    main = importlib.import_module("main")
+
+    pool = main.transcoding_pool
+    monkeypatch.setattr(pool, "streaming_active", pool.max_streaming)
+    monkeypatch.setattr(pool, "streaming_waiting", pool.max_waiting)
+    monkeypatch.setattr(pool, "estimate_retry_after", lambda streaming=False: 7.2)
+
+    response = TestClient(main.app).post(
+        "/transcribe", files={"file": ("audio.wav", b"RIFF" + b"\x00" * 64, "audio/wav")}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "8"
@@ -0,0 +1,100 @@
+"""
+Tests del VAD por energía con PCM sintético (16kHz, mono, 16 bits)
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.audio_processor import AudioProcessor
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture
+def processor(monkeypatch) -> AudioProcessor:
+    for name in ("VAD_ENABLED", "VAD_MIN_SILENCE_SECONDS", "VAD_PADDING_SECONDS", "VAD_NOISE_MARGIN_DB",
+                 "VAD_MIN_THRESHOLD_DB", "VAD_MAX_THRESHOLD_DB"):
+        monkeypatch.delenv(name, raising=False)
+    return AudioProcessor()
+
+
+def tone(seconds: float, frequency: float = 220.0) -> np.ndarray:
+    """Tono con energía de voz"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * 32767 * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+def silence(seconds: float, seed: int = 0) -> np.ndarray:
+    """Ruido de fondo muy bajo (~-65 dBFS), como una grabación sin voz"""
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 20, int(seconds * SAMPLE_RATE)).astype(np.int16)
+
+
+def trim(processor: AudioProcessor, *parts: np.ndarray):
+    return asyncio.run(processor.trim_silence(np.concatenate(parts).tobytes()))
+
+
+def test_long_silence_is_removed_keeping_padding(processor):
+    pcm, speech_map = trim(processor, tone(2), silence(6), tone(3))
+
+    trimmed = len(pcm) / 2 / SAMPLE_RATE
+    padding = processor.vad_padding_seconds
+    # Quedan las dos frases y como mucho el margen a cada lado del silencio cortado
+    assert 5.0 <= trimmed <= 5.0 + 2 * padding + 0.1
+    assert speech_map.original_duration == pytest.approx(11.0)
+    assert speech_map.speech_duration == pytest.approx(trimmed)
+    assert len(speech_map.spans) == 2
+
+
+def test_speech_map_translates_trimmed_timestamps_back(processor):
+    _, speech_map = trim(processor, tone(2), silence(6), tone(3))
+
+    second_trimmed_start, second_original_start, _ = speech_map.spans[1]
+    # La segunda frase empieza a los 8s del original, con el margen del VAD
+    assert 8.0 - processor.vad_padding_seconds - 0.1 <= second_original_start <= 8.0
+    assert speech_map.to_original(1.0) == pytest.approx(1.0, abs=0.05)
+    assert speech_map.to_original(second_trimmed_start + 1.0) == pytest.approx(second_original_start + 1.0)
+    # Un fin justo en el borde pertenece al tramo anterior
+    first_end = speech_map.spans[0][0] + speech_map.spans[0][2]
+    assert speech_map.to_original(first_end, is_end=True) == pytest.approx(first_end)
+
+
+def test_short_pauses_are_kept(processor):
+    original = np.concatenate([tone(2), silence(1), tone(2)])
+    pcm, speech_map = trim(processor, original)
+
+    assert len(pcm) == len(original.tobytes())
+    assert len(speech_map.spans) == 1
+
+
+def test_all_silence_returns_empty_audio(processor):
+    pcm, speech_map = trim(processor, silence(5))
+
+    assert pcm == b""
+    assert speech_map.is_silent
+    assert speech_map.original_duration == pytest.approx(5.0)
+
+
+def test_frame_features_by_blocks_match_the_whole_signal(processor):
+    samples = np.concatenate((tone(1.013), silence(2.5), tone(0.7, frequency=3000.0)))
+    frame_size = int(SAMPLE_RATE * processor.vad_frame_seconds)
+    n_frames = -(-len(samples) // frame_size)
+
+    # Referencia: matriz completa en float (lo que los bloques evitan reservar)
+    padded = np.zeros(n_frames * frame_size, dtype=np.float64)
+    padded[:len(samples)] = samples / 32768.0
+    frames = padded.reshape(n_frames, frame_size)
+    expected_rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    expected_zcr = np.mean(np.abs(np.diff(np.signbit(frames).astype(np.int8), axis=1)), axis=1)
+
+    # Bloques pequeños que no dividen el audio: el último bloque y el último frame quedan incompletos
+    processor.vad_block_frames = 7
+    rms, zero_crossings = processor._frame_features(samples, frame_size, n_frames)
+
+    np.testing.assert_allclose(rms, expected_rms, rtol=1e-4, atol=1e-7)
+    np.testing.assert_allclose(zero_crossings, expected_zcr, atol=1e-6)
+    whole = processor.detect_speech(samples)
+    processor.vad_block_frames = 1024
+    assert whole == processor.detect_speech(samples)
@@ -0,0 +1,308 @@
+"""
+Tests del WebSocketManager: reanudación con last_seq, reenvío del mensaje final
+y consumidores lentos (degradación de la cola de envío y cierre con 1013)
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from models.transcription_models import (
+    AudioInfo,
+    JobStatus,
+    TranscriptionJob,
+    TranscriptionRequest,
+    TranscriptionResponse,
+    WebSocketMessage
+)
+from services.job_queue_service import job_queue_service
+from services.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    """WebSocket en memoria que guarda lo que se le envía"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+
+    def received(self):
+        """Mensajes del canal (sin el de bienvenida)"""
+        return [message for message in self.sent if message["type"] != "connected"]
+
+
+class StalledWebSocket(FakeWebSocket):
+    """Cliente que deja de leer: los envíos se quedan esperando hasta abrir `gate`"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+
+    async def send_text(self, text: str):
+        await self.gate.wait()
+        await super().send_text(text)
+
+
+@pytest.fixture
+def make_manager(monkeypatch):
+    def make(**env) -> WebSocketManager:
+        for name in ("WEBSOCKET_SEND_QUEUE_SIZE", "WEBSOCKET_SEND_TIMEOUT_SECONDS",
+                     "WEBSOCKET_EVENT_LOG_SIZE", "WEBSOCKET_EVENT_LOG_MAX_MB"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return WebSocketManager()
+    return make
+
+
+@pytest.fixture
+def stored_jobs(monkeypatch):
+    """Jobs que devuelve la cola, y cuántas veces se consultan"""
+    jobs = {}
+    lookups = []
+
+    async def get_job_status(job_id):
+        lookups.append(job_id)
+        return jobs.get(job_id)
+
+    monkeypatch.setattr(job_queue_service, "get_job_status", get_job_status)
+    return jobs, lookups
+
+
+def make_job(job_id: str, status: JobStatus = JobStatus.PROCESSING, text: str = None) -> TranscriptionJob:
+    result = None
+    if text is not None:
+        result = TranscriptionResponse(
+            text=text,
+            language="es",
+            model_used="fake",
+            audio_info=AudioInfo(duration=1.0, sample_rate=16000, channels=1, format="wav", size_mb=0.03),
+            processing_time=0.1
+        )
+    return TranscriptionJob(
+        job_id=job_id,
+        status=status,
+        progress=100.0 if status == JobStatus.COMPLETED else 50.0,
+        message="Estado actual",
+        audio_file_path="audio.wav",
+        request_params=TranscriptionRequest(audio_file_path="audio.wav"),
+        result=result,
+        completed_at=datetime.now() if status == JobStatus.COMPLETED else None
+    )
+
+
+async def publish_progress(manager: WebSocketManager, job_id: str, count: int):
+    for i in range(count):
+        job = make_job(job_id)
+        job.progress = float(i)
+        await manager.broadcast_progress(job)
+
+
+async def flush(manager: WebSocketManager):
+    """Esperar a que las tareas escritoras vacíen sus colas"""
+    while any(connection.queue for connection in manager._connections.values()):
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.001)
+
+
+def test_reconnect_replays_only_the_missed_messages(make_manager, stored_jobs):
+    async def scenario():
+        manager = make_manager()
+        await publish_progress(manager, "job-1", 5)
+        stream = manager._event_logs["job-1"].stream
+
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "job-1", last_seq=2, stream=stream)
+        await flush(manager)
+        return websocket.received()
+
+    received = asyncio.run(scenario())
+
+    assert [message["seq"] for message in received] == [3, 4, 5]
+    assert [message["data"]["progress"] for message in received] == [2.0, 3.0, 4.0]
+    assert stored_jobs[1] == []
+
+
+@pytest.mark.parametrize("cursor", ["gap", "other_stream", "ahead"])
+def test_unrecoverable_cursor_falls_back_to_a_snapshot(make_manager, stored_jobs, cursor):
+    jobs, lookups = stored_jobs
+    jobs["job-1"] = make_job("job-1")
+
+    async def scenario():
+        manager = make_manager(WEBSOCKET_EVENT_LOG_SIZE="3")
+        await publish_progress(manager, "job-1", 10)
+        log = manager._event_logs["job-1"]
+        last_seq, stream = {
+            # Los mensajes 3..7 ya salieron del registro
+            "gap": (2, log.stream),
+            # Cursor de otro proceso o de antes de un reinicio
+            "other_stream": (8, "deadbeef"),
+            "ahead": (42, log.stream),
+        }[cursor]
+
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "job-1", last_seq=last_seq, stream=stream)
+        await flush(manager)
+        return websocket.received(), manager.snapshots_sent
+
+    received, snapshots = asyncio.run(scenario())
+
+    assert snapshots == 1 and lookups == ["job-1"]
+    assert len(received) == 1
+    # El estado actual lleva el seq desde el que se puede reanudar
+    assert received[0]["type"] == "status"
+    assert received[0]["seq"] == 10
+
+
+def test_reconnect_without_cursor_replays_the_final_message_encoded_once(make_manager, stored_jobs):
+    jobs, lookups = stored_jobs
+    jobs["job-1"] = make_job("job-1", JobStatus.COMPLETED, text="hola")
+
+    async def scenario():
+        manager = make_manager()
+        await publish_progress(manager, "job-1", 3)
+        await manager.broadcast_completion(jobs["job-1"])
+        encoded = manager.messages_encoded
+
+        received = []
+        for _ in range(3):
+            websocket = FakeWebSocket()
+            await manager.connect(websocket, "job-1")
+            await flush(manager)
+            received.append(websocket.received())
+            await manager.disconnect(websocket)
+        return manager, received, manager.messages_encoded - encoded
+
+    manager, received, encodings = asyncio.run(scenario())
+
+    for messages in received:
+        assert [message["type"] for message in messages] == ["completed"]
+        assert messages[0]["seq"] == 4
+        assert messages[0]["data"]["result"]["text"] == "hola"
+    # El resultado se carga y se codifica una vez (más el "connected" de cada conexión)
+    assert lookups == ["job-1"]
+    assert encodings == 1 + 3
+    # El texto cacheado cuenta para el tope de memoria del registro
+    log = manager._event_logs["job-1"]
+    assert log.bytes == sum(len(entry[1]) for entry in log.entries) + len(log.final_text[1])
+    assert manager._event_log_bytes == log.bytes
+
+
+def test_cached_final_message_is_dropped_when_the_channel_moves_on(make_manager, stored_jobs):
+    jobs, _ = stored_jobs
+    jobs["job-1"] = make_job("job-1", JobStatus.COMPLETED, text="hola")
+
+    async def scenario():
+        manager = make_manager()
+        await manager.broadcast_completion(jobs["job-1"])
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "job-1")
+        await flush(manager)
+
+        # Re-encolado desde la dead-letter: el mensaje final deja de serlo
+        await publish_progress(manager, "job-1", 1)
+        return manager
+
+    manager = asyncio.run(scenario())
+
+    log = manager._event_logs["job-1"]
+    assert log.final_text is None
+    assert log.bytes == sum(len(entry[1]) for entry in log.entries)
+    assert manager._event_log_bytes == log.bytes
+
+
+def test_slow_consumer_is_downgraded_to_the_latest_progress(make_manager, stored_jobs):
+    jobs, _ = stored_jobs
+    jobs["job-1"] = make_job("job-1")
+
+    async def scenario():
+        manager = make_manager(WEBSOCKET_SEND_QUEUE_SIZE="4")
+        websocket = StalledWebSocket()
+        await manager.connect(websocket, "job-1")
+        connection = manager._connections[websocket]
+
+        await publish_progress(manager, "job-1", 10)
+        assert connection.downgraded
+        # Solo queda pendiente el último progreso
+        assert sum(1 for _, message_type in connection.queue if message_type == "progress") == 1
+
+        # Los mensajes finales no se descartan
+        completed = make_job("job-1", JobStatus.COMPLETED, text="hola")
+        await manager.broadcast_completion(completed)
+
+        websocket.gate.set()
+        await flush(manager)
+        return manager, connection, websocket
+
+    manager, connection, websocket = asyncio.run(scenario())
+
+    received = websocket.received()
+    progress = [message["data"]["progress"] for message in received if message["type"] == "progress"]
+    assert progress[-1] == 9.0 and len(progress) < 10
+    assert received[-1]["type"] == "completed"
+    assert received[-1]["data"]["result"]["text"] == "hola"
+    assert manager.connections_downgraded == 1 and manager.messages_dropped > 0
+    # Al ponerse al día vuelve a recibir todos los mensajes
+    assert not connection.downgraded
+    assert websocket.closed is None
+
+
+def test_full_queue_of_final_messages_closes_the_socket(make_manager):
+    async def scenario():
+        manager = make_manager(WEBSOCKET_SEND_QUEUE_SIZE="2")
+        websocket = StalledWebSocket()
+        await manager.connect(websocket)
+
+        # Mensajes finales de varios jobs: no se pueden descartar ni fusionar
+        sent = 0
+        while websocket.closed is None and sent < 10:
+            sent += 1
+            await manager.send_message_to_websocket(
+                websocket, WebSocketMessage(type="error", job_id=f"job-{sent}", data={"error": "fallo"})
+            )
+        return manager, websocket, sent
+
+    manager, websocket, sent = asyncio.run(scenario())
+
+    # En cuanto la cola se llena de mensajes que no se pueden descartar, se cierra
+    assert sent <= 3
+    assert websocket.closed == 1013
+    assert manager.connections_evicted == 1
+    assert websocket not in manager.connection_metadata and websocket not in manager._connections
+
+
+def test_socket_that_blocks_a_send_past_the_timeout_is_closed(make_manager, stored_jobs):
+    jobs, _ = stored_jobs
+    jobs["job-1"] = make_job("job-1")
+
+    async def scenario():
+        manager = make_manager(WEBSOCKET_SEND_TIMEOUT_SECONDS="0.05")
+        websocket = StalledWebSocket()
+        await manager.connect(websocket, "job-1")
+
+        async def closed():
+            while websocket.closed is None:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(closed(), timeout=5)
+
+        # Los mensajes siguientes ya no van a esa conexión
+        await publish_progress(manager, "job-1", 1)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+
+    assert websocket.closed == 1013
+    assert manager.connections_evicted == 1
+    assert "job-1" not in manager.active_connections
+    assert websocket.sent == []
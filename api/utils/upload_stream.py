@@ -0,0 +1,95 @@
+"""
+Lectura en streaming de uploads con validación de tamaño
+"""
+
+import os
+import hashlib
+import tempfile
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from models.transcription_models import AudioMetadata, TranscriptionResponse
+
+
+@dataclass
+class IngestedUpload:
+    """Resultado de recibir un upload"""
+    size: int
+    content_sha256: str
+    cache_key: Optional[str] = None
+    processed_audio_path: Optional[str] = None
+    audio_metadata: Optional[AudioMetadata] = None
+    temp_file_paths: List[str] = field(default_factory=list)
+    cached_result: Optional[TranscriptionResponse] = None
+    # Job en curso con la misma entrada (el upload no se ha decodificado)
+    inflight_job_id: Optional[str] = None
+
+
+class UploadStream:
+    """
+    Iterador asíncrono sobre un UploadFile que valida el tamaño máximo
+
+    Calcula el SHA-256 del contenido a medida que se lee. `on_complete` se
+    invoca tras el último chunk, antes de cerrar el iterador.
+    """
+
+    def __init__(
+        self,
+        file: UploadFile,
+        max_size: int,
+        chunk_size: int = 64 * 1024,
+        on_complete: Optional[Callable[["UploadStream"], Awaitable[None]]] = None
+    ):
+        self.file = file
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.on_complete = on_complete
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[bytes]:
+        while chunk := await self.file.read(self.chunk_size):
+            self.size += len(chunk)
+            if self.size > self.max_size:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Archivo demasiado grande. Máximo: {self.max_size // (1024*1024)}MB"
+                )
+            self.sha256.update(chunk)
+            yield chunk
+
+        if self.on_complete:
+            await self.on_complete(self)
+
+    def hexdigest(self) -> str:
+        """SHA-256 de lo leído hasta ahora"""
+        return self.sha256.hexdigest()
+
+    async def save_to_temp_file(self, suffix: str = "", directory: Optional[str] = None) -> str:
+        """
+        Volcar el upload a un archivo temporal (para formatos que requieren seek)
+
+        Args:
+            suffix: Extensión del archivo
+            directory: Directorio del archivo (por defecto el temporal del sistema)
+
+        Returns:
+            str: Ruta del archivo temporal
+        """
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as temp_file:
+            temp_file_path = temp_file.name
+
+        try:
+            with open(temp_file_path, "wb") as output:
+                async for chunk in self:
+                    output.write(chunk)
+        except BaseException:
+            os.unlink(temp_file_path)
+            raise
+
+        return temp_file_path
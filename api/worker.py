@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Proceso worker de transcripción
+Reclama jobs de la cola compartida (JOB_STORE=sqlite o redis) con lease y
+heartbeat, para escalar el procesamiento fuera de los procesos de la API.
+
+Despliegue:
+    API:     JOB_QUEUE_MODE=api uvicorn main:app --workers 4
+    Workers: python worker.py   (uno o más, en este u otros nodos)
+
+Los workers necesitan acceso al audio que guardan los procesos de la API
+(JOB_AUDIO_DIR compartido, p. ej. un volumen común, cuando están en otros nodos).
+Con EVENT_BUS=unix o redis el progreso llega a los procesos de la API por el
+bus de eventos, sin esperar al siguiente sondeo del store.
+"""
+
+import os
+import signal
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+# Cargar variables de entorno desde .env
+load_dotenv()
+os.environ["JOB_QUEUE_MODE"] = "worker"
+
+from loguru import logger
+
+from services.job_queue_service import job_queue_service
+from services.convex_client import initialize_convex_client
+
+# Configuración de logging (job_queue_service usa logging estándar)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s - %(message)s")
+logger.add("logs/worker.log", rotation="1 day", retention="7 days", level="INFO")
+
+
+async def main():
+    """Arrancar los workers y esperar a SIGINT/SIGTERM para detenerlos limpiamente"""
+    os.makedirs("logs", exist_ok=True)
+
+    convex_url = os.getenv("CONVEX_URL")
+    if convex_url:
+        initialize_convex_client(convex_url, os.getenv("CONVEX_API_KEY"))
+        logger.info(f"✅ ConvexClient inicializado para {convex_url}")
+
+    await job_queue_service.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await stop_event.wait()
+
+    # Los jobs en curso vuelven a la cola para otro worker
+    logger.info("🔄 Deteniendo worker...")
+    await job_queue_service.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())